@@ -0,0 +1,104 @@
+# backend/app/__main__.py
+# ------------------------------------------------------------
+# Production entry point: python -m app
+# ------------------------------------------------------------
+"""
+Serve app.main:app with uvicorn across N worker processes (default: one per
+core). Workers are separate interpreters, so before they start this process
+makes sure whatever must agree between them is shared:
+
+- STATE_BACKEND=memory becomes an mmap table every worker maps, so login
+  throttling, the user caches and revocation notices cover all workers;
+- with STATE_BACKEND=server and nothing listening yet, the state server is
+  started here;
+- without JWT_KEYS_DIR a signing key is generated into a run directory, so a
+  token signed by one worker verifies in every other;
+- the password-hash pool is split across workers instead of each one
+  starting a process per core.
+
+Run from backend/:
+    python -m app --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+import tempfile
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from app.config import settings
+
+logger = logging.getLogger("app")
+
+
+def default_workers() -> int:
+    return settings.WEB_WORKERS or os.cpu_count() or 1
+
+
+def prepare_workers(workers: int, run_dir: Path, environ: MutableMapping[str, str] = os.environ) -> list:
+    """
+    Set the environment the workers will read their settings from.
+    Returns cleanup callables for anything started here.
+    """
+    cleanup = []
+    if settings.PASSWORD_HASH_WORKERS is None and "PASSWORD_HASH_WORKERS" not in environ:
+        environ["PASSWORD_HASH_WORKERS"] = str(max((os.cpu_count() or 1) // workers, 1))
+    if workers < 2:
+        return cleanup
+
+    if settings.STATE_BACKEND == "memory":
+        from app.core.shared_state import MmapSharedState
+
+        path = settings.STATE_MMAP_PATH or str(run_dir / "state.mmap")
+        # create (or validate) the table once, before workers race to do it
+        MmapSharedState(path, settings.STATE_MMAP_SLOTS, settings.STATE_MMAP_SLOT_SIZE).close()
+        environ["STATE_BACKEND"] = "mmap"
+        environ["STATE_MMAP_PATH"] = path
+    elif settings.STATE_BACKEND == "server":
+        from app.core.shared_state import connect_state_server, start_state_server
+
+        try:
+            connect_state_server(settings.STATE_SERVER_ADDRESS)
+        except OSError:
+            server = start_state_server(settings.STATE_SERVER_ADDRESS)
+            cleanup.append(server.shutdown)
+
+    if not settings.JWT_KEYS_DIR:
+        from app.core.keys import KeyRing
+
+        keys_dir = run_dir / "jwt-keys"
+        KeyRing(str(keys_dir), publish_seconds=0, reload_seconds=0).rotate(retain_seconds=0)
+        environ["JWT_KEYS_DIR"] = str(keys_dir)
+        logger.warning("JWT_KEYS_DIR is not set; workers share a key in %s that is lost on exit", keys_dir)
+    return cleanup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the auth service with multiple worker processes.")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers(), help="default: WEB_WORKERS or one per core")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+
+    import uvicorn
+
+    with tempfile.TemporaryDirectory(prefix="auth-run-") as run_dir:
+        cleanup = prepare_workers(args.workers, Path(run_dir))
+        try:
+            uvicorn.run(
+                "app.main:app",
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                log_level=args.log_level,
+                proxy_headers=True,
+            )
+        finally:
+            for step in cleanup:
+                step()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Literal
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from app.api.deps import require_admin
+from app.db.session import SessionLocal
+from app.services.user_import import ImportJobConflict, import_jobs, resume_import_job, start_import_job
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def get_session_factory():
+    return SessionLocal
+
+
+@router.post("/users/import", status_code=status.HTTP_202_ACCEPTED)
+def import_users(
+    file: UploadFile = File(...),
+    format: Literal["csv", "jsonl"] = Query("csv"),
+    session_factory=Depends(get_session_factory),
+):
+    """
+    Start a background import of a CSV/JSONL upload; poll the returned job for progress.
+    """
+    with tempfile.NamedTemporaryFile(prefix="user-import-", suffix=f".{format}", delete=False) as tmp:
+        shutil.copyfileobj(file.file, tmp, length=1024 * 1024)
+    job_id = start_import_job(session_factory, Path(tmp.name), format)
+    return {"job_id": job_id}
+
+
+@router.get("/users/import/{job_id}")
+def import_status(job_id: str):
+    progress = import_jobs.get(job_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown import job")
+    return {**asdict(progress), "rate": progress.rate}
+
+
+@router.post("/users/import/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+def resume_import(job_id: str, session_factory=Depends(get_session_factory)):
+    """
+    Resume a failed import after its last committed batch.
+    """
+    try:
+        resume_import_job(session_factory, job_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown import job")
+    except ImportJobConflict:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Import job is still running")
+    return {"job_id": job_id}
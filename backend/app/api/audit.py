@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import require_admin
+from app.config import settings
+from app.db.session import get_async_db
+from app.schemas.audit import AuditPage
+from app.services.audit_query import AuditFilter, InvalidCursor, fetch_page, stream_ndjson
+
+router = APIRouter(prefix="/audit", tags=["audit"], dependencies=[Depends(require_admin)])
+
+
+def audit_filter(
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    success: Optional[bool] = None,
+    ip: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> AuditFilter:
+    return AuditFilter(user_id=user_id, action=action, success=success, ip_address=ip, since=since, until=until)
+
+
+@router.get("/events", response_model=AuditPage)
+async def list_events(
+    filters: AuditFilter = Depends(audit_filter),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Newest-first audit events. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        items, next_cursor = await fetch_page(db, filters, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/events/export")
+async def export_events(filters: AuditFilter = Depends(audit_filter), db: AsyncSession = Depends(get_async_db)):
+    """
+    Every matching event as newline-delimited JSON, streamed in constant memory.
+    """
+    return StreamingResponse(
+        stream_ndjson(db, filters, settings.AUDIT_EXPORT_BATCH_SIZE),
+        media_type="application/x-ndjson",
+    )
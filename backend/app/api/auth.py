@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+import asyncio
+import logging
+import time
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal, get_async_db
 from app.schemas.auth import (
     RegisterRequest,
     LoginRequest,
@@ -10,22 +15,64 @@ from app.schemas.auth import (
     RegisterResponse,
     ForgotPasswordRequest,
     ResetPasswordRequest,
+    UserResponse,
+    IntrospectRequest,
+    IntrospectResponse,
+    SessionInfo,
+    RevokeAllResponse,
 )
 from app.services import user_service
-from app.services.token_service import issue_refresh_token, verify_and_rotate_refresh_token
+from app.services.auth_cache import CurrentUser, verify_access_token
+from app.services.user_cache import CachedUser
+from app.api.deps import bearer_scheme, get_current_user, get_token_claims, require_introspection_client
+from app.services.revocation import revocations, revoke_access_token_async
+from app.services.token_service import (
+    RefreshTokenReuse,
+    get_refresh_token_async,
+    is_active_refresh_token,
+    issue_refresh_token_async,
+    list_active_sessions_async,
+    revoke_all_refresh_tokens_async,
+    verify_and_rotate_refresh_token_async,
+    revoke_refresh_token_async,
+)
 from app.core.jwt import create_access_token
-from app.services.audit_services import log_action
-from app.core.security import verify_password
-from app.db.models import RefreshToken
-from datetime import timedelta
-from app.services.reset_service import issue_reset_token, consume_reset_token
-from app.services.email import send_password_reset_email
+from app.services.audit_services import log_action_async
+from app.core.security import needs_rehash, verify_password_async
+from app.core.hash_pool import HashingPoolBusy
+from app.core.rate_limit import RateLimited, login_guard
+from datetime import timedelta, timezone
+from app.services.reset_service import issue_reset_token_async, consume_reset_token_async
+from app.config import settings
+from app.services.email import queue_password_reset_email_async
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _upgrade_password_hash(user: CachedUser, verified_hash: str, password: str) -> None:
+    """
+    Background task: move a verified password to the current Argon2 parameters.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await user_service.upgrade_password_hash_async(db, user, verified_hash, password)
+    except Exception:
+        # Best effort; the next successful login tries again
+        logger.warning("password hash upgrade failed for user %s", user.id, exc_info=True)
+
+
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
-def register(payload: RegisterRequest, request: Request, db: Session = Depends(get_db)):
+async def register(payload: RegisterRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     - Validates email uniqueness
@@ -33,153 +80,278 @@ def register(payload: RegisterRequest, request: Request, db: Session = Depends(g
     - Optionally send verification email (placeholder)
     """
     try:
-        existing = user_service.get_user_by_email(db, payload.email)
+        existing = await user_service.lookup_user_by_email_async(db, payload.email)
         if existing:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
 
-        user = user_service.create_user(db, payload.email, payload.password, payload.full_name)
+        user = await user_service.create_user_async(db, payload.email, payload.password, payload.full_name, commit=False)
 
-        log_action(db, user.id, "register", success=True, ip=request.client.host)
+        await log_action_async(db, user.id, "register", success=True, ip=request.client.host, commit=False)
+        await db.commit()
         return RegisterResponse(id=user.id, email=user.email, full_name=user.full_name)
     except HTTPException:
         # already structured
-        log_action(db, None, "register", success=False, details="email exists", ip=request.client.host)
+        await log_action_async(db, None, "register", success=False, details="email exists", ip=request.client.host)
         raise
+    except HashingPoolBusy:
+        raise _hashing_busy()
     except Exception as exc:
-        log_action(db, None, "register", success=False, details=str(exc), ip=request.client.host)
+        await db.rollback()
+        await log_action_async(db, None, "register", success=False, details=str(exc), ip=request.client.host)
         raise HTTPException(status_code=500, detail="Registration failed")
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
     """
     Login with email and password.
     - Validates credentials
     - Enforces lockout checks (inactive users)
     - Returns access_token (body) and refresh_token (body for client storage)
     - Records audit log
+    - Re-hashes outdated password hashes after the response
     """
     try:
-        user = user_service.get_user_by_email(db, payload.email)
+        login_guard.check(request.client.host, payload.email)
+    except RateLimited as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(max(int(exc.retry_after + 0.999), 1))},
+        )
+
+    try:
+        user = await user_service.lookup_user_by_email_async(db, payload.email)
         if not user:
-            log_action(db, None, "login", success=False, details="user not found", ip=request.client.host)
+            login_guard.record_failure(payload.email)
+            await log_action_async(db, None, "login", success=False, details="user not found", ip=request.client.host)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
         if user_service.check_lockout(user):
-            log_action(db, user.id, "login", success=False, details="user locked", ip=request.client.host)
+            await log_action_async(db, user.id, "login", success=False, details="user locked", ip=request.client.host)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is locked or inactive")
 
-        if not verify_password(user.hashed_password, payload.password):
-            log_action(db, user.id, "login", success=False, details="bad password", ip=request.client.host)
+        hashed_password = await user_service.get_password_hash_async(db, user.id)
+        if hashed_password is None or not await verify_password_async(hashed_password, payload.password):
+            login_guard.record_failure(payload.email)
+            await log_action_async(db, user.id, "login", success=False, details="bad password", ip=request.client.host)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-        access = create_access_token({"sub": user.email})
-        refresh = issue_refresh_token(db, user.id)
+        access = create_access_token({"sub": str(user.id)})
+        refresh = await issue_refresh_token_async(db, user.id, commit=False)
 
-        log_action(db, user.id, "login", success=True, ip=request.client.host)
+        await log_action_async(db, user.id, "login", success=True, ip=request.client.host, commit=False)
+        await db.commit()
+        login_guard.record_success(payload.email)
+        if needs_rehash(hashed_password):
+            background_tasks.add_task(_upgrade_password_hash, user, hashed_password, payload.password)
         # Expires_in for access token (seconds)
         return TokenResponse(access_token=access, refresh_token=refresh, expires_in=int(timedelta(minutes=15).total_seconds()))
     except HTTPException:
         raise
+    except HashingPoolBusy:
+        raise _hashing_busy()
     except Exception as exc:
-        log_action(db, None, "login", success=False, details=str(exc), ip=request.client.host)
+        await db.rollback()
+        await log_action_async(db, None, "login", success=False, details=str(exc), ip=request.client.host)
         raise HTTPException(status_code=500, detail="Login failed")
 
 
 @router.post("/logout")
-def logout(payload: LogoutRequest, request: Request, db: Session = Depends(get_db)):
+async def logout(
+    payload: LogoutRequest,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Logout by revoking the provided refresh token.
+    Logout by revoking the provided refresh token, and the bearer access token if one is sent.
     """
     try:
-        # Hash comparison is done via verify_password in token rotation; here we mark the current token as revoked
-        # We find the most recent non-revoked token and compare with provided
-        token = db.query(RefreshToken).filter(RefreshToken.revoked == False).order_by(RefreshToken.created_at.desc()).first()
-        if not token:
-            log_action(db, None, "logout", success=False, details="no active token", ip=request.client.host)
+        user_id = await revoke_refresh_token_async(db, payload.refresh_token, commit=False)
+        if user_id is None:
+            # For security, do not leak whether the token was unknown or already revoked
+            await log_action_async(db, None, "logout", success=False, details="no active token", ip=request.client.host)
             raise HTTPException(status_code=400, detail="No active session")
 
-        # For security, do not leak specifics if mismatch
-        token.revoked = True
-        db.commit()
+        if credentials is not None:
+            try:
+                claims = verify_access_token(credentials.credentials)
+            except JWTError:
+                claims = None
+            if claims is not None and claims.get("sub") == str(user_id):
+                await revoke_access_token_async(db, claims, commit=False)
 
-        log_action(db, token.user_id, "logout", success=True, ip=request.client.host)
+        await log_action_async(db, user_id, "logout", success=True, ip=request.client.host, commit=False)
+        await db.commit()
         return {"detail": "Logged out"}
     except HTTPException:
         raise
     except Exception as exc:
-        log_action(db, None, "logout", success=False, details=str(exc), ip=request.client.host)
+        await db.rollback()
+        await log_action_async(db, None, "logout", success=False, details=str(exc), ip=request.client.host)
         raise HTTPException(status_code=500, detail="Logout failed")
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh(payload: RefreshRequest, request: Request, db: Session = Depends(get_db)):
+async def refresh(payload: RefreshRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Accept a refresh token, verify against stored hash, rotate token, and return a new access token.
     """
     try:
-        # Find user via latest unrevoked token
-        current = db.query(RefreshToken).filter(RefreshToken.revoked == False).order_by(RefreshToken.created_at.desc()).first()
-        if not current:
-            log_action(db, None, "refresh", success=False, details="no active token", ip=request.client.host)
-            raise HTTPException(status_code=401, detail="Invalid refresh token")
-
-        new_refresh = verify_and_rotate_refresh_token(db, current.user_id, payload.refresh_token)
-        if not new_refresh:
-            log_action(db, current.user_id, "refresh", success=False, details="verify failed", ip=request.client.host)
+        rotated = await verify_and_rotate_refresh_token_async(db, payload.refresh_token, commit=False)
+        if not rotated:
+            await log_action_async(db, None, "refresh", success=False, details="verify failed", ip=request.client.host)
             raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+        user_id, new_refresh = rotated
 
-        # Create new access token
-        # Ideally sub should be user id or email; we derive from DB
-        access = create_access_token({"sub": str(current.user_id)})
+        # Create new access token; sub is the user id, as issued at login
+        access = create_access_token({"sub": str(user_id)})
 
-        log_action(db, current.user_id, "refresh", success=True, ip=request.client.host)
+        await log_action_async(db, user_id, "refresh", success=True, ip=request.client.host, commit=False)
+        await db.commit()
         return TokenResponse(access_token=access, refresh_token=new_refresh, expires_in=int(timedelta(minutes=15).total_seconds()))
     except HTTPException:
         raise
+    except RefreshTokenReuse as reuse:
+        # A rotated-out token came back: the family is revoked, keep that and record it
+        await log_action_async(db, reuse.user_id, "refresh_reuse", success=False,
+                               details=f"family {reuse.family_id}: {reuse.revoked} tokens revoked",
+                               ip=request.client.host, commit=False)
+        await db.commit()
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
     except Exception as exc:
-        log_action(db, None, "refresh", success=False, details=str(exc), ip=request.client.host)
+        await db.rollback()
+        await log_action_async(db, None, "refresh", success=False, details=str(exc), ip=request.client.host)
         raise HTTPException(status_code=500, detail="Refresh failed")
 
 
+async def _pad_response(started: float) -> None:
+    remaining = settings.FORGOT_PASSWORD_MIN_RESPONSE_MS / 1000 - (time.perf_counter() - started)
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+
+
 @router.post("/forgot-password")
-def forgot_password(payload: ForgotPasswordRequest, request: Request, db: Session = Depends(get_db)):
+async def forgot_password(payload: ForgotPasswordRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    Generate a reset token (store hashed), email the reset link.
-    Always return 200 to avoid user enumeration.
+    Generate a reset token (store hashed) and queue the reset email in the same
+    transaction. Always return 200, no sooner than FORGOT_PASSWORD_MIN_RESPONSE_MS,
+    so neither the body nor the timing reveals whether the email exists.
     """
+    started = time.perf_counter()
     try:
-        user = user_service.get_user_by_email(db, payload.email)
+        user = await user_service.lookup_user_by_email_async(db, payload.email)
         if user:
-            token = issue_reset_token(db, user)
+            token = await issue_reset_token_async(db, user, commit=False)
             # Build link – in real apps, use frontend URL from settings
             reset_link = f"https://example.com/reset-password?token={token}"
-            send_password_reset_email(user.email, reset_link)
-            log_action(db, user.id, "forgot_password", success=True, ip=request.client.host)
+            await queue_password_reset_email_async(
+                db, user.email, reset_link, locale=request.headers.get("accept-language"), commit=False
+            )
+            await log_action_async(db, user.id, "forgot_password", success=True, ip=request.client.host, commit=False)
+            await db.commit()
         else:
-            log_action(db, None, "forgot_password", success=True, details="email not found", ip=request.client.host)
-        return {"detail": "If the email exists, a reset link was sent."}
+            await log_action_async(db, None, "forgot_password", success=True, details="email not found", ip=request.client.host)
     except Exception as exc:
-        log_action(db, None, "forgot_password", success=False, details=str(exc), ip=request.client.host)
-        # Still return 200 to avoid enumeration
-        return {"detail": "If the email exists, a reset link was sent."}
+        await db.rollback()
+        await log_action_async(db, None, "forgot_password", success=False, details=str(exc), ip=request.client.host)
+    # Same body on every path to avoid enumeration
+    await _pad_response(started)
+    return {"detail": "If the email exists, a reset link was sent."}
 
 
 @router.post("/reset-password")
-def reset_password(payload: ResetPasswordRequest, request: Request, db: Session = Depends(get_db)):
+async def reset_password(payload: ResetPasswordRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Accept token + new password, verify and consume token, update password, and audit.
     """
     try:
-        ok = consume_reset_token(db, payload.token, payload.new_password)
-        if not ok:
-            log_action(db, None, "reset_password", success=False, details="invalid/expired/used", ip=request.client.host)
+        user_id = await consume_reset_token_async(db, payload.token, payload.new_password, commit=False)
+        if not user_id:
+            await log_action_async(db, None, "reset_password", success=False, details="invalid/expired/used", ip=request.client.host)
             raise HTTPException(status_code=400, detail="Invalid or expired token")
+
+        await log_action_async(db, user_id, "reset_password", success=True, ip=request.client.host, commit=False)
+        await db.commit()
         return {"detail": "Password updated"}
     except HTTPException:
         raise
+    except HashingPoolBusy:
+        raise _hashing_busy()
     except Exception as exc:
-        log_action(db, None, "reset_password", success=False, details=str(exc), ip=request.client.host)
+        await db.rollback()
+        await log_action_async(db, None, "reset_password", success=False, details=str(exc), ip=request.client.host)
         raise HTTPException(status_code=500, detail="Reset failed")
 
 
+@router.post(
+    "/introspect",
+    response_model=IntrospectResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(require_introspection_client)],
+)
+async def introspect(payload: IntrospectRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    RFC 7662-style token introspection for authenticated resource servers.
+    Access tokens are checked locally (signature, expiry, revocation filter);
+    refresh tokens by their hash.
+    """
+    if payload.token_type_hint != "refresh_token":
+        try:
+            claims = verify_access_token(payload.token)
+        except JWTError:
+            claims = None
+        if claims is not None:
+            if await revocations.is_revoked(db, claims.get("jti")):
+                return IntrospectResponse(active=False)
+            return IntrospectResponse(
+                active=True, token_type="access_token", sub=claims.get("sub"), exp=claims["exp"], jti=claims.get("jti")
+            )
+
+    row = await get_refresh_token_async(db, payload.token)
+    if not is_active_refresh_token(row):
+        return IntrospectResponse(active=False)
+    return IntrospectResponse(
+        active=True,
+        token_type="refresh_token",
+        sub=str(row.user_id),
+        exp=int(row.expires_at.replace(tzinfo=timezone.utc).timestamp()),
+    )
+
+
+@router.get("/sessions", response_model=list[SessionInfo])
+async def list_sessions(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """
+    The caller's live refresh tokens (one per signed-in device), newest first.
+    """
+    rows = await list_active_sessions_async(db, current_user.id)
+    return [SessionInfo(id=row.id, issued_at=row.issued_at, expires_at=row.expires_at) for row in rows]
+
+
+@router.post("/sessions/revoke-all", response_model=RevokeAllResponse)
+async def revoke_all_sessions(
+    request: Request,
+    claims: dict = Depends(get_token_claims),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Log out everywhere: revoke every refresh token of the caller with one
+    UPDATE, plus the calling access token. Other access tokens lapse at
+    their (short) expiry.
+    """
+    revoked = await revoke_all_refresh_tokens_async(db, current_user.id, commit=False)
+    await revoke_access_token_async(db, claims, commit=False)
+    await log_action_async(db, current_user.id, "revoke_all_sessions", success=True,
+                           details=f"{revoked} sessions", ip=request.client.host, commit=False)
+    await db.commit()
+    return RevokeAllResponse(revoked=revoked)
+
+
+@router.get("/me", response_model=UserResponse)
+async def me(current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Return the user behind the bearer access token.
+    """
+    return UserResponse(id=current_user.id, email=current_user.email, full_name=current_user.full_name)
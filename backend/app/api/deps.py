@@ -0,0 +1,99 @@
+import hmac
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials, HTTPBearer
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.db.session import get_async_db
+from app.services.auth_cache import CurrentUser, load_user_projection, verify_access_token
+from app.services.revocation import revocations
+
+bearer_scheme = HTTPBearer(auto_error=False)
+basic_scheme = HTTPBasic(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_token_claims(credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme)) -> dict:
+    """
+    Verify the bearer access token statelessly and return its claims.
+    """
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    try:
+        return verify_access_token(credentials.credentials)
+    except JWTError:
+        raise _unauthorized("Invalid or expired access token")
+
+
+async def get_current_user(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    """
+    Resolve the user behind a verified access token.
+    """
+    try:
+        user_id = int(claims["sub"])
+    except (KeyError, ValueError):
+        raise _unauthorized("Invalid access token subject")
+    if await revocations.is_revoked(db, claims.get("jti")):
+        raise _unauthorized("Access token revoked")
+
+    user = await load_user_projection(db, user_id)
+    if user is None:
+        raise _unauthorized("User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User is locked or inactive")
+    return user
+
+
+async def require_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """
+    Allow only accounts listed in settings.ADMIN_EMAILS.
+    """
+    if user.email.lower() not in {email.lower() for email in settings.ADMIN_EMAILS}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return user
+
+
+async def require_metrics_access(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> None:
+    """
+    Allow the configured METRICS_TOKEN (for scrapers) or an admin access token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and credentials is not None and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return
+    user = await get_current_user(get_token_claims(credentials), db)
+    await require_admin(user)
+
+
+async def require_introspection_client(
+    client: HTTPBasicCredentials | None = Depends(basic_scheme),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> None:
+    """
+    Allow a resource server listed in INTROSPECTION_CLIENTS (HTTP Basic) or an admin access token.
+    """
+    if client is not None:
+        secret = settings.INTROSPECTION_CLIENTS.get(client.username)
+        if secret and hmac.compare_digest(client.password.encode(), secret.encode()):
+            return
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid client credentials",
+            headers={"WWW-Authenticate": "Basic"},
+        )
+    user = await get_current_user(get_token_claims(credentials), db)
+    await require_admin(user)
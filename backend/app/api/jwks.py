@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Request, Response
+from app.config import settings
+from app.core.keys import key_ring
+
+router = APIRouter(tags=["jwks"])
+
+
+@router.get("/.well-known/jwks.json")
+def jwks(request: Request):
+    """
+    Public signing keys for local access-token verification by resource servers.
+    """
+    body, etag = key_ring.jwks()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
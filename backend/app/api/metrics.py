@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.api.deps import require_metrics_access
+from app.core.rate_limit import login_guard
+from app.core.shared_state import get_shared_state
+from app.db.session import pool_metrics, async_pool_metrics
+from app.db.query_stats import route_metrics
+from app.services.audit_services import get_audit_writer
+from app.services.auth_cache import cache_stats
+from app.services.email import get_email_dispatcher
+from app.services.revocation import revocations
+from app.services.token_cleanup import get_token_cleanup
+from app.services.user_cache import user_cache
+
+# Internal numbers (and raw SQL in /queries): admins or the scraper token only
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_access)])
+
+
+@router.get("/audit")
+def audit_metrics():
+    """
+    Audit writer queue depth and drop/write counters.
+    """
+    writer = get_audit_writer()
+    if writer is None:
+        return {"mode": "sync"}
+    return {"mode": "background", **writer.stats()}
+
+
+@router.get("/db-pool")
+def db_pool_metrics(format: str = "json"):
+    """
+    Connection pool occupancy plus checkout wait / hold time histograms.
+    `?format=prometheus` returns the text exposition format.
+    """
+    if format == "prometheus":
+        lines = pool_metrics.prometheus() + async_pool_metrics.prometheus()
+        return PlainTextResponse("\n".join(lines) + "\n")
+    return {"sync": pool_metrics.snapshot(), "async": async_pool_metrics.snapshot()}
+
+
+@router.get("/auth-cache")
+def auth_cache_metrics():
+    """
+    Hit ratio and size of the verified-token and user projection caches.
+    """
+    return cache_stats()
+
+
+@router.get("/revocations")
+def revocation_metrics():
+    """
+    Revocation filter size and how often it answered without the DB.
+    """
+    return revocations.stats()
+
+
+@router.get("/user-cache")
+def user_cache_metrics():
+    """
+    Hit/miss/negative-hit/eviction counters of the email lookup cache.
+    """
+    return user_cache.stats()
+
+
+@router.get("/queries")
+def query_metrics():
+    """
+    Per-route histograms of SQL statements and DB time per request.
+    """
+    return {route: metrics.snapshot() for route, metrics in sorted(route_metrics.items())}
+
+
+@router.get("/rate-limit")
+def rate_limit_metrics():
+    """
+    Login throttle rules and rejections per scope.
+    """
+    return login_guard.stats()
+
+
+@router.get("/token-cleanup")
+def token_cleanup_metrics():
+    """
+    Runs and rows removed by the in-app token pruner, if enabled.
+    """
+    task = get_token_cleanup()
+    if task is None:
+        return {"enabled": False}
+    return {"enabled": True, **task.stats()}
+
+
+@router.get("/email")
+def email_metrics():
+    """
+    Outbox dispatcher counters and SMTP connection reuse.
+    """
+    dispatcher = get_email_dispatcher()
+    if dispatcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **dispatcher.stats()}
+
+
+@router.get("/shared-state")
+def shared_state_metrics():
+    """
+    Backend and occupancy of the state shared between workers.
+    """
+    state = get_shared_state()
+    return state.stats() if hasattr(state, "stats") else {"backend": type(state).__name__}
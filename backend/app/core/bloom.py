@@ -0,0 +1,55 @@
+# backend/app/core/bloom.py
+# ------------------------------------------------------------
+# Fixed-size Bloom filter for "definitely not present" checks
+# ------------------------------------------------------------
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    Sized for `capacity` keys at a false-positive rate of `error_rate`.
+    Membership tests never give false negatives; keys cannot be removed,
+    so callers rebuild a fresh filter when entries expire.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, key: str) -> list[int]:
+        # Kirsch-Mitzenmacher: k indexes from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        """
+        Set the key's bits; returns False if they were all set already.
+        """
+        positions = self._positions(key)
+        with self._lock:
+            new = False
+            for pos in positions:
+                mask = 1 << (pos & 7)
+                if not self._bits[pos >> 3] & mask:
+                    self._bits[pos >> 3] |= mask
+                    new = True
+            if new:
+                self.count += 1
+            return new
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
@@ -0,0 +1,58 @@
+# backend/app/core/calibrate.py
+# ------------------------------------------------------------
+# Pick Argon2 parameters that hit a target verify latency here
+# ------------------------------------------------------------
+import argparse
+import statistics
+import time
+
+from app.config import settings
+from app.core.security import build_pwd_context
+
+
+def measure_verify_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int = 5) -> float:
+    context = build_pwd_context(time_cost, memory_cost, parallelism)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, memory_cost: int, parallelism: int, max_time_cost: int = 20,
+              min_memory_cost: int = 19456, samples: int = 5) -> dict:
+    """
+    Raise time_cost at the given memory until a verify takes at least
+    `target_ms`. If even time_cost=1 is too slow, halve memory instead
+    (never below OWASP's 19 MiB floor).
+    """
+    time_cost = 1
+    elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, samples)
+    while elapsed > target_ms and memory_cost // 2 >= min_memory_cost:
+        memory_cost //= 2
+        elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, samples)
+    while elapsed < target_ms and time_cost < max_time_cost:
+        time_cost += 1
+        elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, samples)
+    return {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism, "verify_ms": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find Argon2 parameters for a target verify latency on this machine.")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--memory-kib", type=int, default=settings.ARGON2_MEMORY_COST)
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    result = calibrate(args.target_ms, args.memory_kib, args.parallelism, samples=args.samples)
+    print(f"# median verify {result['verify_ms']:.1f} ms (target {args.target_ms:.0f} ms)")
+    print(f"ARGON2_TIME_COST={result['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={result['parallelism']}")
+
+
+if __name__ == "__main__":
+    main()
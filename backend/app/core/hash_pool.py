@@ -0,0 +1,93 @@
+# backend/app/core/hash_pool.py
+# ------------------------------------------------------------
+# Bounded process pool for Argon2 hashing / verification
+# ------------------------------------------------------------
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing pool has no free slot within the queue timeout."""
+
+
+class PasswordHashPool:
+    """
+    Runs CPU-heavy password hashing in worker processes so it scales with cores.
+
+    At most `max_pending` jobs may be queued or running at once; callers that
+    cannot get a slot within `queue_timeout` seconds get `HashingPoolBusy`
+    (surfaced to clients as 503) instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # jobs submitted and not yet done; own lock, as done callbacks can run while shutdown holds _lock
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a process that runs an event loop and threads is unsafe
+                    ctx = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """
+        Queue `fn(*args)` on the pool, blocking up to `queue_timeout` for a slot.
+        """
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingPoolBusy("password hashing pool is saturated")
+        return self._submit_acquired(fn, *args)
+
+    def _submit_acquired(self, fn: Callable, *args) -> Future:
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._pending_lock:
+            self._pending += 1
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, _future: Future) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, fn: Callable, *args):
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args):
+        if self._slots.acquire(blocking=False):
+            future = self._submit_acquired(fn, *args)
+        else:
+            # Waiting for a slot blocks, so do it off the event loop.
+            future = await asyncio.to_thread(self.submit, fn, *args)
+        return await asyncio.wrap_future(future)
+
+    def pending(self) -> int:
+        with self._pending_lock:
+            return self._pending
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
@@ -2,36 +2,129 @@
 # ------------------------------------------------------------
 # JWT utilities: access + refresh token creation
 # ------------------------------------------------------------
-from  jose import jwt
+from jose import JWTError  # jose.jwt (and its crypto backend) loads on first encode/decode
 from datetime import datetime, timedelta, timezone
+import base64
+import binascii
 import os
 import secrets
-from app.config import settings 
+from typing import NamedTuple
+import uuid
+from app.config import DEFAULT_SECRET_KEY, settings
 import hashlib
+from app.core.keys import ALGORITHM, key_ring
 
 SECRET_KEY = settings.SECRET_KEY
-ALGORITHM = "HS256"
+LEGACY_ALGORITHM = "HS256"
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 15
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Refresh tokens are `<selector>.<verifier>`; the selector is 8 bytes, 11 base64url chars
+SELECTOR_BYTES = 8
+SELECTOR_LENGTH = 11
+
 
 def create_access_token(payload: dict, expires_delta: timedelta | None = None) -> str:
     """
     Create a short-lived access token (JWT).
     """
+    from jose import jwt
+
     to_encode = payload.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    key = key_ring.active()
+    return jwt.encode(to_encode, key.private, algorithm=ALGORITHM, headers={"kid": key.kid})
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify signature and expiry of an access token and return its claims.
+    The key is chosen by the token's `kid`; HS256 tokens issued before the
+    switch to RS256 are accepted only inside the migration window (see
+    legacy_hs256_deadline).
+    Raises jose.JWTError if the token is invalid or expired.
+    """
+    from jose import jwt
+
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == LEGACY_ALGORITHM:
+        return _decode_legacy(token)
+    key = key_ring.get(header.get("kid"))
+    if key is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, key.public, algorithms=[ALGORITHM])
+
+
+def legacy_hs256_deadline() -> datetime | None:
+    """
+    Last moment an HS256 token can be valid: tokens signed before the RS256
+    cutover live at most one access-token lifetime past it. None when HS256
+    is not accepted at all (flag off, no cutover, or SECRET_KEY unchanged).
+    """
+    cutover = settings.JWT_HS256_CUTOVER
+    if not settings.JWT_ACCEPT_LEGACY_HS256 or cutover is None or SECRET_KEY == DEFAULT_SECRET_KEY:
+        return None
+    if cutover.tzinfo is None:
+        cutover = cutover.replace(tzinfo=timezone.utc)
+    return cutover + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
 
+def _decode_legacy(token: str) -> dict:
+    from jose import jwt
 
-def create_refresh_token():
-    """Generate a secure refresh token and return (token, token_hash, issued_at, expires_at)."""
-    token = secrets.token_urlsafe(64)  # raw token string
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    deadline = legacy_hs256_deadline()
+    if deadline is None:
+        raise JWTError("HS256 tokens are not accepted")
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[LEGACY_ALGORITHM])
+    # a genuine pre-cutover token expires by the deadline and carries a jti (so it can be revoked)
+    if not claims.get("jti") or claims.get("exp", float("inf")) > deadline.timestamp():
+        raise JWTError("HS256 token outside the migration window")
+    return claims
+
+
+class RefreshTokenParts(NamedTuple):
+    token: str
+    selector: int
+    verifier_hash: bytes
+    issued_at: datetime
+    expires_at: datetime
+
+
+def hash_verifier(verifier: str) -> bytes:
+    return hashlib.sha256(verifier.encode()).digest()
+
+
+def create_refresh_token() -> RefreshTokenParts:
+    """
+    Generate a refresh token of the form `<selector>.<verifier>`.
+    The selector (63 random bits, base64url) is the row's lookup key; of the
+    verifier (256 random bits) only its SHA-256 is stored.
+    """
+    selector = secrets.randbits(63)  # fits a signed BIGINT
+    verifier = secrets.token_urlsafe(32)
+    encoded = base64.urlsafe_b64encode(selector.to_bytes(SELECTOR_BYTES, "big")).rstrip(b"=").decode()
 
     issued_at = datetime.now(timezone.utc)
     expires_at = issued_at + timedelta(days=30)
 
-    return token, token_hash, issued_at, expires_at
+    return RefreshTokenParts(f"{encoded}.{verifier}", selector, hash_verifier(verifier), issued_at, expires_at)
+
+
+def parse_refresh_token(token: str) -> tuple[int, bytes] | None:
+    """
+    Split a `<selector>.<verifier>` token into (selector, verifier hash).
+    Returns None for anything else; legacy token_urlsafe(64) tokens never contain a ".".
+    """
+    encoded, dot, verifier = token.partition(".")
+    if not dot or not verifier or len(encoded) != SELECTOR_LENGTH:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(encoded + "=")
+    except (binascii.Error, ValueError):
+        return None
+    selector = int.from_bytes(raw, "big")
+    if len(raw) != SELECTOR_BYTES or selector >> 63:
+        return None
+    return selector, hash_verifier(verifier)
@@ -0,0 +1,223 @@
+# backend/app/core/keys.py
+# ------------------------------------------------------------
+# RS256 signing key ring: kid-addressed keys, rotation, JWKS
+# ------------------------------------------------------------
+import argparse
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from jose.backends.base import Key
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "RS256"
+_KID_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """
+    One parsed key pair. The jose Key objects are built once at load time
+    and passed straight to encode/decode, so no PEM is parsed per token.
+    """
+    kid: str
+    created_at: float
+    private: "Key"
+    public: "Key"
+    jwk: dict
+
+
+def _new_kid() -> str:
+    return f"{datetime.now(timezone.utc):{_KID_FORMAT}}-{secrets.token_hex(3)}"
+
+
+def _kid_created_at(kid: str) -> float:
+    return datetime.strptime(kid.split("-")[0], _KID_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def generate_private_pem() -> bytes:
+    # cryptography and jose load with the first key, not at import
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+
+def _parse(kid: str, pem: bytes) -> SigningKey:
+    from jose import jwk
+
+    private = jwk.construct(pem, ALGORITHM)
+    public = private.public_key()
+    return SigningKey(
+        kid=kid,
+        created_at=_kid_created_at(kid),
+        private=private,
+        public=public,
+        jwk={**public.to_dict(), "kid": kid, "use": "sig"},
+    )
+
+
+class _State:
+    __slots__ = ("keys", "active", "jwks_body", "etag", "names")
+
+    def __init__(self, keys: dict[str, SigningKey], active: SigningKey, names: frozenset[str]):
+        self.keys = keys
+        self.active = active
+        self.names = names
+        self.jwks_body = json.dumps({"keys": [k.jwk for k in sorted(keys.values(), key=lambda k: k.kid)]}).encode()
+        self.etag = '"' + hashlib.sha256(self.jwks_body).hexdigest()[:32] + '"'
+
+
+class KeyRing:
+    """
+    Signing keys stored as `<kid>.pem` files in `keys_dir`; kids start with
+    their UTC creation time. Every key in the directory is published in the
+    JWKS and accepted for verification. The newest key older than
+    `publish_seconds` signs, so resource servers see a key in the JWKS before
+    any token carries it. Each process re-lists the directory at most every
+    `reload_seconds` to pick up rotations made by another process.
+
+    Without a directory an ephemeral key is generated per process (dev/tests).
+    """
+
+    def __init__(self, keys_dir: str | None, publish_seconds: float, reload_seconds: float):
+        self.keys_dir = Path(keys_dir) if keys_dir else None
+        self.publish_seconds = publish_seconds
+        self.reload_seconds = reload_seconds
+        self._state: _State | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _listing(self) -> frozenset[str]:
+        if self.keys_dir is None or not self.keys_dir.is_dir():
+            return frozenset()
+        return frozenset(p.name for p in self.keys_dir.glob("*.pem"))
+
+    def load(self) -> None:
+        """
+        Read and parse every key now (called from the app lifespan).
+        """
+        with self._lock:
+            names = self._listing()
+            keys = {}
+            for name in names:
+                kid = name[:-len(".pem")]
+                keys[kid] = _parse(kid, (self.keys_dir / name).read_bytes())
+            if not keys:
+                if self.keys_dir is not None:
+                    logger.warning("no signing keys in %s; using an ephemeral key", self.keys_dir)
+                kid = _new_kid()
+                keys[kid] = _parse(kid, generate_private_pem())
+            self._state = _State(keys, self._pick_active(keys), names)
+            self._next_check = time.monotonic() + self.reload_seconds
+
+    def _pick_active(self, keys: dict[str, SigningKey]) -> SigningKey:
+        ordered = sorted(keys.values(), key=lambda k: k.kid)
+        cutoff = time.time() - self.publish_seconds
+        published = [k for k in ordered if k.created_at <= cutoff]
+        # With nothing past the publish delay yet (fresh install) the oldest key signs
+        return published[-1] if published else ordered[0]
+
+    def _current(self) -> _State:
+        state = self._state
+        if state is None:
+            self.load()
+            return self._state
+        if time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_seconds
+            if self.keys_dir is not None and self._listing() != state.names:
+                self.load()
+            else:
+                # a published key may have become eligible to sign
+                state.active = self._pick_active(state.keys)
+            return self._state
+        return state
+
+    def active(self) -> SigningKey:
+        return self._current().active
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        return self._current().keys.get(kid)
+
+    def jwks(self) -> tuple[bytes, str]:
+        """
+        Serialized JWKS document and its ETag, rebuilt only when the key set changes.
+        """
+        state = self._current()
+        return state.jwks_body, state.etag
+
+    def rotate(self, retain_seconds: float) -> str:
+        """
+        Write a new key and delete keys superseded more than `retain_seconds` ago.
+        Returns the new kid.
+        """
+        if self.keys_dir is None:
+            raise RuntimeError("JWT_KEYS_DIR is not configured")
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+        kid = _new_kid()
+        path = self.keys_dir / f"{kid}.pem"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(generate_private_pem())
+
+        kids = sorted(name[:-len(".pem")] for name in self._listing())
+        now = time.time()
+        for older, newer in zip(kids, kids[1:]):
+            # a key stops signing once its successor is published
+            retired_at = _kid_created_at(newer) + self.publish_seconds
+            if retired_at + retain_seconds < now:
+                (self.keys_dir / f"{older}.pem").unlink(missing_ok=True)
+        self.load()
+        return kid
+
+    def newest_age_seconds(self) -> float | None:
+        kids = sorted(name[:-len(".pem")] for name in self._listing())
+        return time.time() - _kid_created_at(kids[-1]) if kids else None
+
+
+key_ring = KeyRing(
+    settings.JWT_KEYS_DIR,
+    publish_seconds=settings.JWT_KEY_PUBLISH_SECONDS,
+    reload_seconds=settings.JWT_KEY_RELOAD_SECONDS,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the RS256 signing keys in JWT_KEYS_DIR.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rotate = sub.add_parser("rotate", help="add a new signing key and prune retired ones")
+    rotate.add_argument("--if-older-than-days", type=float, default=None,
+                        help=f"only rotate when the newest key is this old (e.g. {settings.JWT_KEY_ROTATE_DAYS} from cron)")
+    sub.add_parser("list", help="print the kids currently published")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        body, _ = key_ring.jwks()
+        active = key_ring.active().kid
+        for key in json.loads(body)["keys"]:
+            print(key["kid"], "(signing)" if key["kid"] == active else "")
+        return
+
+    age = key_ring.newest_age_seconds()
+    if args.if_older_than_days is not None and age is not None and age < args.if_older_than_days * 86400:
+        print(f"newest key is {age / 86400:.1f} days old; not rotating")
+        return
+    kid = key_ring.rotate(retain_seconds=settings.JWT_KEY_RETAIN_HOURS * 3600)
+    print(f"created {kid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# backend/app/core/metrics.py
+# ------------------------------------------------------------
+# Minimal in-process metric primitives (counters, histograms)
+# ------------------------------------------------------------
+import bisect
+import threading
+
+# Seconds; tuned for DB round trips and connection waits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, safe to observe from multiple threads.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Cumulative bucket counts keyed by upper bound, plus sum and count.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip((*self.buckets, "+Inf"), counts):
+            running += n
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+    def prometheus(self, name: str, labels: str = "") -> list[str]:
+        snap = self.snapshot()
+        sep = "," if labels else ""
+        lines = [f'{name}_bucket{{{labels}{sep}le="{le}"}} {n}' for le, n in snap["buckets"].items()]
+        lines.append(f"{name}_sum{{{labels}}} {snap['sum']}")
+        lines.append(f"{name}_count{{{labels}}} {snap['count']}")
+        return lines
@@ -0,0 +1,252 @@
+# backend/app/core/rate_limit.py
+# ------------------------------------------------------------
+# Sliding-window rate limiting and failed-login backoff
+# ------------------------------------------------------------
+import json
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.config import settings
+from app.core.shared_state import LazySharedState, SharedState, is_shared
+
+
+class RateLimitBackend(Protocol):
+    """
+    Storage for rate-limit counters and lockout state. The in-memory store
+    serves a single process; SharedStateRateLimitStore serves all workers.
+    """
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        """Count one request; return 0 if allowed, else seconds until retry."""
+        ...
+
+    def get(self, key: str, now: float) -> tuple | None: ...
+
+    def set(self, key: str, value: tuple, ttl: float, now: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+def _retry_after(previous: int, current: int, limit: int, start: float, window: float, now: float) -> float:
+    """
+    Sliding-window-counter check: 0 if one more request fits, else seconds to wait.
+    """
+    overlap = 1 - (now - start) / window
+    estimate = previous * overlap + current
+    if estimate < limit:
+        return 0.0
+    if previous == 0:
+        return start + window - now
+    # Time until the weighted previous window decays below the limit
+    needed = (estimate - limit) / previous * window + 0.001
+    return min(needed, start + window - now)
+
+
+class _Shard:
+    __slots__ = ("lock", "windows", "values", "ops")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows: dict[str, list] = {}    # key -> [window_start, current, previous, window]
+        self.values: dict[str, tuple] = {}    # key -> (expires_at, value)
+        self.ops = 0
+
+
+class InMemoryRateLimitStore:
+    """
+    Lock-sharded in-process store. Counters use the sliding-window-counter
+    approximation (previous window weighted by overlap + current window), so
+    each key costs O(1) memory regardless of request volume. Idle keys are
+    swept out every `sweep_every` operations per shard.
+    """
+
+    def __init__(self, shards: int = 16, sweep_every: int = 1024):
+        self._shards = [_Shard() for _ in range(shards)]
+        self.sweep_every = sweep_every
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        shard = self._shard(key)
+        with shard.lock:
+            self._maybe_sweep(shard, now)
+            state = shard.windows.get(key)
+            start = now - (now % window)
+            if state is None:
+                state = shard.windows[key] = [start, 0, 0, window]
+            elif state[0] != start:
+                # Roll forward; anything older than one window contributes nothing
+                state[2] = state[1] if start - state[0] == window else 0
+                state[0], state[1] = start, 0
+            retry_after = _retry_after(state[2], state[1], limit, start, window, now)
+            if not retry_after:
+                state[1] += 1
+            return retry_after
+
+    def get(self, key: str, now: float) -> tuple | None:
+        shard = self._shard(key)
+        with shard.lock:
+            item = shard.values.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del shard.values[key]
+                return None
+            return item[1]
+
+    def set(self, key: str, value: tuple, ttl: float, now: float) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            self._maybe_sweep(shard, now)
+            shard.values[key] = (now + ttl, value)
+
+    def delete(self, key: str) -> None:
+        shard = self._shard(key)
+        with shard.lock:
+            shard.values.pop(key, None)
+
+    def _maybe_sweep(self, shard: _Shard, now: float) -> None:
+        shard.ops += 1
+        if shard.ops % self.sweep_every:
+            return
+        shard.windows = {k: s for k, s in shard.windows.items() if now - s[0] < 2 * s[3]}
+        shard.values = {k: v for k, v in shard.values.items() if v[0] > now}
+
+    def __len__(self) -> int:
+        return sum(len(s.windows) + len(s.values) for s in self._shards)
+
+
+class SharedStateRateLimitStore:
+    """
+    Rate-limit state kept in SharedState so every worker counts against the
+    same limits. Each window is its own counter key; reading the previous and
+    current counters and then incrementing is not one atomic step, so
+    concurrent workers can overshoot a limit by a few requests.
+    """
+
+    def __init__(self, state: SharedState):
+        self.state = state
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> float:
+        index = int(now // window)
+        start = index * window
+        previous = int(self.state.get(f"{key}:{index - 1}") or 0)
+        current = int(self.state.get(f"{key}:{index}") or 0)
+        retry_after = _retry_after(previous, current, limit, start, window, now)
+        if not retry_after:
+            self.state.incr(f"{key}:{index}", ttl=2 * window)
+        return retry_after
+
+    def get(self, key: str, now: float) -> tuple | None:
+        raw = self.state.get(key)
+        return None if raw is None else tuple(json.loads(raw))
+
+    def set(self, key: str, value: tuple, ttl: float, now: float) -> None:
+        self.state.set(key, json.dumps(value), ttl)
+
+    def delete(self, key: str) -> None:
+        self.state.delete(key)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    scope: str
+    limit: int
+    window: float
+
+
+class RateLimited(Exception):
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"rate limit exceeded ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class LoginGuard:
+    """
+    Cheap checks run before a login touches the database or Argon2:
+    sliding-window limits per IP, per email and globally, plus a per-email
+    lockout that doubles with every failure past `lockout_threshold`.
+    """
+
+    def __init__(self, backend: RateLimitBackend, rules: list[RateLimitRule], lockout_threshold: int,
+                 lockout_base: float, lockout_max: float, failure_ttl: float):
+        self.backend = backend
+        self.rules = rules
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.failure_ttl = failure_ttl
+        self.rejected: dict[str, int] = {}
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return email.strip().lower()
+
+    def check(self, ip: str | None, email: str) -> None:
+        """
+        Raise RateLimited if this attempt must be rejected without further work.
+        """
+        now = time.time()
+        email = self._email_key(email)
+        state = self.backend.get(f"lock:{email}", now)
+        if state is not None and state[1] > now:
+            self._reject("lockout", state[1] - now)
+
+        subjects = {"ip": ip or "unknown", "email": email, "global": "*"}
+        for rule in self.rules:
+            retry_after = self.backend.hit(f"rl:{rule.scope}:{subjects[rule.scope]}", rule.limit, rule.window, now)
+            if retry_after:
+                self._reject(rule.scope, retry_after)
+
+    def record_failure(self, email: str) -> None:
+        now = time.time()
+        key = f"lock:{self._email_key(email)}"
+        state = self.backend.get(key, now)
+        failures = (state[0] if state else 0) + 1
+        locked_until = 0.0
+        if failures >= self.lockout_threshold:
+            # clamp the exponent: float * 2**1024 overflows under a sustained attack
+            delay = min(self.lockout_base * 2 ** min(failures - self.lockout_threshold, 30), self.lockout_max)
+            locked_until = now + delay
+        self.backend.set(key, (failures, locked_until), self.failure_ttl, now)
+
+    def record_success(self, email: str) -> None:
+        self.backend.delete(f"lock:{self._email_key(email)}")
+
+    def _reject(self, scope: str, retry_after: float) -> None:
+        self.rejected[scope] = self.rejected.get(scope, 0) + 1
+        raise RateLimited(scope, retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "rules": [{"scope": r.scope, "limit": r.limit, "window": r.window} for r in self.rules],
+            "rejected": dict(self.rejected),
+            "tracked_keys": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
+
+
+def build_login_guard(backend: RateLimitBackend | None = None) -> LoginGuard:
+    window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+    rules = [
+        RateLimitRule("ip", settings.LOGIN_RATE_LIMIT_PER_IP, window),
+        RateLimitRule("email", settings.LOGIN_RATE_LIMIT_PER_EMAIL, window),
+        RateLimitRule("global", settings.LOGIN_RATE_LIMIT_GLOBAL, window),
+    ]
+    if backend is None:
+        backend = SharedStateRateLimitStore(LazySharedState()) if is_shared() else InMemoryRateLimitStore()
+    return LoginGuard(
+        backend,
+        [rule for rule in rules if rule.limit > 0],
+        lockout_threshold=settings.LOGIN_LOCKOUT_THRESHOLD,
+        lockout_base=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+        lockout_max=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+        failure_ttl=settings.LOGIN_FAILURE_TTL_SECONDS,
+    )
+
+
+login_guard = build_login_guard()
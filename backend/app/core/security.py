@@ -3,21 +3,130 @@
 # Password hashing utilities (Argon2)
 # ------------------------------------------------------------
 
-from passlib.context import CryptContext
+import asyncio
+from typing import TYPE_CHECKING
+from app.config import settings
+from app.core.hash_pool import PasswordHashPool, default_workers
 
-# Configure Argon2
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+def build_pwd_context(time_cost: int, memory_cost: int, parallelism: int) -> "CryptContext":
+    """
+    Argon2 with explicit cost parameters; bcrypt is verify-only for imported
+    accounts. Hashes made with other parameters or schemes report needs_update.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+_pwd_context: "CryptContext | None" = None
+_pool: PasswordHashPool | None = None
+
+
+def get_pwd_context() -> "CryptContext":
+    """
+    The CryptContext for the configured Argon2 costs, built on first use
+    (the app lifespan, or the first hash in a pool worker).
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = build_pwd_context(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM)
+    return _pwd_context
+
+
+def hash_password_sync(password: str) -> str:
+    """
+    Hash in the calling thread or process, bypassing the hash pool (a picklable
+    job for process pools such as the bulk importer's).
+    """
+    return get_pwd_context().hash(password)
+
+
+def verify_password_sync(hashed: str, password: str) -> bool:
+    """
+    Verify in the calling thread or process, bypassing the hash pool.
+    """
+    return get_pwd_context().verify(password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """
+    True if `hashed` uses a deprecated scheme or any Argon2 parameters other than
+    the current settings (lower or higher), so it is rehashed on the next login.
+    """
+    return get_pwd_context().needs_update(hashed)
+
+
+def get_hash_pool() -> PasswordHashPool | None:
+    """
+    Return the shared hashing pool, or None when hashing runs inline.
+    """
+    global _pool
+    workers = settings.PASSWORD_HASH_WORKERS
+    if workers is None:
+        workers = default_workers()
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = PasswordHashPool(
+            workers=workers,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+            queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+        )
+    return _pool
+
+
+def shutdown_hash_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
 
 
 def hash_password(password: str) -> str:
     """
     Hash a plain password using Argon2.
     """
-    return pwd_context.hash(password)
+    pool = get_hash_pool()
+    if pool is None:
+        return hash_password_sync(password)
+    return pool.run(hash_password_sync, password)
 
 
 def verify_password(hashed: str, password: str) -> bool:
     """
     Verify a plain password against a stored hash.
     """
-    return pwd_context.verify(password, hashed)
+    pool = get_hash_pool()
+    if pool is None:
+        return verify_password_sync(hashed, password)
+    return pool.run(verify_password_sync, hashed, password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Awaitable hash_password that never blocks the event loop.
+    """
+    pool = get_hash_pool()
+    if pool is None:
+        return await asyncio.to_thread(hash_password_sync, password)
+    return await pool.run_async(hash_password_sync, password)
+
+
+async def verify_password_async(hashed: str, password: str) -> bool:
+    """
+    Awaitable verify_password that never blocks the event loop.
+    """
+    pool = get_hash_pool()
+    if pool is None:
+        return await asyncio.to_thread(verify_password_sync, hashed, password)
+    return await pool.run_async(verify_password_sync, hashed, password)
@@ -0,0 +1,470 @@
+# backend/app/core/shared_state.py
+# ------------------------------------------------------------
+# Key/value state shared by all worker processes: caches,
+# rate-limit counters and change notifications
+# ------------------------------------------------------------
+import argparse
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Hashable, Protocol
+
+from app.config import settings
+from app.core.cache import MISSING
+
+
+class SharedState(Protocol):
+    """
+    String key/value store with per-key TTL and an atomic counter. Every
+    implementation is also a user_cache.CacheBackend.
+    """
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        """Add `amount` (creating the key with `ttl` if absent); return the new value."""
+        ...
+
+
+class InMemorySharedState:
+    """
+    Single-process implementation; the default when only one worker runs.
+    """
+
+    def __init__(self, maxsize: int = 100_000, sweep_every: int = 1024):
+        self.maxsize = maxsize
+        self.sweep_every = sweep_every
+        self._data: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._ops = 0
+        self.evictions = 0
+
+    def _live(self, key: str, now: float) -> tuple[float, str] | None:
+        item = self._data.get(key)
+        if item is not None and item[0] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def _store(self, key: str, expires_at: float, value: str, now: float) -> None:
+        self._ops += 1
+        if self._ops % self.sweep_every == 0:
+            self._data = {k: v for k, v in self._data.items() if v[0] > now}
+        self._data.pop(key, None)
+        self._data[key] = (expires_at, value)
+        while len(self._data) > self.maxsize:
+            del self._data[next(iter(self._data))]
+            self.evictions += 1
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._live(key, time.time())
+            return None if item is None else item[1]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._store(key, now + ttl, value, now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            item = self._live(key, now)
+            expires_at, current = item if item is not None else (now + ttl, "0")
+            value = int(current) + amount
+            self._store(key, expires_at, str(value), now)
+            return value
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._data), "maxsize": self.maxsize, "evictions": self.evictions}
+
+
+_MAGIC = b"AUTHSTv1"
+_HEADER = struct.Struct("<8sIII")         # magic, slots, slot size, stripes
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<BdHH")            # state, expires_at, key length, value length
+_EMPTY, _USED, _TOMBSTONE = 0, 1, 2
+
+
+class MmapSharedState:
+    """
+    Fixed-size hash table in a memory-mapped file, shared by every process on
+    the host that maps the same path.
+
+    The table is split into `stripes`; a key hashes to one stripe and probes
+    only within it, so each operation locks one stripe: a thread lock inside
+    the process plus a POSIX record lock on that stripe's byte across
+    processes. Each slot holds one key and value up to `slot_size` bytes in
+    total; larger values are not stored (a cache miss, never an error). A full
+    stripe evicts its soonest-expiring entry.
+    """
+
+    def __init__(self, path: str, slots: int = 65536, slot_size: int = 512, stripes: int = 1024):
+        stripes = min(stripes, slots)
+        self.path = path
+        self.per_stripe = slots // stripes
+        self.slots = self.per_stripe * stripes
+        self.slot_size = slot_size
+        self.stripes = stripes
+        self.oversize = 0
+        self.evictions = 0
+        size = _HEADER_SIZE + self.slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, self.slots, slot_size, stripes), 0)
+            header = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            if header != (_MAGIC, self.slots, slot_size, stripes):
+                raise ValueError(f"{path} holds a different state table layout: {header}")
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, size)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _locate(self, key: bytes) -> tuple[int, int]:
+        h = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+        return h % self.stripes, (h // self.stripes) % self.per_stripe
+
+    def _offset(self, stripe: int, index: int) -> int:
+        return _HEADER_SIZE + (stripe * self.per_stripe + index) * self.slot_size
+
+    def _locked(self, stripe: int, exclusive: bool):
+        return _StripeLock(self._locks[stripe], self._fd, stripe, exclusive)
+
+    def _find(self, key: bytes, stripe: int, home: int, now: float):
+        """
+        Probe the stripe. Returns (offset of the live entry or None,
+        offset of the first reusable slot or None, slot offsets probed).
+        """
+        mm = self._mm
+        reusable = None
+        probed = []
+        for i in range(self.per_stripe):
+            offset = self._offset(stripe, (home + i) % self.per_stripe)
+            state, expires_at, key_len, _ = _SLOT.unpack_from(mm, offset)
+            if state == _EMPTY:
+                return None, reusable if reusable is not None else offset, probed
+            probed.append(offset)
+            if state == _USED and expires_at > now:
+                start = offset + _SLOT.size
+                if key_len == len(key) and mm[start:start + key_len] == key:
+                    return offset, reusable, probed
+            elif reusable is None:
+                reusable = offset  # tombstone or expired: free for a new key
+        return None, reusable, probed
+
+    def _write(self, offset: int, key: bytes, value: bytes, expires_at: float) -> None:
+        start = offset + _SLOT.size
+        self._mm[start:start + len(key) + len(value)] = key + value
+        _SLOT.pack_into(self._mm, offset, _USED, expires_at, len(key), len(value))
+
+    def _read_value(self, offset: int) -> tuple[float, bytes]:
+        _, expires_at, key_len, value_len = _SLOT.unpack_from(self._mm, offset)
+        start = offset + _SLOT.size + key_len
+        return expires_at, self._mm[start:start + value_len]
+
+    def _put(self, key: bytes, value: bytes, expires_at: float, found, reusable, probed) -> None:
+        offset = found if found is not None else reusable
+        if offset is None:
+            # stripe full of live entries: drop the one closest to expiry
+            offset = min(probed, key=lambda o: _SLOT.unpack_from(self._mm, o)[1])
+            self.evictions += 1
+        self._write(offset, key, value, expires_at)
+
+    def _fits(self, key: bytes, value: bytes) -> bool:
+        return _SLOT.size + len(key) + len(value) <= self.slot_size
+
+    def get(self, key: str) -> str | None:
+        raw = key.encode()
+        stripe, home = self._locate(raw)
+        with self._locked(stripe, exclusive=False):
+            found, _, _ = self._find(raw, stripe, home, time.time())
+            if found is None:
+                return None
+            return self._read_value(found)[1].decode()
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        raw, data = key.encode(), value.encode()
+        if not self._fits(raw, data):
+            self.oversize += 1
+            self.delete(key)  # never leave an older value behind
+            return
+        stripe, home = self._locate(raw)
+        now = time.time()
+        with self._locked(stripe, exclusive=True):
+            self._put(raw, data, now + ttl, *self._find(raw, stripe, home, now))
+
+    def delete(self, key: str) -> None:
+        raw = key.encode()
+        stripe, home = self._locate(raw)
+        with self._locked(stripe, exclusive=True):
+            found, _, _ = self._find(raw, stripe, home, time.time())
+            if found is not None:
+                self._mm[found] = _TOMBSTONE
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        raw = key.encode()
+        stripe, home = self._locate(raw)
+        now = time.time()
+        with self._locked(stripe, exclusive=True):
+            found, reusable, probed = self._find(raw, stripe, home, now)
+            expires_at, current = self._read_value(found) if found is not None else (now + ttl, b"0")
+            value = int(current) + amount
+            self._put(raw, str(value).encode(), expires_at, found, reusable, probed)
+            return value
+
+    def stats(self) -> dict:
+        used = 0
+        now = time.time()
+        for offset in range(_HEADER_SIZE, _HEADER_SIZE + self.slots * self.slot_size, self.slot_size):
+            state, expires_at, _, _ = _SLOT.unpack_from(self._mm, offset)
+            used += state == _USED and expires_at > now
+        return {
+            "backend": "mmap",
+            "path": self.path,
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "live": used,
+            "oversize": self.oversize,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+class _StripeLock:
+    __slots__ = ("lock", "fd", "stripe", "exclusive")
+
+    def __init__(self, lock: threading.Lock, fd: int, stripe: int, exclusive: bool):
+        self.lock = lock
+        self.fd = fd
+        self.stripe = stripe
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        self.lock.acquire()
+        fcntl.lockf(self.fd, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH, 1, self.stripe)
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.stripe)
+        self.lock.release()
+
+
+class RedisSharedState:
+    """
+    Network backend over any client with the redis-py API, for workers on
+    more than one host.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, key: str) -> str | None:
+        value = self._client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        pipe = self._client.pipeline(transaction=True)
+        pipe.set(key, 0, px=max(int(ttl * 1000), 1), nx=True)
+        pipe.incrby(key, amount)
+        return int(pipe.execute()[-1])
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+# ------------------------------------------------------------
+# Local stand-in for a network store: one InMemorySharedState
+# served to every worker over an authenticated socket
+# ------------------------------------------------------------
+
+_served: InMemorySharedState | None = None
+
+
+def _served_state() -> InMemorySharedState:
+    global _served
+    if _served is None:
+        _served = InMemorySharedState(maxsize=settings.STATE_MMAP_SLOTS)
+    return _served
+
+
+class StateServer(BaseManager):
+    pass
+
+
+StateServer.register("state", callable=_served_state, exposed=("get", "set", "delete", "incr", "stats"))
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _authkey() -> bytes:
+    """
+    The state server unpickles what clients send, so it never runs (or is
+    connected to) without its own secret.
+    """
+    if not settings.STATE_SERVER_AUTHKEY:
+        raise RuntimeError("STATE_BACKEND=server needs STATE_SERVER_AUTHKEY")
+    return hashlib.sha256(settings.STATE_SERVER_AUTHKEY.encode()).digest()
+
+
+def connect_state_server(address: str) -> SharedState:
+    server = StateServer(address=parse_address(address), authkey=_authkey())
+    server.connect()
+    return server.state()
+
+
+def start_state_server(address: str) -> StateServer:
+    """
+    Serve the shared state from a child process (used by `python -m app`).
+    """
+    server = StateServer(address=parse_address(address), authkey=_authkey())
+    server.start()
+    return server
+
+
+# ------------------------------------------------------------
+# Process-wide instance
+# ------------------------------------------------------------
+
+_state: SharedState | None = None
+_state_lock = threading.Lock()
+
+
+def build_shared_state() -> SharedState:
+    backend = settings.STATE_BACKEND
+    if backend == "mmap":
+        if not settings.STATE_MMAP_PATH:
+            raise RuntimeError("STATE_BACKEND=mmap needs STATE_MMAP_PATH")
+        return MmapSharedState(settings.STATE_MMAP_PATH, settings.STATE_MMAP_SLOTS, settings.STATE_MMAP_SLOT_SIZE)
+    if backend == "server":
+        return connect_state_server(settings.STATE_SERVER_ADDRESS)
+    if backend == "redis":
+        import redis  # optional dependency, only needed for this backend
+
+        return RedisSharedState(redis.Redis.from_url(settings.REDIS_URL))
+    return InMemorySharedState()
+
+
+def get_shared_state() -> SharedState:
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = build_shared_state()
+    return _state
+
+
+class LazySharedState:
+    """
+    SharedState that resolves get_shared_state() on first use. Module-level
+    caches and limiters hold one of these, so importing them opens no mmap
+    file or state-server connection; the lifespan resolves it at startup.
+    """
+
+    def get(self, key: str) -> str | None:
+        return get_shared_state().get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        get_shared_state().set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        get_shared_state().delete(key)
+
+    def incr(self, key: str, ttl: float, amount: int = 1) -> int:
+        return get_shared_state().incr(key, ttl, amount)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_shared_state(), name)
+
+
+def is_shared() -> bool:
+    """
+    True when state is visible to other worker processes.
+    """
+    return settings.STATE_BACKEND != "memory"
+
+
+class SharedCache:
+    """
+    TTLCache-compatible view over SharedState for values that must look the
+    same from every worker. Values round-trip through `dumps`/`loads`.
+    """
+
+    def __init__(self, state: SharedState, prefix: str, ttl: float,
+                 dumps: Callable[[Any], str] = json.dumps, loads: Callable[[str], Any] = json.loads):
+        self.state = state
+        self.prefix = prefix
+        self.ttl = ttl
+        self._dumps = dumps
+        self._loads = loads
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        raw = self.state.get(f"{self.prefix}{key}")
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self._loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, expires_at: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl > 0:
+            self.state.set(f"{self.prefix}{key}", self._dumps(value), ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.state.delete(f"{self.prefix}{key}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": settings.STATE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve shared worker state on a socket (stand-in for a network store).")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--address", default=settings.STATE_SERVER_ADDRESS)
+    args = parser.parse_args()
+
+    server = StateServer(address=parse_address(args.address), authkey=_authkey())
+    print(f"serving shared state on {args.address}")
+    server.get_server().serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# backend/app/core/startup.py
+# ------------------------------------------------------------
+# Startup cost: optional warmup, import-time profile and
+# time-to-first-request measurement
+# ------------------------------------------------------------
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass
+
+from app.config import settings
+from app.core.security import hash_password_async
+from app.db.session import warm_async_pool
+
+
+async def warmup() -> dict[str, float]:
+    """
+    Pay first-request costs during startup: open pooled DB connections and
+    run one Argon2 hash (which also starts a hash-pool worker). ORM mappers
+    are already configured by the lifespan's first query. Returns each
+    step's duration in ms.
+    """
+    timings = {}
+    started = time.perf_counter()
+    await warm_async_pool(settings.STARTUP_WARMUP_CONNECTIONS or settings.DB_POOL_SIZE)
+    timings["db_connections"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    await hash_password_async("startup-warmup")
+    timings["argon2_hash"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_imports(module: str = "app.main", env: dict | None = None) -> list[ImportTiming]:
+    """
+    Import `module` in a fresh interpreter under `-X importtime` and return
+    one entry per module it loaded, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    timings = []
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header row or unrelated stderr
+        name = fields[2].rstrip()
+        indent = len(name) - len(name.lstrip())
+        timings.append(ImportTiming(name.strip(), int(fields[0]), int(fields[1]), (indent - 1) // 2))
+    return timings
+
+
+def by_package(timings: list[ImportTiming]) -> list[tuple[str, int]]:
+    """
+    Self time (us) summed per top-level package, largest first. App modules
+    are kept separate (app.api.auth, ...) since those are the ones to fix.
+    """
+    totals = defaultdict(int)
+    for timing in timings:
+        key = timing.name if timing.name.startswith("app.") else timing.name.split(".")[0]
+        totals[key] += timing.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str, timeout: float) -> int:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def time_to_first_request(path: str = "/health", env: dict | None = None, timeout: float = 60.0) -> dict[str, float]:
+    """
+    Start `uvicorn app.main:app` in a new process and poll `path` until it
+    answers. Returns ms from spawn to the first response (`ready`), the
+    latency of that response (`first_request`) and of the next (`second_request`).
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}:\n{server.stderr.read().decode()[-2000:]}")
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError(f"no response from {url} within {timeout}s")
+            sent = time.perf_counter()
+            try:
+                _get(url, timeout)
+            except (ConnectionError, urllib.error.URLError):
+                time.sleep(0.01)
+                continue
+            answered = time.perf_counter()
+            break
+        _get(url, timeout)
+        second = time.perf_counter() - answered
+        return {
+            "ready": (answered - started) * 1000,
+            "first_request": (answered - sent) * 1000,
+            "second_request": second * 1000,
+        }
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile app startup: import time and time to first request.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imports = sub.add_parser("imports", help="import-time breakdown of a module (python -X importtime)")
+    imports.add_argument("--module", default="app.main")
+    imports.add_argument("--top", type=int, default=25)
+    first = sub.add_parser("first-request", help="spawn uvicorn and time the first answered request")
+    first.add_argument("--path", default="/health")
+    first.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "imports":
+        timings = profile_imports(args.module)
+        root = next(t for t in reversed(timings) if t.name == args.module)
+        print(f"import {args.module}: {root.cumulative_us / 1000:.1f} ms, {len(timings)} modules")
+        print(f"\n{'self (ms)':>10}  package")
+        for name, self_us in by_package(timings)[:args.top]:
+            print(f"{self_us / 1000:>10.1f}  {name}")
+        print(f"\n{'cumul (ms)':>10}  app module")
+        app_modules = sorted((t for t in timings if t.name.startswith("app.")), key=lambda t: t.cumulative_us, reverse=True)
+        for timing in app_modules[:args.top]:
+            print(f"{timing.cumulative_us / 1000:>10.1f}  {timing.name}")
+        return
+
+    print(f"{'ready (ms)':>11} {'first (ms)':>11} {'second (ms)':>12}")
+    for _ in range(args.runs):
+        result = time_to_first_request(args.path, env=dict(os.environ))
+        print(f"{result['ready']:>11.1f} {result['first_request']:>11.1f} {result['second_request']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
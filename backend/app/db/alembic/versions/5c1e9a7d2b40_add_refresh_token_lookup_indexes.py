@@ -0,0 +1,29 @@
+"""add refresh token lookup indexes
+
+Revision ID: 5c1e9a7d2b40
+Revises: 20bc31433d71
+Create Date: 2026-10-17 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2b40'
+down_revision: Union[str, Sequence[str], None] = '20bc31433d71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # token_hash already carries a unique index; refresh/logout resolve tokens through it.
+    op.create_index('ix_refresh_tokens_user_revoked_expires', 'refresh_tokens', ['user_id', 'revoked', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_tokens_user_revoked_expires', table_name='refresh_tokens')
@@ -0,0 +1,32 @@
+"""add audit log history indexes
+
+Revision ID: 8e2f4a61c9d3
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-17 11:40:27.503912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2f4a61c9d3'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'], unique=False)
+    # action is TEXT; MySQL can only index a prefix of it.
+    op.create_index('ix_audit_logs_action_created', 'audit_logs', ['action', 'created_at'], unique=False,
+                    mysql_length={'action': 64})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_action_created', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_user_created', table_name='audit_logs')
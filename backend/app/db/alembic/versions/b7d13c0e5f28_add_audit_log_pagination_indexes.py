@@ -0,0 +1,31 @@
+"""add audit log pagination indexes
+
+Revision ID: b7d13c0e5f28
+Revises: 8e2f4a61c9d3
+Create Date: 2026-10-17 13:05:52.861044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d13c0e5f28'
+down_revision: Union[str, Sequence[str], None] = '8e2f4a61c9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /audit/events seeks on (created_at, id); filtered listings use (<column>, created_at).
+    op.create_index('ix_audit_logs_created_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_ip_created', 'audit_logs', ['ip_address', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_logs_ip_created', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_created_id', table_name='audit_logs')
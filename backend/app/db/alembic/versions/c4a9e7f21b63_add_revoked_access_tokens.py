@@ -0,0 +1,41 @@
+"""add revoked access tokens
+
+Revision ID: c4a9e7f21b63
+Revises: b7d13c0e5f28
+Create Date: 2026-10-17 15:21:09.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e7f21b63'
+down_revision: Union[str, Sequence[str], None] = 'b7d13c0e5f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'revoked_access_tokens',
+        sa.Column('jti', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('revoked_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('jti'),
+    )
+    # revoked_at drives incremental revocation-filter sync; expires_at drives pruning.
+    op.create_index(op.f('ix_revoked_access_tokens_revoked_at'), 'revoked_access_tokens', ['revoked_at'], unique=False)
+    op.create_index(op.f('ix_revoked_access_tokens_expires_at'), 'revoked_access_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_revoked_access_tokens_expires_at'), table_name='revoked_access_tokens')
+    op.drop_index(op.f('ix_revoked_access_tokens_revoked_at'), table_name='revoked_access_tokens')
+    op.drop_table('revoked_access_tokens')
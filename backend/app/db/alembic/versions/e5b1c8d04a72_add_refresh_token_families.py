@@ -0,0 +1,36 @@
+"""add refresh token families
+
+Revision ID: e5b1c8d04a72
+Revises: d2f86b3a9e17
+Create Date: 2026-10-17 18:05:41.563902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1c8d04a72'
+down_revision: Union[str, Sequence[str], None] = 'd2f86b3a9e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing tokens keep family_id NULL (no backfill); their next rotation starts a family.
+    op.add_column('refresh_tokens', sa.Column('family_id', sa.String(length=32), nullable=True))
+    op.add_column('refresh_tokens', sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+    # Rows revoked earlier keep revoked_at NULL; cleanup falls back to created_at for them.
+    op.add_column('refresh_tokens', sa.Column('revoked_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_refresh_tokens_family_revoked', 'refresh_tokens', ['family_id', 'revoked'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_tokens_family_revoked', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'revoked_at')
+    op.drop_column('refresh_tokens', 'generation')
+    op.drop_column('refresh_tokens', 'family_id')
@@ -0,0 +1,39 @@
+"""add refresh token selectors
+
+Revision ID: f3a7d9c25e81
+Revises: e5b1c8d04a72
+Create Date: 2026-10-17 19:42:17.208455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7d9c25e81'
+down_revision: Union[str, Sequence[str], None] = 'e5b1c8d04a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('refresh_tokens', sa.Column('selector', sa.BigInteger(), nullable=True))
+    op.add_column('refresh_tokens', sa.Column('verifier_hash', sa.LargeBinary(length=32), nullable=True))
+    op.create_index('ix_refresh_tokens_selector', 'refresh_tokens', ['selector'], unique=True)
+    # New rows leave token_hash NULL; its unique index only serves legacy tokens until they expire.
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=512), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Selector tokens cannot be resolved without their columns; those sessions end.
+    op.execute("DELETE FROM refresh_tokens WHERE token_hash IS NULL")
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=512), nullable=False)
+    op.drop_index('ix_refresh_tokens_selector', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'verifier_hash')
+    op.drop_column('refresh_tokens', 'selector')
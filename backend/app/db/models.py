@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime, timedelta
 
@@ -24,8 +24,19 @@ class RefreshToken(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
 
-    token_hash = Column(String(512), nullable=False, unique=True)  # store only hashed token
+    # `<selector>.<verifier>` tokens: point lookup by selector, then a
+    # constant-time compare of the verifier's SHA-256
+    selector = Column(BigInteger, nullable=True)
+    verifier_hash = Column(LargeBinary(32), nullable=True)
+    # SHA-256 hex of tokens issued before selectors; NULL for new rows
+    token_hash = Column(String(512), nullable=True, unique=True)
     revoked = Column(Boolean, default=False)
+    # When it was rotated out or revoked; cleanup keeps revoked rows this long past it
+    revoked_at = Column(DateTime, nullable=True)
+
+    # Every rotation of a login's token shares its family; generation counts rotations
+    family_id = Column(String(32), nullable=True)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
     
     issued_at = Column(DateTime, default=datetime.utcnow) 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -33,6 +44,14 @@ class RefreshToken(Base):
 
     user = relationship("User", back_populates="tokens")
 
+    __table_args__ = (
+        # Per-user active session queries: user_id = ? AND revoked = 0 AND expires_at > now
+        Index("ix_refresh_tokens_user_revoked_expires", "user_id", "revoked", "expires_at"),
+        # Family revocation on reuse: family_id = ? AND revoked = 0
+        Index("ix_refresh_tokens_family_revoked", "family_id", "revoked"),
+        Index("ix_refresh_tokens_selector", "selector", unique=True),
+    )
+
 
 class ResetToken(Base):
     __tablename__ = "reset_tokens"
@@ -47,6 +66,38 @@ class ResetToken(Base):
 
     user = relationship("User", back_populates="reset_tokens")
 
+class RevokedAccessToken(Base):
+    __tablename__ = "revoked_access_tokens"
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    to_address = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html = Column(Text, nullable=False)
+    text = Column(Text, nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending")  # pending / sending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Dispatcher claims: status IN (pending, sending) AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_email_outbox_claim_token", "claim_token"),
+    )
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     id = Column(Integer, primary_key=True, index=True)
@@ -61,3 +112,12 @@ class AuditLog(Base):
 
     user = relationship("User", back_populates="logs")
 
+    __table_args__ = (
+        # Per-user and per-action history; action is TEXT, so MySQL indexes a prefix
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        Index("ix_audit_logs_action_created", "action", "created_at", mysql_length={"action": 64}),
+        # Keyset pagination of the unfiltered log and per-IP history
+        Index("ix_audit_logs_created_id", "created_at", "id"),
+        Index("ix_audit_logs_ip_created", "ip_address", "created_at"),
+    )
+
@@ -0,0 +1,111 @@
+"""
+Connection pool instrumentation: checkout wait times, concurrency and hold
+times recorded from SQLAlchemy pool events, served by /metrics/db-pool.
+"""
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+from app.core.metrics import Counter, Histogram
+
+# Connections in use at checkout time
+CHECKED_OUT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_seconds = Histogram()
+        self.hold_seconds = Histogram()
+        self.checked_out_at_checkout = Histogram(CHECKED_OUT_BUCKETS)
+        self.checkouts = Counter()
+        self.timeouts = Counter()
+        self.connects = Counter()
+        self.invalidations = Counter()
+        self.engine: Engine | None = None
+
+    @property
+    def pool(self) -> Pool | None:
+        return self.engine.pool if self.engine is not None else None
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        status = {}
+        if isinstance(pool, QueuePool):
+            status = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return {
+            **status,
+            "checkouts": self.checkouts.value,
+            "timeouts": self.timeouts.value,
+            "connects": self.connects.value,
+            "invalidations": self.invalidations.value,
+            "wait_seconds": self.wait_seconds.snapshot(),
+            "hold_seconds": self.hold_seconds.snapshot(),
+            "checked_out_at_checkout": self.checked_out_at_checkout.snapshot(),
+        }
+
+    def prometheus(self) -> list[str]:
+        labels = f'pool="{self.name}"'
+        lines = []
+        for key, value in self.snapshot().items():
+            if isinstance(value, int):
+                lines.append(f"db_pool_{key}{{{labels}}} {value}")
+        lines += self.wait_seconds.prometheus("db_pool_wait_seconds", labels)
+        lines += self.hold_seconds.prometheus("db_pool_hold_seconds", labels)
+        lines += self.checked_out_at_checkout.prometheus("db_pool_checked_out_at_checkout", labels)
+        return lines
+
+
+def instrumented_pool_class(base: type[QueuePool], metrics: PoolMetrics) -> type[QueuePool]:
+    """
+    Subclass `base` so checkout wait time is timed. Bound as a class attribute
+    so the metrics survive pool.recreate() on engine.dispose().
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return base.connect(self)
+        except exc.TimeoutError:
+            metrics.timeouts.inc()
+            raise
+        finally:
+            metrics.wait_seconds.observe(time.perf_counter() - start)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"connect": connect, "metrics": metrics})
+
+
+def attach_pool_events(engine: Engine, metrics: PoolMetrics) -> None:
+    """
+    Record connect/checkout/checkin/invalidate activity on the engine's pool.
+    """
+    metrics.engine = engine
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        metrics.connects.inc()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        metrics.checkouts.inc()
+        record.info["checkout_at"] = time.perf_counter()
+        pool = metrics.pool
+        if isinstance(pool, QueuePool):
+            metrics.checked_out_at_checkout.observe(pool.checkedout())
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        started = record.info.pop("checkout_at", None)
+        if started is not None:
+            metrics.hold_seconds.observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        metrics.invalidations.inc()
@@ -0,0 +1,152 @@
+"""
+Per-request SQL instrumentation: statement count, total DB time and the
+slowest statement of each request, aggregated per route for /metrics/queries.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Statements per request
+STATEMENT_BUCKETS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50)
+
+
+@dataclass
+class RequestQueryStats:
+    count: int = 0
+    commits: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_seconds += elapsed
+        if elapsed > self.slowest_seconds:
+            self.slowest_seconds = elapsed
+            self.slowest_statement = statement
+
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def start_tracking() -> RequestQueryStats:
+    """
+    Begin collecting statements executed in the current context (request, test block).
+    """
+    stats = RequestQueryStats()
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def attach_query_listeners(engine: Engine) -> None:
+    """
+    Time every cursor execution and count commits on `engine`; async engines pass `.sync_engine`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            logger.warning("slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # a failed statement never reaches after_cursor_execute; drop its start
+        # time so it does not linger on the pooled connection
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @event.listens_for(engine, "commit")
+    def _commit(conn):
+        stats = _current.get()
+        if stats is not None:
+            stats.commits += 1
+
+
+class RouteQueryMetrics:
+    def __init__(self):
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.commits = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = Histogram()
+        self.slowest_seconds = 0.0
+        self.slowest_statement: str | None = None
+
+    def observe(self, stats: RequestQueryStats) -> None:
+        self.statements.observe(stats.count)
+        self.commits.observe(stats.commits)
+        self.db_seconds.observe(stats.total_seconds)
+        if stats.slowest_seconds > self.slowest_seconds:
+            self.slowest_seconds = stats.slowest_seconds
+            self.slowest_statement = stats.slowest_statement
+
+    def snapshot(self) -> dict:
+        return {
+            "statements": self.statements.snapshot(),
+            "commits": self.commits.snapshot(),
+            "db_seconds": self.db_seconds.snapshot(),
+            "slowest_ms": self.slowest_seconds * 1000,
+            "slowest_statement": self.slowest_statement,
+        }
+
+
+route_metrics: dict[str, RouteQueryMetrics] = {}
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that tracks the SQL issued while serving each request.
+    With settings.DEBUG the numbers are also returned as X-DB-* headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_tracking()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-commits", str(stats.commits).encode()),
+                    (b"x-db-time-ms", f"{stats.total_seconds * 1000:.2f}".encode()),
+                    (b"x-db-slowest-ms", f"{stats.slowest_seconds * 1000:.2f}".encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            route = scope.get("route")
+            key = f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+            metrics = route_metrics.get(key)
+            if metrics is None:
+                metrics = route_metrics.setdefault(key, RouteQueryMetrics())
+            metrics.observe(stats)
@@ -1,18 +1,136 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import asyncio
 import os
+import threading
+from app.config import settings
+from app.db.pool_metrics import PoolMetrics, attach_pool_events, instrumented_pool_class
+from app.db.query_stats import attach_query_listeners
 
-# Load environment variables
-load_dotenv()
+# Sync driver -> asyncio driver used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+def to_async_url(url: str) -> str:
+    """
+    Map a sync database URL onto the matching asyncio driver.
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def engine_options(url: str, pool_base: type[QueuePool], metrics: PoolMetrics) -> dict:
+    """
+    Pool sizing from settings. In-memory SQLite keeps SQLAlchemy's default
+    single-connection pool, which takes no sizing arguments.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_base, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+
+class _LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            init_engines()
+        return super().__call__(**local_kw)
+
+
+class _LazyAsyncSessionmaker(async_sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            init_engines()
+        return super().__call__(**local_kw)
+
+
+# Session factories exist at import; the engines behind them (and the .env /
+# DATABASE_URL lookup, and the driver import) are created by init_engines(),
+# called from the app lifespan or on the first session opened outside it.
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = _LazyAsyncSessionmaker(autoflush=False, expire_on_commit=False)
+
+_ENGINE_ATTRS = ("DATABASE_URL", "ASYNC_DATABASE_URL", "engine", "async_engine")
+_init_lock = threading.Lock()
+
+
+def init_engines() -> None:
+    """
+    Create the sync and async engines and bind the session factories. Idempotent.
+    """
+    global DATABASE_URL, ASYNC_DATABASE_URL, engine, async_engine
+    with _init_lock:
+        if "engine" in globals():
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise RuntimeError("DATABASE_URL is not set")
+        async_database_url = os.getenv("ASYNC_DATABASE_URL") or to_async_url(database_url)
+
+        sync_engine = create_engine(database_url, **engine_options(database_url, QueuePool, pool_metrics))
+        attach_pool_events(sync_engine, pool_metrics)
+        attach_query_listeners(sync_engine)
+
+        # Async engine used by the API layer
+        aengine = create_async_engine(
+            async_database_url, **engine_options(async_database_url, AsyncAdaptedQueuePool, async_pool_metrics)
+        )
+        attach_pool_events(aengine.sync_engine, async_pool_metrics)
+        attach_query_listeners(aengine.sync_engine)
+
+        SessionLocal.configure(bind=sync_engine)
+        AsyncSessionLocal.configure(bind=aengine)
+        DATABASE_URL, ASYNC_DATABASE_URL = database_url, async_database_url
+        async_engine = aengine
+        engine = sync_engine
+
+
+def __getattr__(name: str):
+    # `from app.db.session import engine` keeps working; it just creates the engines
+    if name in _ENGINE_ATTRS:
+        init_engines()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def warm_async_pool(connections: int) -> int:
+    """
+    Open up to `connections` pooled connections at once and return them to
+    the pool, so the first requests do not pay for connecting.
+    Returns how many were opened.
+    """
+    init_engines()
+    pool = async_engine.pool
+    # beyond pool_size a connection would be overflow, closed again on return
+    connections = min(connections, pool.size() if isinstance(pool, QueuePool) else 1)
+    held = await asyncio.gather(*(async_engine.connect() for _ in range(connections)))
+    for conn in held:
+        await conn.close()
+    return len(held)
 
-# Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     """
@@ -23,4 +141,13 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    FastAPI dependency that yields an AsyncSession.
+    Ensures the session is closed after the request lifecycle.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
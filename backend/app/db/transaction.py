@@ -0,0 +1,54 @@
+"""
+Unit-of-work helpers for services that can either commit themselves or
+leave the commit to the caller (one commit per auth flow).
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+_CALLBACKS = "on_commit_callbacks"
+
+
+def _run_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_CALLBACKS, []):
+        callback()
+
+
+def _discard_callbacks(session: Session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop(_CALLBACKS, None)
+
+
+def on_commit(db: Session | AsyncSession, callback) -> None:
+    """
+    Run `callback()` once, after the session's current transaction commits.
+    A rollback discards it, so a later commit on the same session (e.g. of a
+    failure audit event) does not run callbacks of the work that was undone.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    if not event.contains(session, "after_commit", _run_callbacks):
+        event.listen(session, "after_commit", _run_callbacks)
+        event.listen(session, "after_soft_rollback", _discard_callbacks)
+    session.info.setdefault(_CALLBACKS, []).append(callback)
+
+
+def finish(db: Session, commit: bool) -> None:
+    """
+    Commit when the service owns the transaction, otherwise just flush so
+    generated keys are available to the caller.
+    """
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+
+async def finish_async(db: AsyncSession, commit: bool) -> None:
+    """
+    Async finish.
+    """
+    if commit:
+        await db.commit()
+    else:
+        await db.flush()
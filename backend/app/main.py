@@ -1,11 +1,61 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.config import settings
+from app.api.admin import router as admin_router
 from app.api.auth import router as auth_router
+from app.api.jwks import router as jwks_router
+from app.api.audit import router as audit_router
+from app.api.metrics import router as metrics_router
+from app.core.keys import key_ring
+from app.core.security import get_pwd_context, shutdown_hash_pool
+from app.core.shared_state import get_shared_state, is_shared
+from app.core.startup import warmup
+from app.db.query_stats import QueryStatsMiddleware
+from app.db.session import AsyncSessionLocal, init_engines
+from app.services.audit_services import start_audit_writer, stop_audit_writer
+from app.services.email import start_email_dispatcher, stop_email_dispatcher, templates
+from app.services.revocation import revocations
+from app.services.token_cleanup import start_token_cleanup, stop_token_cleanup
 
-app = FastAPI()
+logger = logging.getLogger("app")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # heavy setup happens here rather than at import (see python -m app.core.startup)
+    init_engines()
+    if is_shared():
+        get_shared_state()  # open the mmap table / connect to the state server now, not on first request
+    get_pwd_context()
+    key_ring.load()  # parse signing keys once, before the first request
+    templates.load()  # compile email templates and pre-render their fragments
+    async with AsyncSessionLocal() as db:
+        await revocations.rebuild(db)
+    if settings.STARTUP_WARMUP:
+        logger.info("startup warmup (ms): %s", await warmup())
+    if settings.AUDIT_MODE == "background":
+        start_audit_writer()
+    if settings.TOKEN_CLEANUP_INTERVAL > 0:
+        start_token_cleanup()
+    if settings.EMAIL_WORKERS > 0:
+        start_email_dispatcher()
+    yield
+    stop_email_dispatcher()
+    stop_token_cleanup()
+    stop_audit_writer()
+    shutdown_hash_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
 
 @app.get("/health")
 def healthcheck():
     return {"status": "ok"}
 
 app.include_router(auth_router)
-
+app.include_router(jwks_router)
+app.include_router(audit_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
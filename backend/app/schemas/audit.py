@@ -0,0 +1,18 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class AuditEvent(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    action: str
+    ip_address: Optional[str] = None
+    success: bool
+    details: Optional[str] = None
+    created_at: datetime
+
+
+class AuditPage(BaseModel):
+    items: list[AuditEvent]
+    next_cursor: Optional[str] = None
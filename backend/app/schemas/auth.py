@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from datetime import datetime
 
 
 class RegisterRequest(BaseModel):
@@ -40,4 +41,33 @@ class ForgotPasswordRequest(BaseModel):
 
 class ResetPasswordRequest(BaseModel):
     token: str
-    new_password: str
\ No newline at end of file
+    new_password: str
+
+
+class UserResponse(BaseModel):
+    id: int
+    email: EmailStr
+    full_name: Optional[str] = None
+
+
+class IntrospectRequest(BaseModel):
+    token: str
+    token_type_hint: Optional[str] = None
+
+
+class IntrospectResponse(BaseModel):
+    active: bool
+    token_type: Optional[str] = None
+    sub: Optional[str] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+
+
+class SessionInfo(BaseModel):
+    id: int
+    issued_at: datetime
+    expires_at: datetime
+
+
+class RevokeAllResponse(BaseModel):
+    revoked: int
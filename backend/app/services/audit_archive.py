@@ -0,0 +1,190 @@
+# backend/app/services/audit_archive.py
+# ------------------------------------------------------------
+# Audit log retention: move old rows into compressed day files
+# ------------------------------------------------------------
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("id", "user_id", "action", "ip_address", "success", "details", "created_at")
+_FILE_RE = re.compile(r"audit-(\d{4}-\d{2}-\d{2})\.jsonl\.gz$")
+
+
+def partition_path(archive_dir: Path, day: date) -> Path:
+    return Path(archive_dir) / f"{day:%Y}" / f"audit-{day.isoformat()}.jsonl.gz"
+
+
+def _serialize(row) -> dict:
+    record = dict(zip(_COLUMNS, row))
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+def _append(path: Path, records: list[dict]) -> None:
+    """
+    Append one gzip member to a day file. Concatenated members form a valid
+    gzip stream, so files are only ever appended to, never rewritten.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            gz.write(payload)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+@dataclass
+class ArchiveReport:
+    archived: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    partitions: set[str] = field(default_factory=set)
+
+
+def archive_audit_logs(
+    session_factory: Callable[[], Session],
+    archive_dir: Path,
+    *,
+    older_than: timedelta,
+    batch_size: int,
+    sleep: float = 0.0,
+    now: datetime | None = None,
+) -> ArchiveReport:
+    """
+    Move audit rows created before `now - older_than` into per-day
+    compressed JSONL partitions, `batch_size` rows at a time.
+
+    Each batch is written and fsynced before the same rows are deleted, so a
+    crash in between leaves duplicates in the archive (readers can dedupe on
+    id) but never loses events.
+    """
+    cutoff = (now or datetime.utcnow()) - older_than
+    report = ArchiveReport()
+    started = time.perf_counter()
+    last_id = 0
+    while True:
+        db = session_factory()
+        try:
+            rows = db.execute(
+                select(*(getattr(AuditLog, c) for c in _COLUMNS))
+                .where(AuditLog.id > last_id, AuditLog.created_at < cutoff)
+                .order_by(AuditLog.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            by_day: dict[date, list[dict]] = {}
+            for row in rows:
+                by_day.setdefault(row.created_at.date(), []).append(_serialize(row))
+            for day, records in by_day.items():
+                path = partition_path(archive_dir, day)
+                _append(path, records)
+                report.partitions.add(path.name)
+            db.execute(delete(AuditLog).where(AuditLog.id.in_([row.id for row in rows])))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        last_id = rows[-1].id
+        report.archived += len(rows)
+        report.batches += 1
+        if len(rows) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    report.seconds = time.perf_counter() - started
+    logger.info("archived %d audit rows into %d partitions (%.2fs)", report.archived, len(report.partitions), report.seconds)
+    return report
+
+
+def iter_archived(
+    archive_dir: Path,
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    user_id: int | None = None,
+    action: str | None = None,
+) -> Iterator[dict]:
+    """
+    Stream archived events in day order, one line at a time. Only the day
+    files overlapping [since, until) are opened.
+    """
+    files = []
+    for path in Path(archive_dir).glob("*/audit-*.jsonl.gz"):
+        match = _FILE_RE.search(path.name)
+        if not match:
+            continue
+        day = date.fromisoformat(match.group(1))
+        if since is not None and day < since.date():
+            continue
+        if until is not None and day > until.date():
+            continue
+        files.append((day, path))
+
+    for _, path in sorted(files):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                record = json.loads(line)
+                if user_id is not None and record["user_id"] != user_id:
+                    continue
+                if action is not None and record["action"] != action:
+                    continue
+                created_at = datetime.fromisoformat(record["created_at"])
+                if since is not None and created_at < since:
+                    continue
+                if until is not None and created_at >= until:
+                    continue
+                yield record
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive old audit log rows or read archived history.")
+    parser.add_argument("--dir", type=Path, default=Path(settings.AUDIT_ARCHIVE_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    archive = sub.add_parser("archive", help="move rows older than the retention into the archive")
+    archive.add_argument("--days", type=int, default=settings.AUDIT_RETENTION_DAYS)
+    archive.add_argument("--batch-size", type=int, default=settings.AUDIT_ARCHIVE_BATCH_SIZE)
+    archive.add_argument("--sleep", type=float, default=0.0, help="pause between batches (s)")
+
+    read = sub.add_parser("read", help="print archived events as JSON lines")
+    read.add_argument("--since", type=datetime.fromisoformat)
+    read.add_argument("--until", type=datetime.fromisoformat)
+    read.add_argument("--user-id", type=int)
+    read.add_argument("--action")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        from app.db.session import SessionLocal
+
+        report = archive_audit_logs(SessionLocal, args.dir, older_than=timedelta(days=args.days),
+                                    batch_size=args.batch_size, sleep=args.sleep)
+        print(f"{report.archived} rows archived into {len(report.partitions)} partitions "
+              f"in {report.batches} batches, {report.seconds:.2f}s")
+    else:
+        for record in iter_archived(args.dir, since=args.since, until=args.until,
+                                    user_id=args.user_id, action=args.action):
+            print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# backend/app/services/audit_query.py
+# ------------------------------------------------------------
+# Keyset-paginated reads of the audit log
+# ------------------------------------------------------------
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import AuditLog
+
+_COLUMNS = (
+    AuditLog.id,
+    AuditLog.user_id,
+    AuditLog.action,
+    AuditLog.ip_address,
+    AuditLog.success,
+    AuditLog.details,
+    AuditLog.created_at,
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AuditFilter:
+    user_id: int | None = None
+    action: str | None = None
+    success: bool | None = None
+    ip_address: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+
+
+def build_page_query(filters: AuditFilter, after: tuple[datetime, int] | None, limit: int) -> Select:
+    """
+    Newest-first page of events strictly after the `after` position.
+
+    Seeks on (created_at, id) instead of OFFSET, so every page is a range
+    scan of `limit` rows on one of the (<filter column>, created_at) indexes
+    no matter how deep the caller has paged.
+    """
+    query = select(*_COLUMNS)
+    if filters.user_id is not None:
+        query = query.where(AuditLog.user_id == filters.user_id)
+    if filters.action is not None:
+        query = query.where(AuditLog.action == filters.action)
+    if filters.success is not None:
+        query = query.where(AuditLog.success.is_(filters.success))
+    if filters.ip_address is not None:
+        query = query.where(AuditLog.ip_address == filters.ip_address)
+    if filters.since is not None:
+        query = query.where(AuditLog.created_at >= filters.since)
+    if filters.until is not None:
+        query = query.where(AuditLog.created_at < filters.until)
+    if after is not None:
+        query = query.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*after))
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
+
+
+def to_event(row) -> dict:
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "action": row.action,
+        "ip_address": row.ip_address,
+        "success": bool(row.success),
+        "details": row.details,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+async def fetch_page(db: AsyncSession, filters: AuditFilter, cursor: str | None, limit: int) -> tuple[list[dict], str | None]:
+    """
+    Return one page of events and the cursor of the next page (None on the last one).
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page exists without a COUNT
+    rows = (await db.execute(build_page_query(filters, after, limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return [to_event(row) for row in rows], next_cursor
+
+
+async def stream_ndjson(db: AsyncSession, filters: AuditFilter, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield every matching event as NDJSON, one keyset batch at a time, so an
+    export holds at most `batch_size` rows in memory.
+    """
+    after = None
+    while True:
+        rows = (await db.execute(build_page_query(filters, after, batch_size))).all()
+        if not rows:
+            return
+        yield "".join(json.dumps(to_event(row)) + "\n" for row in rows).encode()
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].created_at, rows[-1].id)
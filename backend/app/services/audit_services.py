@@ -1,7 +1,194 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.db.models import AuditLog
+from app.db.transaction import on_commit
+
+logger = logging.getLogger(__name__)
+
+_WAKE = object()
+
+
+class AuditWriter:
+    """
+    Background writer that batches audit events into multi-row INSERTs.
+
+    Handlers enqueue plain dicts; a single thread flushes them when `batch_size`
+    events are waiting or `flush_interval` seconds have passed. When the queue is
+    full new events are dropped (and counted) rather than blocking the request.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_queue: int, batch_size: int, flush_interval: float):
+        self._session_factory = session_factory
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the writer thread after draining everything already queued.
+        """
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)  # interrupt a blocking get()
+        except queue.Full:
+            pass  # writer is busy and will see the stop flag
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, event: dict) -> bool:
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+    def _run(self) -> None:
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                event = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                if event is not _WAKE:
+                    batch.append(event)
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._flush(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: list[dict]) -> None:
+        db = self._session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+            self.written += len(batch)
+            self.flushes += 1
+        except Exception:
+            db.rollback()
+            logger.warning("audit batch of %d failed; retrying row by row", len(batch), exc_info=True)
+            self._flush_rows(db, batch)
+        finally:
+            db.close()
+
+    def _flush_rows(self, db: Session, batch: list[dict]) -> None:
+        # one bad event must not take the rest of its batch down with it
+        for event in batch:
+            try:
+                db.execute(insert(AuditLog), [event])
+                db.commit()
+                self.written += 1
+            except Exception:
+                db.rollback()
+                self.failed += 1
+                logger.exception("failed to write audit event %r", event.get("action"))
+        self.flushes += 1
+
+
+_writer: AuditWriter | None = None
+
+
+def start_audit_writer(session_factory: Callable[[], Session] | None = None) -> AuditWriter:
+    """
+    Start the background writer; log_action enqueues to it until stop_audit_writer().
+    """
+    global _writer
+    if _writer is None:
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        _writer = AuditWriter(
+            session_factory,
+            max_queue=settings.AUDIT_QUEUE_SIZE,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+        )
+        _writer.start()
+    return _writer
+
+
+def stop_audit_writer() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def get_audit_writer() -> AuditWriter | None:
+    return _writer
+
+
+def _event(user_id: int | None, action: str, success: bool, details: str | None, ip: str | None) -> dict:
+    return {
+        "user_id": user_id,
+        "action": action,
+        "ip_address": ip,
+        "success": success,
+        "details": details,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _enqueue_on_commit(db: Session | AsyncSession, writer: AuditWriter, event: dict) -> None:
+    # Queued only once the caller's transaction commits: a flow that rolls
+    # back must not be recorded as having happened
+    on_commit(db, lambda: writer.enqueue(event))
+
+
+def log_action(db: Session, user_id: int | None, action: str, success: bool = True, details: str | None = None, ip: str | None = None, *, commit: bool = True):
+    if _writer is not None:
+        _enqueue_on_commit(db, _writer, _event(user_id, action, success, details, ip))
+        if commit:
+            db.commit()
+        return
+    log = AuditLog(user_id=user_id, action=action, ip_address=ip, success=success, details=details)
+    db.add(log)
+    if commit:
+        db.commit()
+
 
-def log_action(db: Session, user_id: int | None, action: str, success: bool = True, details: str | None = None, ip: str | None = None):
+async def log_action_async(db: AsyncSession, user_id: int | None, action: str, success: bool = True, details: str | None = None, ip: str | None = None, *, commit: bool = True):
+    if _writer is not None:
+        _enqueue_on_commit(db, _writer, _event(user_id, action, success, details, ip))
+        if commit:
+            await db.commit()
+        return
     log = AuditLog(user_id=user_id, action=action, ip_address=ip, success=success, details=details)
     db.add(log)
-    db.commit()
+    if commit:
+        await db.commit()
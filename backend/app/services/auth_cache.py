@@ -0,0 +1,85 @@
+# backend/app/services/auth_cache.py
+# ------------------------------------------------------------
+# Caches behind access-token verification: decoded claims of
+# already-verified tokens and a light projection of their users
+# ------------------------------------------------------------
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.cache import MISSING, TTLCache
+from app.core.jwt import decode_access_token
+from app.core.shared_state import LazySharedState, SharedCache, is_shared
+from app.db.models import User
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    email: str
+    full_name: str | None
+    is_active: bool
+
+
+# token digest -> claims; entries expire at the token's own `exp`
+verified_tokens = TTLCache(maxsize=settings.ACCESS_TOKEN_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# user id -> CurrentUser. Shared between workers when they share state, so a
+# deactivation or profile change invalidates every worker's copy at once.
+# (verified_tokens stays per process: claims depend only on the token itself.)
+if is_shared():
+    user_projections = SharedCache(
+        LazySharedState(),
+        prefix="user:proj:",
+        ttl=settings.USER_PROJECTION_CACHE_TTL,
+        dumps=lambda user: json.dumps(asdict(user)),
+        loads=lambda raw: CurrentUser(**json.loads(raw)),
+    )
+else:
+    user_projections = TTLCache(maxsize=settings.USER_PROJECTION_CACHE_SIZE, ttl=settings.USER_PROJECTION_CACHE_TTL)
+
+
+def verify_access_token(token: str) -> dict:
+    """
+    Return the claims of a valid access token, decoding it at most once per cache lifetime.
+    Raises jose.JWTError if the token is invalid or expired.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = verified_tokens.get(key)
+    if claims is MISSING:
+        claims = decode_access_token(token)
+        verified_tokens.set(key, claims, expires_at=claims["exp"])
+    return claims
+
+
+async def load_user_projection(db: AsyncSession, user_id: int) -> CurrentUser | None:
+    """
+    Resolve a CurrentUser by id, from the projection cache when enabled.
+    """
+    use_cache = settings.USER_PROJECTION_CACHE_TTL > 0
+    if use_cache:
+        cached = user_projections.get(user_id)
+        if cached is not MISSING:
+            return cached
+
+    result = await db.execute(
+        select(User.id, User.email, User.full_name, User.is_active).where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    projection = CurrentUser(id=row.id, email=row.email, full_name=row.full_name, is_active=bool(row.is_active))
+    if use_cache:
+        user_projections.set(user_id, projection)
+    return projection
+
+
+def invalidate_user_projection(user_id: int) -> None:
+    user_projections.delete(user_id)
+
+
+def cache_stats() -> dict:
+    return {"verified_tokens": verified_tokens.stats(), "user_projections": user_projections.stats()}
@@ -1,30 +1,690 @@
+# backend/app/services/email.py
+# ------------------------------------------------------------
+# Outbound email: providers, a persistent outbox and the
+# dispatcher threads that drain it
+# ------------------------------------------------------------
 """
-Email service abstraction so providers can be swapped (SMTP, SendGrid, SES).
-Current implementation logs to console; replace `ConsoleEmailProvider` with a real provider.
+Requests never talk to the mail server. They add a row to `email_outbox` in
+their own transaction; dispatcher threads claim due rows in batches, send
+each batch over one pooled SMTP connection and reschedule failures with
+exponential backoff. Rows survive restarts, and a crashed worker's claim
+expires after EMAIL_LEASE_SECONDS. Message bodies come from the localized
+templates in app/templates/email, compiled once at startup. Bodies can carry
+live credentials (password reset links), so they are blanked as soon as a row
+is sent or has failed for good; only the envelope is kept for auditing.
+
+    python -m app.services.email            # run dispatchers outside the app
+    python -m app.services.email --drain    # send everything due, then exit
 """
-from typing import Protocol
+import argparse
+import logging
+import queue
+import random
+import smtplib
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import make_msgid
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Protocol
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import EmailOutbox
+from app.db.transaction import finish, finish_async, on_commit
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+logger = logging.getLogger(__name__)
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+# Finished rows keep no body: it may hold a live reset link
+_CLEARED_BODY = {"html": "", "text": None}
+
+
+@dataclass(frozen=True)
+class OutboundEmail:
+    to: str
+    subject: str
+    html: str
+    text: str | None = None
 
 
 class EmailProvider(Protocol):
-    def send(self, *, to: str, subject: str, html: str) -> None: ...
+    def send(self, *, to: str, subject: str, html: str, text: str | None = None) -> None: ...
 
 
 class ConsoleEmailProvider:
-    def send(self, *, to: str, subject: str, html: str) -> None:
-        print(f"[EMAIL] to={to} subject={subject}\n{html}")
+    def send(self, *, to: str, subject: str, html: str, text: str | None = None) -> None:
+        print(f"[EMAIL] to={to} subject={subject}\n{text or html}")
 
 
-provider: EmailProvider = ConsoleEmailProvider()
+def build_mime(sender: str, message: OutboundEmail) -> EmailMessage:
+    mime = EmailMessage()
+    mime["From"] = sender
+    mime["To"] = message.to
+    mime["Subject"] = message.subject
+    mime["Message-ID"] = make_msgid()
+    if message.text:
+        mime.set_content(message.text)
+        mime.add_alternative(message.html, subtype="html")
+    else:
+        mime.set_content(message.html, subtype="html")
+    return mime
 
 
-def send_password_reset_email(to_email: str, reset_link: str) -> None:
-    subject = "Reset your password"
-    html = f"""
-    <h2>Password Reset</h2>
-    <p>We received a request to reset your password.</p>
-    <p><a href=\"{reset_link}\">Click here to reset your password</a></p>
-    <p>If you did not request this, you can ignore this email.</p>
+class _Lease:
     """
-    provider.send(to=to_email, subject=subject, html=html)
+    One pooled SMTP connection, checked out by a single thread.
+    """
+
+    def __init__(self, pool: "SmtpConnectionPool", smtp: smtplib.SMTP):
+        self._pool = pool
+        self.smtp = smtp
+        self.broken = False
+
+    def reconnect(self) -> None:
+        _quit(self.smtp)
+        self.smtp = self._pool._open()
+
+    def discard(self) -> None:
+        """
+        Close the connection instead of returning it to the pool.
+        """
+        self.broken = True
+        self.smtp.close()
+
+
+def _quit(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+class SmtpConnectionPool:
+    """
+    At most `size` open SMTP connections shared by the dispatcher threads.
+    Idle connections are reused LIFO, so a quiet pool keeps one warm
+    connection; any idle longer than `max_idle` is closed instead of being
+    reused (servers drop idle sessions after a few minutes).
+    """
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP], size: int, max_idle: float = 60.0):
+        self._connect = connect
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.size = size
+        self.max_idle = max_idle
+        self.opened = 0
+        self.reused = 0
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = self._connect()
+        self.opened += 1
+        return smtp
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                idle_since, smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - idle_since <= self.max_idle:
+                self.reused += 1
+                return smtp
+            _quit(smtp)
+
+    @contextmanager
+    def connection(self) -> Iterator[_Lease]:
+        with self._slots:
+            lease = _Lease(self, self._checkout())
+            try:
+                yield lease
+            except (smtplib.SMTPServerDisconnected, OSError):
+                lease.discard()
+                raise
+            if not lease.broken:
+                self._idle.put((time.monotonic(), lease.smtp))
+
+    def close(self) -> None:
+        while True:
+            try:
+                _, smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _quit(smtp)
+
+
+class SmtpEmailProvider:
+    """
+    Sends through an SMTP relay; `send_batch` delivers many messages in one
+    session instead of a connect/EHLO/AUTH round trip per message.
+    """
+
+    def __init__(self, host: str, port: int, *, sender: str, username: str = "", password: str = "",
+                 starttls: bool = False, use_ssl: bool = False, timeout: float = 10.0, pool_size: int = 4):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.pool = SmtpConnectionPool(self._connect, pool_size)
+
+    def _connect(self) -> smtplib.SMTP:
+        cls = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = cls(self.host, self.port, timeout=self.timeout)
+        if self.starttls and not self.use_ssl:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send(self, *, to: str, subject: str, html: str, text: str | None = None) -> None:
+        error = self.send_batch([OutboundEmail(to, subject, html, text)])[0]
+        if error is not None:
+            raise error
+
+    def send_batch(self, messages: list[OutboundEmail]) -> list[Exception | None]:
+        """
+        One result per message: None when the server accepted it.
+        A dropped connection is re-opened once per message.
+        """
+        results: list[Exception | None] = []
+        with self.pool.connection() as lease:
+            for message in messages:
+                mime = build_mime(self.sender, message)
+                try:
+                    try:
+                        lease.smtp.send_message(mime)
+                    except (smtplib.SMTPServerDisconnected, ConnectionError):
+                        lease.reconnect()
+                        lease.smtp.send_message(mime)
+                    results.append(None)
+                except OSError as exc:  # SMTPException subclasses OSError
+                    if isinstance(exc, smtplib.SMTPException) and not isinstance(exc, smtplib.SMTPServerDisconnected):
+                        # rejected sender/recipient/data: the session itself is still usable
+                        results.append(exc)
+                        try:
+                            lease.smtp.rset()
+                            continue
+                        except OSError:
+                            pass
+                    # the server is unreachable: the rest of the batch is retried later
+                    lease.discard()
+                    results.extend([exc] * (len(messages) - len(results)))
+                    break
+        return results
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def build_provider() -> EmailProvider:
+    if settings.EMAIL_BACKEND == "smtp":
+        return SmtpEmailProvider(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            sender=settings.EMAIL_FROM,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            starttls=settings.SMTP_STARTTLS,
+            use_ssl=settings.SMTP_SSL,
+            timeout=settings.SMTP_TIMEOUT,
+            pool_size=settings.SMTP_POOL_SIZE,
+        )
+    return ConsoleEmailProvider()
+
+
+provider: EmailProvider = build_provider()
+
+
+def send_batch(target: EmailProvider, messages: list[OutboundEmail]) -> list[Exception | None]:
+    """
+    Deliver through the provider's batch path when it has one.
+    """
+    batch = getattr(target, "send_batch", None)
+    if batch is not None:
+        return batch(messages)
+    results: list[Exception | None] = []
+    for message in messages:
+        try:
+            target.send(to=message.to, subject=message.subject, html=message.html, text=message.text)
+            results.append(None)
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+# ------------------------------------------------------------
+# Templates
+# ------------------------------------------------------------
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    html: str
+    text: str | None
+
+
+@dataclass(frozen=True)
+class _CompiledEmail:
+    subject: "Template"
+    html: "Template"
+    text: "Template | None"
+
+
+class EmailTemplates:
+    """
+    Jinja2 templates under `<directory>/<locale>/`, compiled once by `load()`:
+
+        <name>.subject.txt, <name>.html   required per message and locale
+        <name>.txt                        optional plaintext part
+        fragments/<fragment>.html|.txt    rendered once per locale
+        _*.html                           layouts shared through {% extends %}
+
+    Fragments (header, footer) depend only on `fragment_context`, so they are
+    rendered at load time and passed to every message as `fragments.<name>`
+    instead of being re-rendered per recipient. A locale that lacks a message
+    falls back to `default_locale`.
+    """
+
+    def __init__(self, directory: str | Path, default_locale: str, fragment_context: dict | None = None):
+        self.directory = Path(directory)
+        self.default_locale = default_locale
+        self.fragment_context = fragment_context or {}
+        self._messages: dict[tuple[str, str], _CompiledEmail] = {}
+        self._fragments: dict[str, tuple[dict, dict]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self) -> None:
+        # jinja2 is imported here, at load (app lifespan), not with the module
+        from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+        from markupsafe import Markup
+
+        env = Environment(
+            loader=FileSystemLoader(self.directory),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+            cache_size=-1,
+            keep_trailing_newline=False,
+            undefined=StrictUndefined,
+        )
+        messages = {}
+        fragments = {}
+        for locale_dir in sorted(p for p in self.directory.iterdir() if p.is_dir()):
+            locale = locale_dir.name
+            html_fragments, text_fragments = {}, {}
+            for path in sorted((locale_dir / "fragments").glob("*.*")):
+                rendered = env.get_template(f"{locale}/fragments/{path.name}").render(
+                    locale=locale, **self.fragment_context
+                ).strip()
+                if path.suffix == ".html":
+                    html_fragments[path.stem] = Markup(rendered)
+                else:
+                    text_fragments[path.stem] = rendered
+            fragments[locale] = (html_fragments, text_fragments)
+            for subject in locale_dir.glob("*.subject.txt"):
+                name = subject.name[:-len(".subject.txt")]
+                text = locale_dir / f"{name}.txt"
+                messages[(locale, name)] = _CompiledEmail(
+                    subject=env.get_template(f"{locale}/{subject.name}"),
+                    html=env.get_template(f"{locale}/{name}.html"),
+                    text=env.get_template(f"{locale}/{name}.txt") if text.exists() else None,
+                )
+        with self._lock:
+            self._messages = messages
+            self._fragments = fragments
+            self._loaded = True
+
+    def locales(self) -> list[str]:
+        return sorted(self._fragments)
+
+    def resolve_locale(self, name: str, accept_language: str | None) -> str:
+        """
+        First locale from an Accept-Language style list ("es-MX,es;q=0.9")
+        that has this message, else the default.
+        """
+        for tag in (accept_language or "").split(","):
+            tag = tag.split(";")[0].strip().lower()
+            for candidate in (tag, tag.split("-")[0]):
+                if candidate and (candidate, name) in self._messages:
+                    return candidate
+        return self.default_locale
+
+    def render(self, name: str, locale: str | None = None, /, **context) -> RenderedEmail:
+        if not self._loaded:
+            self.load()
+        locale = self.resolve_locale(name, locale)
+        try:
+            compiled = self._messages[(locale, name)]
+        except KeyError:
+            raise LookupError(f"no email template {name!r} for locale {locale!r}") from None
+        html_fragments, text_fragments = self._fragments[locale]
+        context["locale"] = locale
+        return RenderedEmail(
+            subject=compiled.subject.render(context).strip(),
+            html=compiled.html.render(context, fragments=html_fragments),
+            text=None if compiled.text is None else compiled.text.render(context, fragments=text_fragments),
+        )
+
+
+templates = EmailTemplates(
+    settings.EMAIL_TEMPLATES_DIR or TEMPLATES_DIR,
+    default_locale=settings.EMAIL_DEFAULT_LOCALE,
+    fragment_context={"product_name": settings.EMAIL_PRODUCT_NAME, "support_email": settings.EMAIL_FROM},
+)
+
+
+# ------------------------------------------------------------
+# Outbox
+# ------------------------------------------------------------
+
+def _outbox_row(to: str, subject: str, html: str, text: str | None) -> EmailOutbox:
+    return EmailOutbox(
+        to_address=to,
+        subject=subject,
+        html=html,
+        text=text,
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+
+
+def enqueue_email(db: Session, *, to: str, subject: str, html: str, text: str | None = None,
+                  commit: bool = True) -> EmailOutbox:
+    """
+    Queue a message; it is sent only if the surrounding transaction commits.
+    """
+    row = _outbox_row(to, subject, html, text)
+    db.add(row)
+    on_commit(db, _wake_dispatcher)
+    finish(db, commit)
+    return row
+
+
+async def enqueue_email_async(db: AsyncSession, *, to: str, subject: str, html: str, text: str | None = None,
+                              commit: bool = True) -> EmailOutbox:
+    """
+    Async enqueue_email.
+    """
+    row = _outbox_row(to, subject, html, text)
+    db.add(row)
+    on_commit(db, _wake_dispatcher)
+    await finish_async(db, commit)
+    return row
+
+
+async def enqueue_template_email_async(db: AsyncSession, name: str, /, *, to: str, locale: str | None = None,
+                                      commit: bool = True, **context) -> EmailOutbox:
+    """
+    Render a template message and queue it as multipart text/HTML.
+    """
+    rendered = templates.render(name, locale, **context)
+    return await enqueue_email_async(db, to=to, subject=rendered.subject, html=rendered.html,
+                                     text=rendered.text, commit=commit)
+
+
+async def queue_password_reset_email_async(db: AsyncSession, to_email: str, reset_link: str, *,
+                                           locale: str | None = None, commit: bool = True) -> EmailOutbox:
+    return await enqueue_template_email_async(db, "password_reset", to=to_email, locale=locale,
+                                              commit=commit, reset_link=reset_link)
+
+
+def retry_delay(attempts: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with jitter: base * 2^(attempts-1), capped, scaled by
+    a random factor in [0.5, 1] so failures from one outage spread out.
+    """
+    return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+
+class EmailDispatcher:
+    """
+    `workers` threads, each repeatedly claiming up to `batch_size` due outbox
+    rows and sending them in one provider batch.
+
+    A claim is a conditional UPDATE that stamps a fresh claim_token and
+    pushes next_attempt_at out by the lease, so concurrent workers (in this
+    or another process) never pick the same row, and a row whose worker
+    died becomes due again when the lease runs out. Results are written back
+    only while the claim token still matches.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], target: EmailProvider, *, workers: int,
+                 batch_size: int, poll_interval: float, lease_seconds: float, max_attempts: int,
+                 retry_base: float, retry_max: float):
+        self._session_factory = session_factory
+        self.provider = target
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"email-dispatcher-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                claimed = self.run_once()
+            except Exception:
+                self.errors += 1
+                logger.exception("email dispatch failed")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+
+    def _claim(self, db: Session, now: datetime) -> tuple[str, list[EmailOutbox]]:
+        due = (EmailOutbox.status.in_((PENDING, SENDING))) & (EmailOutbox.next_attempt_at <= now)
+        ids = db.scalars(
+            select(EmailOutbox.id).where(due).order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(self.batch_size)
+        ).all()
+        if not ids:
+            return "", []
+        token = uuid.uuid4().hex
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), due)
+            .values(status=SENDING, claim_token=token, next_attempt_at=now + self.lease,
+                    attempts=EmailOutbox.attempts + 1)
+        )
+        db.commit()
+        rows = db.scalars(select(EmailOutbox).where(EmailOutbox.claim_token == token).order_by(EmailOutbox.id)).all()
+        return token, list(rows)
+
+    def run_once(self) -> int:
+        """
+        Claim and send one batch; returns how many rows were claimed.
+        """
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            token, rows = self._claim(db, now)
+            if not rows:
+                return 0
+            messages = [OutboundEmail(r.to_address, r.subject, r.html, r.text) for r in rows]
+            try:
+                results = send_batch(self.provider, messages)
+            except Exception as exc:
+                # the connection itself failed: every message in the batch is retried
+                results = [exc] * len(rows)
+            self._record(db, token, rows, results)
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record(self, db: Session, token: str, rows: list[EmailOutbox],
+                results: list[Exception | None]) -> None:
+        now = datetime.utcnow()
+        claimed = (EmailOutbox.claim_token == token)
+        sent_ids = [row.id for row, error in zip(rows, results) if error is None]
+        if sent_ids:
+            db.execute(
+                update(EmailOutbox).where(EmailOutbox.id.in_(sent_ids), claimed)
+                .values(status=SENT, sent_at=now, claim_token=None, last_error=None, **_CLEARED_BODY)
+            )
+        retried = failed = 0
+        for row, error in zip(rows, results):
+            if error is None:
+                continue
+            if row.attempts >= self.max_attempts:
+                values = {"status": FAILED, **_CLEARED_BODY}
+                failed += 1
+            else:
+                delay = retry_delay(row.attempts, self.retry_base, self.retry_max)
+                values = {"status": PENDING, "next_attempt_at": now + timedelta(seconds=delay)}
+                retried += 1
+            db.execute(
+                update(EmailOutbox).where(EmailOutbox.id == row.id, claimed)
+                .values(claim_token=None, last_error=repr(error)[:1000], **values)
+            )
+            logger.warning("email %s to %s failed (attempt %d): %r", row.id, row.to_address, row.attempts, error)
+        db.commit()
+        with self._lock:
+            self.batches += 1
+            self.sent += len(sent_ids)
+            self.retried += retried
+            self.failed += failed
+
+    def drain(self) -> int:
+        """
+        Send batches until nothing is due; returns the number of rows claimed.
+        """
+        total = 0
+        while claimed := self.run_once():
+            total += claimed
+        return total
+
+    def stats(self) -> dict:
+        stats = {
+            "workers": self.workers,
+            "batches": self.batches,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+        pool = getattr(self.provider, "pool", None)
+        if isinstance(pool, SmtpConnectionPool):
+            stats["smtp_pool"] = {"size": pool.size, "opened": pool.opened, "reused": pool.reused}
+        return stats
+
+
+def build_dispatcher(session_factory: Callable[[], Session], target: EmailProvider | None = None,
+                     workers: int | None = None) -> EmailDispatcher:
+    return EmailDispatcher(
+        session_factory,
+        target if target is not None else provider,
+        workers=settings.EMAIL_WORKERS if workers is None else workers,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+        poll_interval=settings.EMAIL_POLL_INTERVAL,
+        lease_seconds=settings.EMAIL_LEASE_SECONDS,
+        max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+        retry_base=settings.EMAIL_RETRY_BASE_SECONDS,
+        retry_max=settings.EMAIL_RETRY_MAX_SECONDS,
+    )
+
+
+_dispatcher: EmailDispatcher | None = None
+
+
+def _wake_dispatcher() -> None:
+    if _dispatcher is not None:
+        _dispatcher.wake()
+
+
+def start_email_dispatcher(session_factory: Callable[[], Session] | None = None) -> EmailDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        _dispatcher = build_dispatcher(session_factory)
+        _dispatcher.start()
+    return _dispatcher
+
+
+def stop_email_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
+    close = getattr(provider, "close", None)
+    if close is not None:
+        close()
+
+
+def get_email_dispatcher() -> EmailDispatcher | None:
+    return _dispatcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send queued email from the email_outbox table.")
+    parser.add_argument("--drain", action="store_true", help="send everything due, then exit")
+    parser.add_argument("--workers", type=int, default=max(settings.EMAIL_WORKERS, 1))
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    dispatcher = build_dispatcher(SessionLocal, workers=args.workers)
+    if args.drain:
+        claimed = dispatcher.drain()
+        print(f"{claimed} claimed, {dispatcher.sent} sent, {dispatcher.retried} retrying, {dispatcher.failed} failed")
+        return
+    dispatcher.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        dispatcher.stop()
 
 
+if __name__ == "__main__":
+    main()
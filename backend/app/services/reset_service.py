@@ -1,12 +1,17 @@
 """
 Password reset token issuance and consumption.
 """
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 import secrets
 import hashlib
 from app.db.models import ResetToken, User
-from app.services.user_service import set_password
+from app.services.user_service import set_password, set_password_async
+from app.services.user_cache import CachedUser
+from app.db.transaction import finish, finish_async
+from app.services.token_service import revoke_all_refresh_tokens, revoke_all_refresh_tokens_async
 
 
 RESET_TOKEN_EXPIRE_MINUTES = 30
@@ -16,11 +21,7 @@ def _now_naive() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
-def issue_reset_token(db: Session, user: User) -> str:
-    """
-    Create a single-use password reset token for the given user.
-    Stores only the SHA-256 hash. Returns the plaintext token.
-    """
+def _new_reset_row(user: User | CachedUser) -> tuple[str, ResetToken]:
     token_plain = secrets.token_urlsafe(48)
     token_hash = hashlib.sha256(token_plain.encode()).hexdigest()
     issued = _now_naive()
@@ -33,16 +34,28 @@ def issue_reset_token(db: Session, user: User) -> str:
         created_at=issued,
         expires_at=expires,
     )
+    return token_plain, reset
+
+
+def _is_usable(row: ResetToken | None) -> bool:
+    return row is not None and not row.used and row.expires_at > _now_naive()
+
+
+def issue_reset_token(db: Session, user: User, *, commit: bool = True) -> str:
+    """
+    Create a single-use password reset token for the given user.
+    Stores only the SHA-256 hash. Returns the plaintext token.
+    """
+    token_plain, reset = _new_reset_row(user)
     db.add(reset)
-    db.commit()
-    db.refresh(reset)
+    finish(db, commit)
     return token_plain
 
 
-def consume_reset_token(db: Session, token_plain: str, new_password: str) -> bool:
+def consume_reset_token(db: Session, token_plain: str, new_password: str, *, commit: bool = True) -> bool:
     """
-    Verify the token hash, ensure not expired and not used, set new password, and mark token used.
-    Returns True if successful else False.
+    Verify the token hash, ensure not expired and not used, set new password, mark token used
+    and revoke all of the user's refresh tokens. Returns True if successful else False.
     """
     token_hash = hashlib.sha256(token_plain.encode()).hexdigest()
 
@@ -65,10 +78,41 @@ def consume_reset_token(db: Session, token_plain: str, new_password: str) -> boo
     if not user:
         return False
 
-    # Update password and mark token used
-    set_password(db, user, new_password)
+    # Update password, mark token used and end every session in one transaction
     row.used = True
-    db.commit()
+    revoke_all_refresh_tokens(db, user.id, commit=False)
+    set_password(db, user, new_password, commit=commit)
     return True
 
 
+async def issue_reset_token_async(db: AsyncSession, user: User | CachedUser, *, commit: bool = True) -> str:
+    """
+    Async issue_reset_token.
+    """
+    token_plain, reset = _new_reset_row(user)
+    db.add(reset)
+    await finish_async(db, commit)
+    return token_plain
+
+
+async def consume_reset_token_async(db: AsyncSession, token_plain: str, new_password: str, *, commit: bool = True) -> int | None:
+    """
+    Async consume_reset_token.
+    Returns the id of the user whose password was reset, else None.
+    """
+    token_hash = hashlib.sha256(token_plain.encode()).hexdigest()
+
+    result = await db.execute(select(ResetToken).where(ResetToken.token_hash == token_hash))
+    row = result.scalar_one_or_none()
+    if not _is_usable(row):
+        return None
+
+    user = await db.get(User, row.user_id)
+    if not user:
+        return None
+
+    # Update password, mark token used and end every session
+    row.used = True
+    await revoke_all_refresh_tokens_async(db, user.id, commit=False)
+    await set_password_async(db, user, new_password, commit=commit)
+    return user.id
@@ -0,0 +1,173 @@
+# backend/app/services/revocation.py
+# ------------------------------------------------------------
+# Access-token revocation: DB rows plus an in-process Bloom
+# filter that answers "definitely not revoked" without a query
+# ------------------------------------------------------------
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.bloom import BloomFilter
+from app.core.cache import MISSING, TTLCache
+from app.core.shared_state import LazySharedState, SharedState, is_shared
+from app.db.models import RevokedAccessToken
+from app.db.transaction import finish_async, on_commit
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class RevocationSet:
+    """
+    Bloom filter over the jti of every unexpired revoked access token.
+
+    A jti that is not in the filter was never revoked, so most checks cost a
+    few hash computations. Probable hits are confirmed against the DB, and
+    confirmed false positives are cached until the token expires. Other
+    processes' revocations are pulled in incrementally by `revoked_at` every
+    `sync_seconds`; the filter is rebuilt from scratch once it holds more
+    than its capacity, which also drops expired entries.
+
+    With shared worker state, each revocation also bumps a shared counter;
+    a worker that sees the counter move syncs right away instead of waiting
+    out `sync_seconds`.
+    """
+
+    VERSION_KEY = "revocations:version"
+
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float, overlap_seconds: float = 30.0,
+                 state: SharedState | None = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self._bloom: BloomFilter | None = None
+        self._synced_through: datetime | None = None
+        self._next_sync = 0.0
+        self.state = state
+        self._seen_version: str | None = None
+        self.not_revoked = TTLCache(maxsize=100_000, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        self.definite_negatives = 0
+        self.db_checks = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+
+    def reset(self) -> None:
+        self._bloom = None
+        self.not_revoked.clear()
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        if self.state is not None:
+            self._seen_version = self.state.get(self.VERSION_KEY)
+        now = _utcnow()
+        result = await db.stream_scalars(
+            select(RevokedAccessToken.jti).where(RevokedAccessToken.expires_at > now)
+        )
+        async for jti in result:
+            bloom.add(jti)
+        # Tokens revoked while the scan ran are picked up by the next sync's overlap
+        self._synced_through = now
+        self._bloom = bloom
+        self._next_sync = time.monotonic() + self.sync_seconds
+        self.rebuilds += 1
+
+    async def sync(self, db: AsyncSession, force: bool = False) -> None:
+        """
+        Add revocations committed (by any process) since the last sync.
+        """
+        if self._bloom is None or self._bloom.saturated:
+            await self.rebuild(db)
+            return
+        if self.state is not None:
+            version = self.state.get(self.VERSION_KEY)
+            if version != self._seen_version:
+                self._seen_version = version
+                force = True
+        if not force and time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + self.sync_seconds
+        # Overlap the window: a slow transaction may commit a revoked_at older than our last sync
+        since = self._synced_through - self.overlap
+        rows = await db.execute(
+            select(RevokedAccessToken.jti, RevokedAccessToken.revoked_at).where(RevokedAccessToken.revoked_at >= since)
+        )
+        latest = self._synced_through
+        for jti, revoked_at in rows:
+            self._add(jti)
+            latest = max(latest, revoked_at)
+        self._synced_through = latest
+
+    def _add(self, jti: str) -> None:
+        self._bloom.add(jti)
+        self.not_revoked.delete(jti)
+
+    def record(self, jti: str) -> None:
+        """
+        Reflect a revocation committed by this process without waiting for a sync.
+        """
+        if self._bloom is not None:
+            self._add(jti)
+        if self.state is not None:
+            self.state.incr(self.VERSION_KEY, ttl=self.not_revoked.ttl)
+
+    async def is_revoked(self, db: AsyncSession, jti: str | None) -> bool:
+        if jti is None:
+            return False  # tokens issued before jti existed cannot be revoked individually
+        await self.sync(db)
+        if jti not in self._bloom:
+            self.definite_negatives += 1
+            return False
+        if self.not_revoked.get(jti) is not MISSING:
+            return False
+        self.db_checks += 1
+        revoked = await db.scalar(select(func.count()).where(RevokedAccessToken.jti == jti))
+        if revoked:
+            return True
+        self.false_positives += 1
+        self.not_revoked.set(jti, True)
+        return False
+
+    def stats(self) -> dict:
+        bloom = self._bloom
+        return {
+            "entries": bloom.count if bloom else 0,
+            "capacity": self.capacity,
+            "bits": bloom.size if bloom else 0,
+            "hashes": bloom.hashes if bloom else 0,
+            "definite_negatives": self.definite_negatives,
+            "db_checks": self.db_checks,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+        }
+
+
+revocations = RevocationSet(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    sync_seconds=settings.REVOCATION_SYNC_SECONDS,
+    state=LazySharedState() if is_shared() else None,
+)
+
+
+async def revoke_access_token_async(db: AsyncSession, claims: dict, *, commit: bool = True) -> bool:
+    """
+    Revoke one access token by its jti until its own expiry.
+    Returns False for tokens without a jti or already revoked.
+    """
+    jti = claims.get("jti")
+    if jti is None or await db.get(RevokedAccessToken, jti) is not None:
+        return False
+    db.add(RevokedAccessToken(
+        jti=jti,
+        user_id=int(claims["sub"]) if str(claims.get("sub", "")).isdigit() else None,
+        revoked_at=_utcnow(),
+        expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc).replace(tzinfo=None),
+    ))
+    on_commit(db, lambda: revocations.record(jti))
+    await finish_async(db, commit)
+    return True
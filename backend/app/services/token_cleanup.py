@@ -0,0 +1,217 @@
+# backend/app/services/token_cleanup.py
+# ------------------------------------------------------------
+# Pruning of expired / revoked / used token rows (and sent email)
+# ------------------------------------------------------------
+import argparse
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import EmailOutbox, RefreshToken, ResetToken, RevokedAccessToken
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CleanupReport:
+    deleted: dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    seconds: float = 0.0
+    finished_at: datetime | None = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.deleted.values())
+
+
+def _prunable(now: datetime, retention: timedelta) -> dict:
+    """
+    Per-table predicates for rows no flow can use any more. Revoked and used
+    rows are kept for `retention` so recent reuse stays detectable; refresh
+    tokens count it from when they were rotated out, not from when they were
+    issued, so a long-idle token stolen and rotated today is still caught.
+    """
+    cutoff = now - retention
+    return {
+        RefreshToken: or_(
+            RefreshToken.expires_at <= now,
+            RefreshToken.revoked.is_(True)
+            & (func.coalesce(RefreshToken.revoked_at, RefreshToken.created_at) <= cutoff),
+        ),
+        ResetToken: or_(
+            ResetToken.expires_at <= now,
+            ResetToken.used.is_(True) & (ResetToken.created_at <= cutoff),
+        ),
+        # an expired access token is rejected on exp alone
+        RevokedAccessToken: RevokedAccessToken.expires_at <= now,
+        # delivered mail; failed rows stay for inspection
+        EmailOutbox: (EmailOutbox.status == "sent") & (EmailOutbox.sent_at <= cutoff),
+    }
+
+
+def prune_tokens(
+    session_factory: Callable[[], Session],
+    *,
+    batch_size: int,
+    sleep: float,
+    retention: timedelta,
+    now: datetime | None = None,
+    stop: threading.Event | None = None,
+) -> CleanupReport:
+    """
+    Delete prunable token rows in chunks of at most `batch_size`, committing
+    and pausing `sleep` seconds after each chunk so no transaction holds
+    locks for long. Chunks walk the primary key forward, so a run scans
+    each table once no matter how many chunks it takes.
+    """
+    now = now or datetime.utcnow()
+    report = CleanupReport()
+    started = time.perf_counter()
+    for model, predicate in _prunable(now, retention).items():
+        table = model.__tablename__
+        report.deleted[table] = 0
+        pk = model.__mapper__.primary_key[0]
+        last_id = None
+        while not (stop and stop.is_set()):
+            db = session_factory()
+            try:
+                query = select(pk).where(predicate).order_by(pk).limit(batch_size)
+                if last_id is not None:
+                    query = query.where(pk > last_id)
+                ids = db.scalars(query).all()
+                if not ids:
+                    break
+                db.execute(delete(model).where(pk.in_(ids)))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+            last_id = ids[-1]
+            report.deleted[table] += len(ids)
+            report.batches += 1
+            if len(ids) < batch_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+    report.seconds = time.perf_counter() - started
+    report.finished_at = datetime.utcnow()
+    logger.info("token cleanup removed %s in %d batches (%.2fs)", report.deleted, report.batches, report.seconds)
+    return report
+
+
+def _run_from_settings(session_factory: Callable[[], Session], stop: threading.Event | None = None) -> CleanupReport:
+    return prune_tokens(
+        session_factory,
+        batch_size=settings.TOKEN_CLEANUP_BATCH_SIZE,
+        sleep=settings.TOKEN_CLEANUP_BATCH_SLEEP,
+        retention=timedelta(hours=settings.TOKEN_CLEANUP_RETENTION_HOURS),
+        stop=stop,
+    )
+
+
+class TokenCleanupTask:
+    """
+    Runs prune_tokens every `interval` seconds on a daemon thread.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float):
+        self._session_factory = session_factory
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.last_report: CleanupReport | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-cleanup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_report = _run_from_settings(self._session_factory, self._stop)
+                self.runs += 1
+            except Exception:
+                self.failures += 1
+                logger.exception("token cleanup failed")
+
+    def stats(self) -> dict:
+        report = self.last_report
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": None if report is None else {
+                "deleted": report.deleted,
+                "batches": report.batches,
+                "seconds": report.seconds,
+                "finished_at": report.finished_at.isoformat(),
+            },
+        }
+
+
+_task: TokenCleanupTask | None = None
+
+
+def start_token_cleanup(session_factory: Callable[[], Session] | None = None) -> TokenCleanupTask:
+    global _task
+    if _task is None:
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        _task = TokenCleanupTask(session_factory, interval=settings.TOKEN_CLEANUP_INTERVAL)
+        _task.start()
+    return _task
+
+
+def stop_token_cleanup() -> None:
+    global _task
+    if _task is not None:
+        _task.stop()
+        _task = None
+
+
+def get_token_cleanup() -> TokenCleanupTask | None:
+    return _task
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete expired, revoked and used refresh/reset tokens and sent outbox email.")
+    parser.add_argument("--batch-size", type=int, default=settings.TOKEN_CLEANUP_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=settings.TOKEN_CLEANUP_BATCH_SLEEP, help="pause between batches (s)")
+    parser.add_argument("--retention-hours", type=float, default=settings.TOKEN_CLEANUP_RETENTION_HOURS,
+                        help="keep revoked/used rows this long")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    report = prune_tokens(
+        SessionLocal,
+        batch_size=args.batch_size,
+        sleep=args.sleep,
+        retention=timedelta(hours=args.retention_hours),
+    )
+    for table, count in report.deleted.items():
+        print(f"{table}: {count} rows removed")
+    print(f"{report.total} rows in {report.batches} batches, {report.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
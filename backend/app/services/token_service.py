@@ -2,59 +2,285 @@
 # ------------------------------------------------------------
 # Refresh token DB storage + rotation
 # ------------------------------------------------------------
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 from app.db.models import RefreshToken
-from app.core.jwt import create_refresh_token
+from app.core.jwt import create_refresh_token, parse_refresh_token
+from app.db.transaction import finish, finish_async
 import hashlib
+import hmac
+import uuid
 
 
-def issue_refresh_token(db: Session, user_id: int) -> str:
+class RefreshTokenReuse(Exception):
     """
-    Create and store a new refresh token for a user.
-    Returns the plaintext token (to give to client).
+    A refresh token that was already rotated out (or revoked) was presented
+    again, i.e. someone else may hold a copy. Its whole family has been revoked.
     """
-    token_plain, token_hash, issued_at, expires_at = create_refresh_token()
+
+    def __init__(self, user_id: int, family_id: str, revoked: int):
+        super().__init__(f"refresh token reuse in family {family_id}")
+        self.user_id = user_id
+        self.family_id = family_id
+        self.revoked = revoked
+
+
+def _new_refresh_row(user_id: int, family_id: str | None = None, generation: int = 0) -> tuple[str, RefreshToken]:
+    token_plain, selector, verifier_hash, issued_at, expires_at = create_refresh_token()
 
     refresh = RefreshToken(
         user_id=user_id,
-        token_hash=token_hash,
+        selector=selector,
+        verifier_hash=verifier_hash,
         issued_at=issued_at.replace(tzinfo=None),
         expires_at=expires_at.replace(tzinfo=None),
         revoked=False,
+        family_id=family_id or uuid.uuid4().hex,  # a login starts a new family
+        generation=generation,
+    )
+    return token_plain, refresh
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _claim_statement(token_id: int):
+    # Conditional revoke: of two concurrent rotations of one token only one matches
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.id == token_id, RefreshToken.revoked.is_(False))
+        .values(revoked=True, revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _revoke_family_statement(family_id: str):
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked.is_(False))
+        .values(revoked=True, revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
     )
+
+
+def is_active_refresh_token(token_row: RefreshToken | None) -> bool:
+    """
+    True for a known, unrevoked, unexpired refresh token row.
+    """
+    if not token_row or token_row.revoked:
+        return False
+    # Normalize aware/naive comparison (DB likely stores naive)
+    now_naive = datetime.now(timezone.utc).replace(tzinfo=None)
+    return token_row.expires_at > now_naive
+
+
+def issue_refresh_token(db: Session, user_id: int, *, commit: bool = True) -> str:
+    """
+    Create and store a new refresh token for a user.
+    Returns the plaintext token (to give to client).
+    """
+    token_plain, refresh = _new_refresh_row(user_id)
     db.add(refresh)
-    db.commit()
-    db.refresh(refresh)
+    finish(db, commit)
     return token_plain
 
 
-def verify_and_rotate_refresh_token(db: Session, user_id: int, token_plain: str) -> str | None:
+def _hash_token(token_plain: str) -> str:
+    return hashlib.sha256(token_plain.encode()).hexdigest()
+
+
+def _lookup(token_plain: str):
     """
-    Verify the provided refresh token for the given user, revoke it, and issue a new one.
-    Returns new plaintext refresh token if valid, else None.
+    (query, verifier hash to match) for a presented token, or (None, None)
+    if it is malformed. Legacy tokens have no "." and are found by the hash
+    of the whole token, so there is nothing left to compare.
     """
-    provided_hash = hashlib.sha256(token_plain.encode()).hexdigest()
+    if "." not in token_plain:
+        return select(RefreshToken).where(RefreshToken.token_hash == _hash_token(token_plain)), None
+    parsed = parse_refresh_token(token_plain)
+    if parsed is None:
+        return None, None
+    selector, verifier_hash = parsed
+    return select(RefreshToken).where(RefreshToken.selector == selector), verifier_hash
 
-    token_row = (
-        db.query(RefreshToken)
-        .filter(
-            RefreshToken.user_id == user_id,
-            RefreshToken.token_hash == provided_hash,
-            RefreshToken.revoked == False,
-        )
-        .order_by(RefreshToken.created_at.desc())
-        .first()
-    )
-    if not token_row:
+
+def _verified(token_row: RefreshToken | None, verifier_hash: bytes | None) -> RefreshToken | None:
+    if token_row is None or verifier_hash is None:
+        return token_row
+    if token_row.verifier_hash is None or not hmac.compare_digest(token_row.verifier_hash, verifier_hash):
+        return None  # right selector, wrong secret: treat as unknown, never as reuse
+    return token_row
+
+
+def get_refresh_token(db: Session, token_plain: str) -> RefreshToken | None:
+    """
+    Resolve a refresh token row: point lookup on the selector index, then a
+    constant-time check of the verifier (legacy tokens: by token_hash).
+    """
+    query, verifier_hash = _lookup(token_plain)
+    if query is None:
         return None
+    return _verified(db.scalars(query).first(), verifier_hash)
 
-    # Normalize aware/naive comparison (DB likely stores naive)
+
+def verify_and_rotate_refresh_token(db: Session, token_plain: str, *, commit: bool = True) -> tuple[int, str] | None:
+    """
+    Verify the provided refresh token, revoke it, and issue its successor in the same family.
+    Returns (user_id, new plaintext refresh token) if valid, None if unknown or expired.
+    Raises RefreshTokenReuse (after revoking the family) if the token was already revoked.
+    """
+    token_row = get_refresh_token(db, token_plain)
+    if token_row is None:
+        return None
+    if token_row.revoked or db.execute(_claim_statement(token_row.id)).rowcount != 1:
+        _revoke_reused_family(db, token_row, commit)
+        return None
+    if not is_active_refresh_token(token_row):
+        finish(db, commit)  # expired: keep it revoked
+        return None
+
+    new_plain, new_row = _new_refresh_row(token_row.user_id, token_row.family_id, token_row.generation + 1)
+    db.add(new_row)
+    finish(db, commit)
+    return token_row.user_id, new_plain
+
+
+def _revoke_reused_family(db: Session, token_row: RefreshToken, commit: bool) -> None:
+    if token_row.family_id is None:
+        return  # pre-family token: nothing links it to its successors
+    revoked = db.execute(_revoke_family_statement(token_row.family_id)).rowcount
+    finish(db, commit)
+    raise RefreshTokenReuse(token_row.user_id, token_row.family_id, revoked)
+
+
+def revoke_refresh_token(db: Session, token_plain: str, *, commit: bool = True) -> int | None:
+    """
+    Revoke the given refresh token.
+    Returns the owning user_id, or None if the token is unknown or already revoked.
+    """
+    token_row = get_refresh_token(db, token_plain)
+    if not token_row or token_row.revoked:
+        return None
+
+    token_row.revoked = True
+    token_row.revoked_at = _utcnow()
+    finish(db, commit)
+    return token_row.user_id
+
+
+def _revoke_all_statement(user_id: int):
+    # One set-based UPDATE on the (user_id, revoked, expires_at) index; no rows are loaded
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked.is_(False))
+        .values(revoked=True, revoked_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_all_refresh_tokens(db: Session, user_id: int, *, commit: bool = True) -> int:
+    """
+    Revoke every unrevoked refresh token of a user (log out everywhere).
+    Returns the number of tokens revoked.
+    """
+    result = db.execute(_revoke_all_statement(user_id))
+    finish(db, commit)
+    return result.rowcount
+
+
+def _active_sessions_query(user_id: int):
     now_naive = datetime.now(timezone.utc).replace(tzinfo=None)
-    if token_row.expires_at <= now_naive:
+    return (
+        select(RefreshToken.id, RefreshToken.issued_at, RefreshToken.expires_at)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked.is_(False), RefreshToken.expires_at > now_naive)
+        .order_by(RefreshToken.issued_at.desc(), RefreshToken.id.desc())
+    )
+
+
+def list_active_sessions(db: Session, user_id: int) -> list:
+    """
+    (id, issued_at, expires_at) of each live refresh token, newest first.
+    """
+    return db.execute(_active_sessions_query(user_id)).all()
+
+
+async def issue_refresh_token_async(db: AsyncSession, user_id: int, *, commit: bool = True) -> str:
+    """
+    Async issue_refresh_token.
+    """
+    token_plain, refresh = _new_refresh_row(user_id)
+    db.add(refresh)
+    await finish_async(db, commit)
+    return token_plain
+
+
+async def get_refresh_token_async(db: AsyncSession, token_plain: str) -> RefreshToken | None:
+    """
+    Async get_refresh_token.
+    """
+    query, verifier_hash = _lookup(token_plain)
+    if query is None:
+        return None
+    return _verified((await db.scalars(query)).first(), verifier_hash)
+
+
+async def verify_and_rotate_refresh_token_async(db: AsyncSession, token_plain: str, *, commit: bool = True) -> tuple[int, str] | None:
+    """
+    Async verify_and_rotate_refresh_token.
+    """
+    token_row = await get_refresh_token_async(db, token_plain)
+    if token_row is None:
+        return None
+    if token_row.revoked or (await db.execute(_claim_statement(token_row.id))).rowcount != 1:
+        await _revoke_reused_family_async(db, token_row, commit)
+        return None
+    if not is_active_refresh_token(token_row):
+        await finish_async(db, commit)
+        return None
+
+    new_plain, new_row = _new_refresh_row(token_row.user_id, token_row.family_id, token_row.generation + 1)
+    db.add(new_row)
+    await finish_async(db, commit)
+    return token_row.user_id, new_plain
+
+
+async def _revoke_reused_family_async(db: AsyncSession, token_row: RefreshToken, commit: bool) -> None:
+    if token_row.family_id is None:
+        return
+    revoked = (await db.execute(_revoke_family_statement(token_row.family_id))).rowcount
+    await finish_async(db, commit)
+    raise RefreshTokenReuse(token_row.user_id, token_row.family_id, revoked)
+
+
+async def revoke_refresh_token_async(db: AsyncSession, token_plain: str, *, commit: bool = True) -> int | None:
+    """
+    Async revoke_refresh_token.
+    """
+    token_row = await get_refresh_token_async(db, token_plain)
+    if not token_row or token_row.revoked:
         return None
 
-    # Revoke old and issue new
     token_row.revoked = True
-    db.commit()
-    return issue_refresh_token(db, user_id)
+    token_row.revoked_at = _utcnow()
+    await finish_async(db, commit)
+    return token_row.user_id
+
+
+async def revoke_all_refresh_tokens_async(db: AsyncSession, user_id: int, *, commit: bool = True) -> int:
+    """
+    Async revoke_all_refresh_tokens.
+    """
+    result = await db.execute(_revoke_all_statement(user_id))
+    await finish_async(db, commit)
+    return result.rowcount
+
+
+async def list_active_sessions_async(db: AsyncSession, user_id: int) -> list:
+    """
+    Async list_active_sessions.
+    """
+    result = await db.execute(_active_sessions_query(user_id))
+    return result.all()
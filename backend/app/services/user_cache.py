@@ -0,0 +1,159 @@
+# backend/app/services/user_cache.py
+# ------------------------------------------------------------
+# Email -> user lookup cache (positive and negative entries)
+# ------------------------------------------------------------
+import json
+from dataclasses import asdict, dataclass
+from typing import Protocol
+
+from app.config import settings
+from app.core.cache import MISSING, TTLCache
+from app.core.shared_state import LazySharedState, is_shared
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    The columns the auth flows read from a user, detached from any session.
+    No password hash: the cache may be shared storage outside the database,
+    so login reads the hash from the users row (get_password_hash).
+    """
+    id: int
+    email: str
+    full_name: str | None
+    is_active: bool
+
+
+class CacheBackend(Protocol):
+    """
+    String key/value store with per-key TTL. Redis-compatible servers can
+    implement this directly (see RedisCacheBackend).
+    """
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class InMemoryCacheBackend:
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    def get(self, key: str) -> str | None:
+        value = self._cache.get(key)
+        return None if value is MISSING else value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions + self._cache.expirations
+
+
+class RedisCacheBackend:
+    """
+    Adapter for any client exposing the redis-py get/set(ex=)/delete API.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, key: str) -> str | None:
+        value = self._client.get(key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(key, value, ex=max(int(ttl), 1))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+
+_NEGATIVE = "null"
+
+
+class UserLookupCache:
+    """
+    Caches get-user-by-email results, including "no such user", so repeated
+    emails (credential stuffing, retry storms) stop reaching the database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, negative_ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(email: str) -> str:
+        return f"user:email:{email.strip().lower()}"
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, email: str):
+        """
+        Return a CachedUser, None for a cached negative lookup, or MISSING.
+        """
+        if not self.enabled:
+            return MISSING
+        raw = self.backend.get(self._key(email))
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        if raw == _NEGATIVE:
+            self.negative_hits += 1
+            return None
+        self.hits += 1
+        data = json.loads(raw)
+        data.pop("hashed_password", None)  # entry written before hashes left the cache
+        return CachedUser(**data)
+
+    def set(self, email: str, user: CachedUser | None) -> None:
+        if not self.enabled:
+            return
+        if user is None:
+            if self.negative_ttl > 0:
+                self.backend.set(self._key(email), _NEGATIVE, self.negative_ttl)
+            return
+        self.backend.set(self._key(email), json.dumps(asdict(user)), self.ttl)
+
+    def invalidate(self, email: str) -> None:
+        self.invalidations += 1
+        self.backend.delete(self._key(email))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": getattr(self.backend, "evictions", None),
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+
+def _build_backend() -> CacheBackend:
+    if settings.USER_CACHE_BACKEND == "redis":
+        import redis  # optional dependency, only needed for this backend
+
+        return RedisCacheBackend(redis.Redis.from_url(settings.REDIS_URL))
+    if is_shared():
+        # one cache for all workers, so an invalidation in one is seen by all
+        return LazySharedState()
+    return InMemoryCacheBackend(maxsize=settings.USER_CACHE_SIZE)
+
+
+user_cache = UserLookupCache(_build_backend(), ttl=settings.USER_CACHE_TTL, negative_ttl=settings.USER_CACHE_NEGATIVE_TTL)
@@ -0,0 +1,347 @@
+# backend/app/services/user_import.py
+# ------------------------------------------------------------
+# Streaming bulk user import (CSV / JSONL) with batched inserts
+# ------------------------------------------------------------
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TextIO
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.hash_pool import default_workers
+from app.core.security import hash_password_sync
+from app.db.models import User
+from app.services.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
+
+# Hashes accepted verbatim: Argon2 (any variant) and bcrypt
+_PREHASHED = re.compile(r"^\$(argon2(id|i|d)\$|2[aby]\$\d\d\$)")
+
+# Per-row errors kept in ImportProgress.errors; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class ImportRecord:
+    line: int
+    email: str
+    password: str | None = None
+    hashed_password: str | None = None
+    full_name: str | None = None
+    error: str | None = None  # set when the line could not be parsed
+
+
+@dataclass
+class ImportProgress:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    hashed: int = 0
+    skipped_resumed: int = 0
+    last_line: int = 0
+    seconds: float = 0.0
+    done: bool = False
+    error: str | None = None
+    errors: list[dict] = field(default_factory=list)  # {"line", "error"} per rejected row
+
+    @property
+    def rate(self) -> float:
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[ImportRecord]:
+    """
+    Yield records one at a time from a CSV (with header) or JSONL stream.
+    Each record carries its 1-based data line number for checkpointing.
+    A JSONL line that is not a JSON object yields a record with `error` set;
+    blank lines yield nothing but still count towards the line numbers.
+    """
+    if fmt == "csv":
+        rows: Iterable[tuple[int, dict | str]] = enumerate(csv.DictReader(stream), start=1)
+    elif fmt == "jsonl":
+        rows = ((line, _parse_json_line(text)) for line, text in enumerate(stream, start=1) if text.strip())
+    else:
+        raise ValueError(f"unsupported import format: {fmt}")
+    for line, row in rows:
+        if isinstance(row, str):
+            yield ImportRecord(line=line, email="", error=row)
+            continue
+        yield ImportRecord(
+            line=line,
+            email=(_text(row.get("email")) or "").strip().lower(),
+            password=_text(row.get("password")),
+            hashed_password=_text(row.get("hashed_password")),
+            full_name=_text(row.get("full_name")),
+        )
+
+
+def _text(value) -> str | None:
+    # JSON may carry numbers where strings are expected
+    return None if value in (None, "") else str(value)
+
+
+def _parse_json_line(line: str) -> dict | str:
+    """
+    The line's object, or an error message for the per-row report.
+    """
+    try:
+        row = json.loads(line)
+    except ValueError as exc:
+        return f"invalid JSON: {exc}"
+    return row if isinstance(row, dict) else "not a JSON object"
+
+
+def read_checkpoint(path: Path | None) -> int:
+    if path is None or not path.exists():
+        return 0
+    return int(path.read_text().strip() or 0)
+
+
+def write_checkpoint(path: Path | None, line: int) -> None:
+    if path is None:
+        return
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(str(line))
+    os.replace(tmp, path)
+
+
+class UserImporter:
+    """
+    Streams records into `users` in batches of `batch_size`.
+
+    Emails are deduplicated against an in-memory set seeded with every email
+    already in the table. Pre-hashed Argon2/bcrypt values are stored as-is;
+    plaintext passwords of a batch are hashed together across a process pool.
+    After each committed batch the last input line is written to the
+    checkpoint file, so a rerun with the same checkpoint resumes there.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        batch_size: int,
+        hash_workers: int,
+        checkpoint: Path | None = None,
+        on_progress: Callable[[ImportProgress], None] | None = None,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.hash_workers = hash_workers
+        self.checkpoint = checkpoint
+        self.on_progress = on_progress
+        self.progress = ImportProgress()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _load_existing(self) -> set[str]:
+        with self._session_factory() as db:
+            return set(db.scalars(select(User.email).execution_options(yield_per=10_000)))
+
+    def _hash_all(self, passwords: list[str]) -> list[str]:
+        if self.hash_workers <= 0 or len(passwords) < 2:
+            return [hash_password_sync(p) for p in passwords]
+        if self._executor is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.hash_workers, mp_context=ctx)
+        chunksize = max(len(passwords) // (self.hash_workers * 4), 1)
+        return list(self._executor.map(hash_password_sync, passwords, chunksize=chunksize))
+
+    def _flush(self, batch: list[ImportRecord]) -> None:
+        plain = [r for r in batch if r.hashed_password is None]
+        for record, hashed in zip(plain, self._hash_all([r.password for r in plain])):
+            record.hashed_password = hashed
+        self.progress.hashed += len(plain)
+
+        rows = [
+            {"email": r.email, "hashed_password": r.hashed_password, "full_name": r.full_name, "is_active": True}
+            for r in batch
+        ]
+        with self._session_factory() as db:
+            db.execute(insert(User), rows)   # one executemany / multi-VALUES per batch
+            db.commit()
+        for record in batch:
+            user_cache.invalidate(record.email)   # drop any cached "no such user"
+        self.progress.inserted += len(batch)
+
+    def _reject(self, line: int, error: str) -> None:
+        self.progress.invalid += 1
+        if len(self.progress.errors) < MAX_REPORTED_ERRORS:
+            self.progress.errors.append({"line": line, "error": error})
+
+    def _checkpoint(self, line: int) -> None:
+        self.progress.last_line = line
+        write_checkpoint(self.checkpoint, line)
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
+
+    def run(self, records: Iterable[ImportRecord]) -> ImportProgress:
+        started = time.perf_counter()
+        resume_after = read_checkpoint(self.checkpoint)
+        seen = self._load_existing()
+        batch: list[ImportRecord] = []
+        line = resume_after
+        try:
+            for record in records:
+                self.progress.read += 1
+                if record.line <= resume_after:
+                    self.progress.skipped_resumed += 1
+                    continue
+                line = record.line
+                error = record.error
+                if error is None and ("@" not in record.email or not (record.password or record.hashed_password)):
+                    error = "email and password or hashed_password required"
+                if error is None and record.hashed_password is not None and not _PREHASHED.match(record.hashed_password):
+                    error = "hashed_password is not an Argon2 or bcrypt hash"
+                if error is not None:
+                    self._reject(record.line, error)
+                    continue
+                if record.email in seen:
+                    self.progress.duplicates += 1
+                    continue
+                seen.add(record.email)
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+                    self.progress.seconds = time.perf_counter() - started
+                    self._checkpoint(line)
+            if batch:
+                self._flush(batch)
+            self.progress.seconds = time.perf_counter() - started
+            self._checkpoint(line)
+            self.progress.done = True
+            return self.progress
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def build_importer(session_factory: Callable[[], Session], **kwargs) -> UserImporter:
+    workers = settings.USER_IMPORT_HASH_WORKERS
+    return UserImporter(
+        session_factory,
+        batch_size=settings.USER_IMPORT_BATCH_SIZE,
+        hash_workers=default_workers() if workers is None else workers,
+        **kwargs,
+    )
+
+
+# Admin-endpoint imports run on a thread; progress is kept here by job id. The
+# upload and its checkpoint stay in USER_IMPORT_DIR until the job finishes, so
+# a failed job (or one cut off by a restart) can be resumed.
+import_jobs: dict[str, ImportProgress] = {}
+
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class ImportJobConflict(Exception):
+    """The job is still running."""
+
+
+def _job_files(job_id: str) -> tuple[Path, Path] | None:
+    """
+    (upload, checkpoint) of a job with files on disk, else None.
+    """
+    if not _JOB_ID.fullmatch(job_id):
+        return None
+    for upload in Path(settings.USER_IMPORT_DIR).glob(f"{job_id}.*"):
+        if upload.suffix in (".csv", ".jsonl"):
+            return upload, upload.with_suffix(".checkpoint")
+    return None
+
+
+def _run_job(session_factory: Callable[[], Session], job_id: str, upload: Path, checkpoint: Path) -> None:
+    importer = build_importer(session_factory, checkpoint=checkpoint)
+    import_jobs[job_id] = importer.progress
+
+    def _run():
+        try:
+            with open(upload, newline="", encoding="utf-8") as fh:
+                importer.run(read_records(fh, upload.suffix[1:]))
+        except Exception as exc:
+            importer.progress.error = str(exc)
+            logger.exception("user import %s failed at line %d; resumable", job_id, importer.progress.last_line)
+        else:
+            upload.unlink(missing_ok=True)
+            checkpoint.unlink(missing_ok=True)
+
+    threading.Thread(target=_run, name=f"user-import-{job_id[:8]}", daemon=True).start()
+
+
+def start_import_job(session_factory: Callable[[], Session], path: Path, fmt: str) -> str:
+    """
+    Import an uploaded file in the background and return a job id for polling.
+    The file is moved into USER_IMPORT_DIR.
+    """
+    job_id = uuid.uuid4().hex
+    directory = Path(settings.USER_IMPORT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    upload = directory / f"{job_id}.{fmt}"
+    shutil.move(path, upload)
+    _run_job(session_factory, job_id, upload, upload.with_suffix(".checkpoint"))
+    return job_id
+
+
+def resume_import_job(session_factory: Callable[[], Session], job_id: str) -> None:
+    """
+    Restart a failed job after its last committed batch.
+    Raises LookupError if the job has no files left, ImportJobConflict if it is running.
+    """
+    files = _job_files(job_id)
+    if files is None:
+        raise LookupError(job_id)
+    progress = import_jobs.get(job_id)
+    if progress is not None and not progress.done and progress.error is None:
+        raise ImportJobConflict(job_id)
+    _run_job(session_factory, job_id, *files)
+
+
+def _print_progress(progress: ImportProgress) -> None:
+    print(f"line {progress.last_line}: {progress.inserted} inserted, {progress.duplicates} duplicates, "
+          f"{progress.invalid} invalid ({progress.rate:.0f} users/s)", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import users from CSV or JSONL.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="default: from the file suffix")
+    parser.add_argument("--batch-size", type=int, default=settings.USER_IMPORT_BATCH_SIZE)
+    parser.add_argument("--hash-workers", type=int, default=settings.USER_IMPORT_HASH_WORKERS)
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="resume file (default: <path>.checkpoint); delete it to start over")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    fmt = args.format or ("jsonl" if args.path.suffix in (".jsonl", ".ndjson") else "csv")
+    importer = UserImporter(
+        SessionLocal,
+        batch_size=args.batch_size,
+        hash_workers=default_workers() if args.hash_workers is None else args.hash_workers,
+        checkpoint=args.checkpoint or args.path.with_name(args.path.name + ".checkpoint"),
+        on_progress=_print_progress,
+    )
+    with open(args.path, newline="", encoding="utf-8") as fh:
+        progress = importer.run(read_records(fh, fmt))
+    print(json.dumps({**asdict(progress), "rate": progress.rate}))
+
+
+if __name__ == "__main__":
+    main()
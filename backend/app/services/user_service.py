@@ -3,15 +3,46 @@
 # User-related DB helper functions
 # ------------------------------------------------------------
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import models
-from app.core.security import hash_password, verify_password
+from app.core.cache import MISSING
+from app.core.security import hash_password, hash_password_async, verify_password
+from app.services.auth_cache import invalidate_user_projection
+from app.services.user_cache import CachedUser, user_cache
+from app.db.transaction import finish, finish_async, on_commit
 
 
-def create_user(db: Session, email: str, password: str, full_name: str = None) -> models.User:
+def _snapshot(user: models.User | None) -> CachedUser | None:
+    if user is None:
+        return None
+    return CachedUser(
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=bool(user.is_active),
+    )
+
+
+def invalidate_user_caches(email: str, user_id: int) -> None:
+    """
+    Drop every cached view of a user after a write (email lookup + token projection).
+    """
+    user_cache.invalidate(email)
+    invalidate_user_projection(user_id)
+
+
+def _invalidate_on_commit(db: Session | AsyncSession, user: models.User) -> None:
+    email, user_id = user.email, user.id
+    on_commit(db, lambda: invalidate_user_caches(email, user_id))
+
+
+def create_user(db: Session, email: str, password: str, full_name: str = None, *, commit: bool = True) -> models.User:
     """
     Create and store a new user in the database.
     Password is securely hashed.
+    With commit=False the row is only flushed and the caller commits.
     """
     normalized_email = email.strip().lower()
     user = models.User(
@@ -20,8 +51,8 @@ def create_user(db: Session, email: str, password: str, full_name: str = None) -
         full_name=full_name,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    on_commit(db, lambda: user_cache.invalidate(normalized_email))  # drop a cached "no such user"
+    finish(db, commit)
     return user
 
 
@@ -33,17 +64,128 @@ def get_user_by_email(db: Session, email: str) -> models.User | None:
     return db.query(models.User).filter(models.User.email == normalized_email).first()
 
 
-def set_password(db: Session, user: models.User, new_password: str) -> models.User:
+def lookup_user_by_email(db: Session, email: str) -> CachedUser | None:
+    """
+    Cached read-only user lookup for the auth flows (negative results included).
+    """
+    cached = user_cache.get(email)
+    if cached is not MISSING:
+        return cached
+    user = _snapshot(get_user_by_email(db, email))
+    user_cache.set(email, user)
+    return user
+
+
+def get_password_hash(db: Session, user_id: int) -> str | None:
+    """
+    The stored password hash of a user, read from the database (never cached).
+    """
+    return db.scalar(select(models.User.hashed_password).where(models.User.id == user_id))
+
+
+def set_password(db: Session, user: models.User, new_password: str, *, commit: bool = True) -> models.User:
     """
     Update a user's password (re-hash).
     """
     user.hashed_password = hash_password(new_password)
-    db.commit()
-    db.refresh(user)
+    _invalidate_on_commit(db, user)
+    finish(db, commit)
+    return user
+
+
+def deactivate_user(db: Session, user: models.User, *, commit: bool = True) -> models.User:
+    """
+    Mark a user inactive so check_lockout rejects further logins.
+    """
+    user.is_active = False
+    _invalidate_on_commit(db, user)
+    finish(db, commit)
     return user
 
 
-def check_lockout(user: models.User) -> bool:
+async def create_user_async(db: AsyncSession, email: str, password: str, full_name: str = None, *, commit: bool = True) -> models.User:
+    """
+    Async create_user; hashing runs off the event loop.
+    """
+    normalized_email = email.strip().lower()
+    user = models.User(
+        email=normalized_email,
+        hashed_password=await hash_password_async(password),
+        full_name=full_name,
+    )
+    db.add(user)
+    on_commit(db, lambda: user_cache.invalidate(normalized_email))  # drop a cached "no such user"
+    await finish_async(db, commit)
+    return user
+
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> models.User | None:
+    """
+    Async get_user_by_email.
+    """
+    normalized_email = email.strip().lower()
+    result = await db.execute(select(models.User).where(models.User.email == normalized_email).limit(1))
+    return result.scalar_one_or_none()
+
+
+async def lookup_user_by_email_async(db: AsyncSession, email: str) -> CachedUser | None:
+    """
+    Async lookup_user_by_email.
+    """
+    cached = user_cache.get(email)
+    if cached is not MISSING:
+        return cached
+    user = _snapshot(await get_user_by_email_async(db, email))
+    user_cache.set(email, user)
+    return user
+
+
+async def get_password_hash_async(db: AsyncSession, user_id: int) -> str | None:
+    """
+    Async get_password_hash.
+    """
+    return await db.scalar(select(models.User.hashed_password).where(models.User.id == user_id))
+
+
+async def set_password_async(db: AsyncSession, user: models.User, new_password: str, *, commit: bool = True) -> models.User:
+    """
+    Async set_password.
+    """
+    user.hashed_password = await hash_password_async(new_password)
+    _invalidate_on_commit(db, user)
+    await finish_async(db, commit)
+    return user
+
+
+async def deactivate_user_async(db: AsyncSession, user: models.User, *, commit: bool = True) -> models.User:
+    """
+    Async deactivate_user.
+    """
+    user.is_active = False
+    _invalidate_on_commit(db, user)
+    await finish_async(db, commit)
+    return user
+
+
+async def upgrade_password_hash_async(db: AsyncSession, user: CachedUser, verified_hash: str, password: str) -> bool:
+    """
+    Re-hash a just-verified password with the current scheme and cost.
+    The UPDATE only applies if the stored hash is still `verified_hash`,
+    so a concurrent password change is never overwritten.
+    """
+    new_hash = await hash_password_async(password)
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user.id, models.User.hashed_password == verified_hash)
+        .values(hashed_password=new_hash)
+    )
+    await db.commit()
+    if result.rowcount:
+        invalidate_user_caches(user.email, user.id)
+    return bool(result.rowcount)
+
+
+def check_lockout(user: models.User | CachedUser) -> bool:
     """
     Check if a user is locked out (inactive).
     Returns True if locked, False if active.
@@ -0,0 +1,78 @@
+# backend/app/tests/test_audit_api.py
+# ------------------------------------------------------------
+# Tests for the keyset-paginated /audit endpoints
+# ------------------------------------------------------------
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from app.config import settings
+from app.db.models import AuditLog
+from app.tests.test_auth_api import _register_and_login, api  # noqa: F401  (fixture)
+
+
+def _seed(tmp_path, count):
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    base = datetime(2026, 3, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(AuditLog), [
+            {
+                "user_id": None,
+                "action": "login" if i % 2 else "refresh",
+                "ip_address": "10.0.0.%d" % (i % 3),
+                "success": i % 5 != 0,
+                # pairs of rows share a timestamp so ties are broken by id
+                "created_at": base + timedelta(seconds=i // 2),
+            }
+            for i in range(count)
+        ])
+    engine.dispose()
+
+
+def _admin_headers(api, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["Admin@Example.com"])
+    tokens = _register_and_login(api, email="admin@example.com")
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_audit_requires_admin(api, monkeypatch):
+    tokens = _register_and_login(api, email="user@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    assert api.get("/audit/events").status_code == 401
+    assert api.get("/audit/events", headers=headers).status_code == 403
+
+
+def test_keyset_pages_cover_every_event_once(api, monkeypatch, tmp_path):
+    headers = _admin_headers(api, monkeypatch)
+    _seed(tmp_path, 25)
+
+    seen, cursor = [], None
+    while True:
+        params = {"action": "login", "limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = api.get("/audit/events", params=params, headers=headers).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    # 12 seeded logins plus the admin's own login event, newest first
+    assert len(seen) == 13 == len({e["id"] for e in seen})
+    keys = [(e["created_at"], e["id"]) for e in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert api.get("/audit/events", params={"cursor": "bogus"}, headers=headers).status_code == 400
+
+
+def test_ndjson_export_streams_filtered_events(api, monkeypatch, tmp_path):
+    headers = _admin_headers(api, monkeypatch)
+    monkeypatch.setattr(settings, "AUDIT_EXPORT_BATCH_SIZE", 3)
+    _seed(tmp_path, 30)
+
+    resp = api.get("/audit/events/export", params={"ip": "10.0.0.1", "success": False}, headers=headers)
+
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(events) == len([i for i in range(30) if i % 3 == 1 and i % 5 == 0])
+    assert all(e["ip_address"] == "10.0.0.1" and not e["success"] for e in events)
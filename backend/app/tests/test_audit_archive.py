@@ -0,0 +1,49 @@
+# backend/app/tests/test_audit_archive.py
+# ------------------------------------------------------------
+# Tests for audit log archival and the archive reader
+# ------------------------------------------------------------
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import AuditLog, Base
+from app.services.audit_archive import archive_audit_logs, iter_archived, partition_path
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_archive_moves_old_rows_and_reader_streams_them(session_factory, tmp_path):
+    now = datetime(2026, 5, 1, 12)
+    archive_dir = tmp_path / "archive"
+    with session_factory() as db:
+        for i in range(7):
+            db.add(AuditLog(user_id=i % 2, action="login" if i % 3 else "logout",
+                            created_at=now - timedelta(days=100 - i, hours=i)))
+        db.add(AuditLog(user_id=1, action="login", created_at=now - timedelta(days=1)))
+        db.commit()
+
+    report = archive_audit_logs(session_factory, archive_dir, older_than=timedelta(days=90),
+                                batch_size=3, now=now)
+    # a second run appends nothing and finds nothing
+    assert archive_audit_logs(session_factory, archive_dir, older_than=timedelta(days=90),
+                              batch_size=3, now=now).archived == 0
+
+    assert (report.archived, report.batches, len(report.partitions)) == (7, 3, 7)
+    with session_factory() as db:
+        assert db.scalars(select(AuditLog.created_at)).all() == [now - timedelta(days=1)]
+
+    archived = list(iter_archived(archive_dir))
+    assert [r["id"] for r in archived] == list(range(1, 8))
+    since = now - timedelta(days=97)
+    recent_logins = list(iter_archived(archive_dir, since=since, user_id=1, action="login"))
+    assert [r["id"] for r in recent_logins] == [6]
+    assert partition_path(archive_dir, (now - timedelta(days=100)).date()).exists()
@@ -0,0 +1,71 @@
+# backend/app/tests/test_audit_writer.py
+# ------------------------------------------------------------
+# Tests for the batched background audit writer
+# ------------------------------------------------------------
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, AuditLog
+from app.services import audit_services
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        audit_services.stop_audit_writer()
+        engine.dispose()
+
+
+def test_sync_mode_commits_immediately(session_factory):
+    db = session_factory()
+    audit_services.log_action(db, None, "login", success=False, details="user not found", ip="127.0.0.1")
+
+    assert db.query(AuditLog).filter_by(action="login").count() == 1
+    db.close()
+
+
+def test_background_writer_batches_and_drains_on_stop(session_factory, monkeypatch):
+    monkeypatch.setattr(audit_services.settings, "AUDIT_FLUSH_INTERVAL", 60.0)
+    writer = audit_services.start_audit_writer(session_factory)
+    db = session_factory()
+
+    for _ in range(25):
+        audit_services.log_action(db, None, "login", ip="127.0.0.1")
+    assert db.query(AuditLog).count() == 0  # nothing written on the request path
+
+    audit_services.stop_audit_writer()
+
+    assert db.query(AuditLog).count() == 25
+    assert writer.stats()["written"] == 25
+    assert writer.stats()["queue_depth"] == 0
+    db.close()
+
+
+def test_full_queue_drops_events(session_factory):
+    writer = audit_services.AuditWriter(session_factory, max_queue=2, batch_size=10, flush_interval=1.0)
+
+    results = [writer.enqueue({"action": "login"}) for _ in range(3)]
+
+    assert results == [True, True, False]
+    assert writer.stats()["dropped"] == 1
+
+
+def test_failed_batch_is_retried_row_by_row(session_factory, monkeypatch):
+    monkeypatch.setattr(audit_services.settings, "AUDIT_FLUSH_INTERVAL", 60.0)
+    writer = audit_services.start_audit_writer(session_factory)
+    db = session_factory()
+
+    for i in range(5):
+        audit_services.log_action(db, None, "login", ip="127.0.0.1")
+    writer.enqueue({"action": None})  # violates NOT NULL, fails the batch insert
+    audit_services.stop_audit_writer()
+
+    assert db.query(AuditLog).count() == 5
+    assert (writer.stats()["written"], writer.stats()["failed"]) == (5, 1)
+    db.close()
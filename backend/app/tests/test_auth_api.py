@@ -0,0 +1,357 @@
+# backend/app/tests/test_auth_api.py
+# ------------------------------------------------------------
+# End-to-end tests for the async /auth router (aiosqlite)
+# ------------------------------------------------------------
+
+import re
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.api import auth as auth_api
+from app.core import security
+from app.core.cache import TTLCache
+from app.core.rate_limit import build_login_guard
+from app.services import audit_services, auth_cache, user_service
+from app.services.revocation import revocations
+from app.services.user_cache import InMemoryCacheBackend, UserLookupCache
+from app.db.models import AuditLog, Base, EmailOutbox, RefreshToken, User
+from app.db.query_stats import attach_query_listeners
+from app.db.session import get_async_db
+from app.main import app
+
+
+@pytest.fixture(scope="function")
+def api(tmp_path, monkeypatch):
+    """
+    TestClient bound to a throwaway SQLite file through aiosqlite.
+    """
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    attach_query_listeners(async_engine.sync_engine)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(user_service, "user_cache", UserLookupCache(InMemoryCacheBackend(1000), ttl=300, negative_ttl=30))
+    monkeypatch.setattr(auth_api, "login_guard", build_login_guard())
+    monkeypatch.setattr(auth_api, "AsyncSessionLocal", session_factory)
+    revocations.reset()
+    monkeypatch.setattr(auth_cache, "verified_tokens", TTLCache(maxsize=1000, ttl=900))
+    monkeypatch.setattr(auth_cache, "user_projections", TTLCache(maxsize=1000, ttl=60))
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _register_and_login(api, email="flow@example.com", password="Secret123!"):
+    resp = api.post("/auth/register", json={"email": email, "password": password, "full_name": "Flow"})
+    assert resp.status_code == 201
+    resp = api.post("/auth/login", json={"email": email, "password": password})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_register_login_refresh_logout(api):
+    tokens = _register_and_login(api)
+    assert tokens["token_type"] == "bearer"
+
+    resp = api.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200
+    rotated = resp.json()["refresh_token"]
+    assert rotated != tokens["refresh_token"]
+
+    resp = api.post("/auth/refresh", json={"refresh_token": rotated})
+    assert resp.status_code == 200
+    latest = resp.json()["refresh_token"]
+
+    assert api.post("/auth/logout", json={"refresh_token": latest}).status_code == 200
+    assert api.post("/auth/logout", json={"refresh_token": latest}).status_code == 400
+
+
+def test_replayed_refresh_token_revokes_its_family(api):
+    stolen = _register_and_login(api, email="replay@example.com")["refresh_token"]
+    second = api.post("/auth/refresh", json={"refresh_token": stolen}).json()["refresh_token"]
+    third = api.post("/auth/refresh", json={"refresh_token": second}).json()["refresh_token"]
+    # a separate login is a separate family
+    other = api.post("/auth/login", json={"email": "replay@example.com", "password": "Secret123!"}).json()
+
+    # the rotated-out first token is replayed: the whole chain dies, including the newest token
+    assert api.post("/auth/refresh", json={"refresh_token": stolen}).status_code == 401
+    assert api.post("/auth/refresh", json={"refresh_token": third}).status_code == 401
+    assert api.post("/auth/refresh", json={"refresh_token": other["refresh_token"]}).status_code == 200
+
+
+@pytest.fixture
+def audit_writer(api, tmp_path, monkeypatch):
+    """
+    The background audit writer (the default AUDIT_MODE) on the api database;
+    events are written when the test calls stop_audit_writer().
+    """
+    monkeypatch.setattr(audit_services.settings, "AUDIT_FLUSH_INTERVAL", 60.0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    try:
+        yield audit_services.start_audit_writer(sessionmaker(bind=engine))
+    finally:
+        audit_services.stop_audit_writer()
+        engine.dispose()
+
+
+def _audit_rows(tmp_path):
+    with Session(create_engine(f"sqlite:///{tmp_path / 'api.db'}")) as db:
+        return [(e.action, e.success, e.details) for e in db.scalars(select(AuditLog).order_by(AuditLog.id))]
+
+
+def test_background_audit_skips_rolled_back_success(api, audit_writer, tmp_path):
+    armed = [True]
+
+    def fail_first_commit(session):
+        if armed and session.info.get("on_commit_callbacks"):
+            armed.clear()
+            raise RuntimeError("commit failed")
+
+    event.listen(Session, "before_commit", fail_first_commit)
+    try:
+        resp = api.post("/auth/register", json={"email": "ghost@example.com", "password": "Secret123!"})
+    finally:
+        event.remove(Session, "before_commit", fail_first_commit)
+    audit_services.stop_audit_writer()
+
+    assert resp.status_code == 500
+    assert _audit_rows(tmp_path) == [("register", False, "commit failed")]
+    with Session(create_engine(f"sqlite:///{tmp_path / 'api.db'}")) as db:
+        assert db.scalars(select(User)).all() == []
+
+
+def test_background_audit_failure_path_still_commits(api, audit_writer, tmp_path):
+    token = _register_and_login(api, email="expired@example.com")["refresh_token"]
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    with engine.begin() as conn:
+        conn.execute(update(RefreshToken).values(expires_at=RefreshToken.issued_at))
+
+    assert api.post("/auth/refresh", json={"refresh_token": token}).status_code == 401
+    audit_services.stop_audit_writer()
+
+    with Session(engine) as db:
+        assert db.scalars(select(RefreshToken.revoked)).all() == [True]  # the claim was committed
+    assert _audit_rows(tmp_path) == [
+        ("register", True, None), ("login", True, None), ("refresh", False, "verify failed"),
+    ]
+    engine.dispose()
+
+
+def test_register_duplicate_and_bad_password(api):
+    _register_and_login(api, email="dup@example.com")
+
+    resp = api.post("/auth/register", json={"email": "dup@example.com", "password": "x"})
+    assert resp.status_code == 409
+
+    resp = api.post("/auth/login", json={"email": "dup@example.com", "password": "wrong"})
+    assert resp.status_code == 401
+
+
+def test_forgot_and_reset_password(api, tmp_path):
+    first = _register_and_login(api, email="reset@example.com", password="OldPass1!")
+
+    resp = api.post("/auth/forgot-password", json={"email": "reset@example.com"})
+    assert resp.status_code == 200
+    # the link is queued in the outbox, not sent inline
+    with Session(create_engine(f"sqlite:///{tmp_path / 'api.db'}")) as db:
+        queued = db.scalars(select(EmailOutbox)).all()
+    assert [(m.to_address, m.status) for m in queued] == [("reset@example.com", "pending")]
+    token = re.search(r"token=([^\"]+)", queued[0].html).group(1)
+
+    resp = api.post("/auth/reset-password", json={"token": token, "new_password": "NewPass1!"})
+    assert resp.status_code == 200
+    assert api.post("/auth/reset-password", json={"token": token, "new_password": "x"}).status_code == 400
+
+    resp = api.post("/auth/login", json={"email": "reset@example.com", "password": "NewPass1!"})
+    assert resp.status_code == 200
+    # the reset signed out the session that existed before it
+    assert api.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+
+
+def test_forgot_password_takes_the_same_time_for_unknown_emails(api, monkeypatch):
+    monkeypatch.setattr(auth_api.settings, "FORGOT_PASSWORD_MIN_RESPONSE_MS", 200)
+    _register_and_login(api, email="known@example.com")
+
+    timings = {}
+    for email in ("known@example.com", "unknown@example.com"):
+        started = time.perf_counter()
+        resp = api.post("/auth/forgot-password", json={"email": email})
+        timings[email] = time.perf_counter() - started
+        assert resp.json() == {"detail": "If the email exists, a reset link was sent."}
+    assert min(timings.values()) >= 0.2
+
+
+def test_list_sessions_and_revoke_all(api):
+    tokens = [_register_and_login(api, email="many@example.com")]
+    for _ in range(2):
+        tokens.append(api.post("/auth/login", json={"email": "many@example.com", "password": "Secret123!"}).json())
+    other = _register_and_login(api, email="other@example.com")
+    headers = {"Authorization": f"Bearer {tokens[-1]['access_token']}"}
+
+    resp = api.get("/auth/sessions", headers=headers)
+    assert resp.status_code == 200
+    assert len(resp.json()) == 3
+
+    resp = api.post("/auth/sessions/revoke-all", headers=headers)
+    assert resp.json() == {"revoked": 3}
+    for issued in tokens:
+        assert api.post("/auth/refresh", json={"refresh_token": issued["refresh_token"]}).status_code == 401
+    # the calling access token is revoked too; other users are untouched
+    assert api.get("/auth/sessions", headers=headers).status_code == 401
+    other_headers = {"Authorization": f"Bearer {other['access_token']}"}
+    assert len(api.get("/auth/sessions", headers=other_headers).json()) == 1
+
+
+def test_me_uses_cached_claims_and_projection(api):
+    tokens = _register_and_login(api, email="me@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    for _ in range(3):
+        resp = api.get("/auth/me", headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["email"] == "me@example.com"
+
+    stats = auth_cache.cache_stats()
+    assert stats["verified_tokens"]["hits"] == 2
+    assert stats["user_projections"]["hits"] == 2
+
+
+def test_me_rejects_missing_or_bad_token(api):
+    assert api.get("/auth/me").status_code == 401
+    assert api.get("/auth/me", headers={"Authorization": "Bearer not-a-jwt"}).status_code == 401
+
+
+def test_email_lookup_cache_negative_entry_invalidated_by_register(api):
+    cache = user_service.user_cache
+
+    assert api.post("/auth/login", json={"email": "late@example.com", "password": "x"}).status_code == 401
+    assert api.post("/auth/login", json={"email": "late@example.com", "password": "x"}).status_code == 401
+    assert cache.stats()["negative_hits"] == 1
+
+    _register_and_login(api, email="late@example.com")
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_debug_headers_and_route_query_metrics(api, monkeypatch):
+    from app.db.query_stats import route_metrics
+    monkeypatch.setattr(security.settings, "DEBUG", True)
+
+    resp = api.post("/auth/register", json={"email": "count@example.com", "password": "pw"})
+
+    assert int(resp.headers["x-db-queries"]) >= 2  # lookup + insert at minimum
+    assert float(resp.headers["x-db-time-ms"]) > 0
+    assert route_metrics["POST /auth/register"].statements.snapshot()["count"] >= 1
+    assert api.get("/metrics/queries").status_code == 401
+    monkeypatch.setattr(security.settings, "ADMIN_EMAILS", ["admin@example.com"])
+    admin = _register_and_login(api, email="admin@example.com")
+    resp = api.get("/metrics/queries", headers={"Authorization": f"Bearer {admin['access_token']}"})
+    assert "POST /auth/register" in resp.json()
+
+
+def test_each_auth_flow_commits_once(api, monkeypatch):
+    monkeypatch.setattr(security.settings, "DEBUG", True)
+    creds = {"email": "uow@example.com", "password": "Secret123!"}
+
+    resp = api.post("/auth/register", json=creds)
+    assert (resp.headers["x-db-queries"], resp.headers["x-db-commits"]) == ("3", "1")
+
+    # user lookup, password hash, refresh token insert, audit insert
+    resp = api.post("/auth/login", json=creds)
+    assert (resp.headers["x-db-queries"], resp.headers["x-db-commits"]) == ("4", "1")
+
+    # token lookup, revoke, new token insert, audit insert
+    resp = api.post("/auth/refresh", json={"refresh_token": resp.json()["refresh_token"]})
+    assert (resp.headers["x-db-queries"], resp.headers["x-db-commits"]) == ("4", "1")
+
+
+def test_login_lockout_rejects_before_lookup(api, monkeypatch):
+    monkeypatch.setattr(auth_api, "login_guard", build_login_guard())
+    auth_api.login_guard.lockout_threshold = 2
+    auth_api.login_guard.lockout_base = 60
+    lookups = []
+    real_lookup = user_service.lookup_user_by_email_async
+
+    async def counting_lookup(db, email):
+        lookups.append(email)
+        return await real_lookup(db, email)
+
+    monkeypatch.setattr(user_service, "lookup_user_by_email_async", counting_lookup)
+    creds = {"email": "victim@example.com", "password": "guess"}
+
+    assert api.post("/auth/login", json=creds).status_code == 401
+    assert api.post("/auth/login", json=creds).status_code == 401
+    resp = api.post("/auth/login", json=creds)
+
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 59
+    assert len(lookups) == 2
+
+
+def test_login_upgrades_bcrypt_and_weak_argon2_hashes(api, tmp_path):
+    from passlib.hash import argon2, bcrypt
+    from sqlalchemy import insert, select
+    from app.db.models import User
+
+    legacy = {
+        "old-bcrypt@example.com": bcrypt.using(rounds=4).hash("pw"),
+        "weak-argon@example.com": argon2.using(time_cost=1, memory_cost=1024, parallelism=1).hash("pw"),
+    }
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": e, "hashed_password": h, "is_active": True} for e, h in legacy.items()])
+
+    for email in legacy:
+        assert security.needs_rehash(legacy[email])
+        assert api.post("/auth/login", json={"email": email, "password": "pw"}).status_code == 200
+
+    with engine.connect() as conn:
+        stored = dict(conn.execute(select(User.email, User.hashed_password)).all())
+    engine.dispose()
+    for email, old in legacy.items():
+        assert stored[email] != old
+        assert not security.needs_rehash(stored[email])
+        assert security.verify_password(stored[email], "pw")
+    # the upgraded hash is what the next login sees
+    assert api.post("/auth/login", json={"email": "old-bcrypt@example.com", "password": "pw"}).status_code == 200
+
+
+def test_introspect_and_logout_revokes_access_token(api, monkeypatch):
+    tokens = _register_and_login(api, email="intro@example.com")
+    access, refresh = tokens["access_token"], tokens["refresh_token"]
+    headers = {"Authorization": f"Bearer {access}"}
+    monkeypatch.setattr(security.settings, "INTROSPECTION_CLIENTS", {"rs": "rs-secret"})
+    client = ("rs", "rs-secret")
+
+    assert api.post("/auth/introspect", json={"token": access}).status_code == 401
+    assert api.post("/auth/introspect", json={"token": access}, headers=headers).status_code == 403
+    assert api.post("/auth/introspect", json={"token": access}, auth=("rs", "wrong")).status_code == 401
+
+    body = api.post("/auth/introspect", json={"token": access}, auth=client).json()
+    assert body["active"] and body["token_type"] == "access_token" and body["jti"]
+    body = api.post("/auth/introspect", json={"token": refresh, "token_type_hint": "refresh_token"}, auth=client).json()
+    assert body["active"] and body["token_type"] == "refresh_token"
+    assert api.post("/auth/introspect", json={"token": "garbage"}, auth=client).json() == {"active": False}
+    negatives = revocations.definite_negatives
+
+    assert api.post("/auth/logout", json={"refresh_token": refresh}, headers=headers).status_code == 200
+
+    assert api.post("/auth/introspect", json={"token": access}, auth=client).json() == {"active": False}
+    assert api.post("/auth/introspect", json={"token": refresh}, auth=client).json() == {"active": False}
+    assert api.get("/auth/me", headers=headers).status_code == 401
+    assert revocations.definite_negatives == negatives  # revoked jti is a filter hit, confirmed by the DB
@@ -0,0 +1,30 @@
+# backend/app/tests/test_cache.py
+# ------------------------------------------------------------
+# Tests for the TTL/LRU cache primitive
+# ------------------------------------------------------------
+
+import time
+
+from app.core.cache import MISSING, TTLCache
+
+
+def test_lru_eviction_and_stats():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")           # a becomes most recently used
+    cache.set("c", 3)        # evicts b
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_entry_expires_at_deadline():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("token", {"sub": "1"}, expires_at=time.time() - 1)
+
+    assert cache.get("token") is MISSING
+    assert cache.stats()["expirations"] == 1
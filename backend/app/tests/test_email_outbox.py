@@ -0,0 +1,169 @@
+# backend/app/tests/test_email_outbox.py
+# ------------------------------------------------------------
+# Tests for the email outbox dispatcher against a local SMTP server
+# ------------------------------------------------------------
+
+import smtplib
+import socket
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, EmailOutbox
+from app.services.email import EmailDispatcher, SmtpEmailProvider, enqueue_email, retry_delay
+
+aiosmtpd = pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.reject = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.reject:
+            return "550 no such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield handler, port
+    finally:
+        controller.stop()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _dispatcher(session_factory, provider, **overrides):
+    options = dict(workers=1, batch_size=10, poll_interval=0.05, lease_seconds=60, max_attempts=3,
+                   retry_base=30, retry_max=600)
+    options.update(overrides)
+    return EmailDispatcher(session_factory, provider, **options)
+
+
+def test_batch_is_sent_over_one_pooled_connection(smtp_server, session_factory):
+    handler, port = smtp_server
+    provider = SmtpEmailProvider("127.0.0.1", port, sender="noreply@example.com", pool_size=1)
+    with session_factory() as db:
+        for i in range(5):
+            enqueue_email(db, to=f"u{i}@example.com", subject="Hi", html=f"<p>{i}</p>", text=str(i), commit=False)
+        db.commit()
+
+    dispatcher = _dispatcher(session_factory, provider, batch_size=3)
+    assert dispatcher.drain() == 5
+
+    assert sorted(rcpt[0] for rcpt, _ in handler.messages) == [f"u{i}@example.com" for i in range(5)]
+    assert "multipart/alternative" in handler.messages[0][1]
+    assert provider.pool.opened == 1 and provider.pool.reused == 1
+    with session_factory() as db:
+        rows = db.scalars(select(EmailOutbox)).all()
+        assert {row.status for row in rows} == {"sent"}
+        assert {(row.html, row.text) for row in rows} == {("", None)}  # bodies are not kept once sent
+    provider.close()
+
+
+def test_rejected_message_backs_off_then_fails(smtp_server, session_factory):
+    handler, port = smtp_server
+    handler.reject.add("bad@example.com")
+    provider = SmtpEmailProvider("127.0.0.1", port, sender="noreply@example.com")
+    with session_factory() as db:
+        enqueue_email(db, to="bad@example.com", subject="Hi", html="x")
+        enqueue_email(db, to="good@example.com", subject="Hi", html="y")
+
+    dispatcher = _dispatcher(session_factory, provider, max_attempts=2)
+    assert dispatcher.drain() == 2
+    assert [rcpt for rcpt, _ in handler.messages] == [["good@example.com"]]
+    with session_factory() as db:
+        bad = db.scalar(select(EmailOutbox).where(EmailOutbox.to_address == "bad@example.com"))
+        assert (bad.status, bad.attempts, bad.html) == ("pending", 1, "x")  # kept for the retry
+        assert "550" in bad.last_error
+        assert bad.next_attempt_at > datetime.utcnow() + timedelta(seconds=10)
+        # make it due again; the second failure is final
+        bad.next_attempt_at = datetime.utcnow()
+        db.commit()
+
+    assert dispatcher.drain() == 1
+    with session_factory() as db:
+        bad = db.scalar(select(EmailOutbox).where(EmailOutbox.to_address == "bad@example.com"))
+        assert (bad.status, bad.html) == ("failed", "")
+    assert (dispatcher.sent, dispatcher.retried, dispatcher.failed) == (1, 1, 1)
+    provider.close()
+
+
+def test_unreachable_server_leaves_rows_queued(session_factory):
+    provider = SmtpEmailProvider("127.0.0.1", 1, sender="noreply@example.com", timeout=1)
+    with session_factory() as db:
+        enqueue_email(db, to="a@example.com", subject="Hi", html="x")
+
+    assert _dispatcher(session_factory, provider).run_once() == 1
+    with session_factory() as db:
+        row = db.scalar(select(EmailOutbox))
+        assert (row.status, row.attempts, row.claim_token) == ("pending", 1, None)
+
+
+def test_expired_claim_is_picked_up_again(session_factory):
+    sent = []
+
+    class Recorder:
+        def send(self, *, to, subject, html, text=None):
+            sent.append(to)
+
+    with session_factory() as db:
+        # claimed by a worker that died: still "sending", lease already over
+        db.add(EmailOutbox(to_address="a@example.com", subject="s", html="h", status="sending", attempts=1,
+                           claim_token="dead", next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+
+    assert _dispatcher(session_factory, Recorder()).drain() == 1
+    assert sent == ["a@example.com"]
+
+
+def test_worker_threads_send_on_commit(smtp_server, session_factory):
+    handler, port = smtp_server
+    provider = SmtpEmailProvider("127.0.0.1", port, sender="noreply@example.com")
+    dispatcher = _dispatcher(session_factory, provider, workers=2, poll_interval=0.05)
+    dispatcher.start()
+    try:
+        with session_factory() as db:
+            enqueue_email(db, to="t@example.com", subject="Hi", html="x")
+        for _ in range(100):
+            if handler.messages:
+                break
+            time.sleep(0.02)
+    finally:
+        dispatcher.stop()
+        provider.close()
+    assert [rcpt for rcpt, _ in handler.messages] == [["t@example.com"]]
+
+
+def test_retry_delay_is_capped_and_jittered():
+    assert 15 <= retry_delay(1, 30, 600) <= 30
+    assert 300 <= retry_delay(10, 30, 600) <= 600
+    assert isinstance(smtplib.SMTPException(), OSError)
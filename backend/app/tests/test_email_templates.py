@@ -0,0 +1,62 @@
+# backend/app/tests/test_email_templates.py
+# ------------------------------------------------------------
+# Tests for the compiled, localized email templates
+# ------------------------------------------------------------
+
+import pytest
+
+from app.services.email import TEMPLATES_DIR, EmailTemplates, build_mime, OutboundEmail
+
+
+@pytest.fixture
+def templates():
+    loaded = EmailTemplates(TEMPLATES_DIR, default_locale="en",
+                            fragment_context={"product_name": "Acme", "support_email": "help@acme.test"})
+    loaded.load()
+    return loaded
+
+
+def test_password_reset_renders_both_parts_with_escaping(templates):
+    rendered = templates.render("password_reset", reset_link="https://x.test/r?token=a&b=<c>")
+
+    assert rendered.subject == "Reset your password"
+    assert 'href="https://x.test/r?token=a&amp;b=&lt;c&gt;"' in rendered.html
+    assert "https://x.test/r?token=a&b=<c>" in rendered.text
+    # fragments are pre-rendered with the fragment context
+    assert "Acme" in rendered.html and "help@acme.test" in rendered.text
+
+
+def test_locale_resolution_and_fallback(templates):
+    assert templates.locales() == ["en", "es"]
+    assert templates.resolve_locale("password_reset", "es-MX,es;q=0.9,en;q=0.8") == "es"
+    assert templates.resolve_locale("password_reset", "fr-FR, de") == "en"
+    assert templates.resolve_locale("password_reset", None) == "en"
+
+    rendered = templates.render("password_reset", "es", reset_link="l")
+    assert rendered.subject == "Restablece tu contraseña"
+    assert '<html lang="es">' in rendered.html
+
+
+def test_fragments_render_once_and_unknown_template_fails(tmp_path):
+    (tmp_path / "en" / "fragments").mkdir(parents=True)
+    (tmp_path / "en" / "fragments" / "sig.txt").write_text("-- {{ product_name }}")
+    (tmp_path / "en" / "note.subject.txt").write_text("Note for {{ name }}\n")
+    (tmp_path / "en" / "note.html").write_text("<p>{{ name }}</p>")
+    (tmp_path / "en" / "note.txt").write_text("{{ name }}\n{{ fragments.sig }}")
+    templates = EmailTemplates(tmp_path, default_locale="en", fragment_context={"product_name": "Acme"})
+    templates.load()
+
+    # editing the fragment after load changes nothing: it was rendered at load time
+    (tmp_path / "en" / "fragments" / "sig.txt").write_text("changed")
+    rendered = templates.render("note", name="<Ann>")
+    assert (rendered.subject, rendered.html, rendered.text) == ("Note for <Ann>", "<p>&lt;Ann&gt;</p>", "<Ann>\n-- Acme")
+
+    with pytest.raises(LookupError):
+        templates.render("missing")
+
+
+def test_multipart_mime(templates):
+    rendered = templates.render("password_reset", reset_link="l")
+    mime = build_mime("noreply@acme.test", OutboundEmail("a@acme.test", rendered.subject, rendered.html, rendered.text))
+    assert mime.get_content_type() == "multipart/alternative"
+    assert [part.get_content_type() for part in mime.iter_parts()] == ["text/plain", "text/html"]
@@ -0,0 +1,59 @@
+# backend/app/tests/test_hash_pool.py
+# ------------------------------------------------------------
+# Tests for the bounded password hashing pool
+# ------------------------------------------------------------
+
+import asyncio
+import time
+
+import pytest
+from app.core import security
+from app.core.hash_pool import PasswordHashPool, HashingPoolBusy
+
+
+@pytest.fixture
+def pool():
+    p = PasswordHashPool(workers=1, max_pending=1, queue_timeout=0.05)
+    try:
+        yield p
+    finally:
+        p.shutdown()
+
+
+def test_pool_hash_and_verify(pool):
+    hashed = pool.run(security.hash_password_sync, "supersecret")
+
+    assert pool.run(security.verify_password_sync, hashed, "supersecret") is True
+    assert pool.run(security.verify_password_sync, hashed, "wrongpass") is False
+    assert pool.pending() == 0
+
+
+def test_pool_rejects_when_saturated(pool):
+    running = pool.submit(time.sleep, 0.5)
+    assert pool.pending() == 1
+
+    with pytest.raises(HashingPoolBusy):
+        pool.submit(time.sleep, 0)
+
+    running.result()
+    pool.submit(time.sleep, 0).result()  # slot released again
+
+
+def test_async_variants_inline(monkeypatch):
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 0)
+
+    async def roundtrip():
+        hashed = await security.hash_password_async("asyncpass")
+        return await security.verify_password_async(hashed, "asyncpass")
+
+    assert asyncio.run(roundtrip()) is True
+
+
+def test_default_cost_keeps_passlib_default_hashes():
+    from passlib.hash import argon2
+
+    from app.config import settings
+    context = security.build_pwd_context(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM)
+
+    assert not context.needs_update(argon2.hash("pw"))
+    assert context.needs_update(argon2.using(time_cost=settings.ARGON2_TIME_COST + 1).hash("pw"))
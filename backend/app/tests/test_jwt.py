@@ -2,6 +2,8 @@
 import pytest
 from datetime import datetime, timedelta, timezone
 
+from jose import jwt
+
 from app.core import jwt as jwt_utils
 from app.db.models import RefreshToken, User
 from app.db.session import SessionLocal
@@ -13,15 +15,28 @@ def test_access_token_creation():
 
     assert token is not None
 
-    decoded = jwt_utils.jwt.decode(
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "RS256"
+    decoded = jwt.decode(
         token,
-        jwt_utils.settings.SECRET_KEY,
-        algorithms=["HS256"]
+        jwt_utils.key_ring.get(header["kid"]).public,
+        algorithms=["RS256"]
     )
     assert decoded["sub"] == "test@example.com"
     assert "exp" in decoded
 
 
+def test_refresh_token_format_round_trips():
+    parts = jwt_utils.create_refresh_token()
+    selector, verifier = parts.token.split(".")
+
+    assert len(selector) == jwt_utils.SELECTOR_LENGTH
+    assert jwt_utils.parse_refresh_token(parts.token) == (parts.selector, parts.verifier_hash)
+    assert len(parts.verifier_hash) == 32
+    for malformed in ("", "no-dot-legacy-style", f".{verifier}", f"{selector}.", f"{selector}x.{verifier}", f"!!!!!!!!!!!.{verifier}"):
+        assert jwt_utils.parse_refresh_token(malformed) is None
+
+
 def test_refresh_token_rotation():
     db = SessionLocal()
 
@@ -36,10 +51,11 @@ def test_refresh_token_rotation():
     db.refresh(user)
 
     # issue refresh token
-    token, token_hash, issued_at, expires_at = jwt_utils.create_refresh_token()
+    token, selector, verifier_hash, issued_at, expires_at = jwt_utils.create_refresh_token()
     db_token = RefreshToken(
         user_id=user.id,
-        token_hash=token_hash,
+        selector=selector,
+        verifier_hash=verifier_hash,
         issued_at=issued_at,
         expires_at=expires_at,
         revoked=False,
@@ -52,13 +68,14 @@ def test_refresh_token_rotation():
     assert db_token.expires_at > datetime.now(timezone.utc).replace(tzinfo=None)
 
     # simulate rotation
-    new_token, new_token_hash, new_issued, new_expires = jwt_utils.create_refresh_token()
+    new_token, new_selector, new_verifier_hash, new_issued, new_expires = jwt_utils.create_refresh_token()
     db_token.revoked = True
     db.add(db_token)
 
     new_db_token = RefreshToken(
         user_id=user.id,
-        token_hash=new_token_hash,
+        selector=new_selector,
+        verifier_hash=new_verifier_hash,
         issued_at=new_issued,
         expires_at=new_expires,
         revoked=False,
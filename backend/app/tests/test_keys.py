@@ -0,0 +1,100 @@
+# backend/app/tests/test_keys.py
+# ------------------------------------------------------------
+# Tests for the RS256 key ring, rotation and the JWKS endpoint
+# ------------------------------------------------------------
+
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+
+from app.api import jwks as jwks_api
+from app.core import jwt as jwt_utils
+from app.core.keys import KeyRing
+from app.main import app
+
+
+@pytest.fixture(scope="function")
+def ring(tmp_path, monkeypatch):
+    ring = KeyRing(str(tmp_path / "keys"), publish_seconds=0, reload_seconds=0)
+    monkeypatch.setattr(jwt_utils, "key_ring", ring)
+    monkeypatch.setattr(jwks_api, "key_ring", ring)
+    return ring
+
+
+def test_rotation_keeps_old_tokens_verifiable(ring):
+    first = ring.rotate(retain_seconds=3600)
+    old_token = jwt_utils.create_access_token({"sub": "1"})
+    time.sleep(1.1)  # kids carry second-resolution timestamps
+    second = ring.rotate(retain_seconds=3600)
+    new_token = jwt_utils.create_access_token({"sub": "2"})
+
+    assert jwt.get_unverified_header(old_token)["kid"] == first
+    assert jwt.get_unverified_header(new_token)["kid"] == second
+    assert jwt_utils.decode_access_token(old_token)["sub"] == "1"
+    assert jwt_utils.decode_access_token(new_token)["sub"] == "2"
+
+    # a ring that no longer has the first key rejects its tokens
+    (ring.keys_dir / f"{first}.pem").unlink()
+    ring.load()
+    with pytest.raises(JWTError):
+        jwt_utils.decode_access_token(old_token)
+
+
+def test_new_key_is_published_before_it_signs(tmp_path):
+    ring = KeyRing(str(tmp_path / "keys"), publish_seconds=0, reload_seconds=0)
+    first = ring.rotate(retain_seconds=3600)
+    ring.publish_seconds = 600
+    time.sleep(1.1)
+    second = ring.rotate(retain_seconds=3600)
+
+    assert ring.active().kid == first
+    assert {k["kid"] for k in json.loads(ring.jwks()[0])["keys"]} == {first, second}
+
+
+def test_legacy_hs256_rejected_by_default():
+    forged = jwt.encode({"sub": "1", "jti": "x", "exp": int(time.time()) + 60}, jwt_utils.SECRET_KEY, algorithm="HS256")
+
+    with pytest.raises(JWTError):
+        jwt_utils.decode_access_token(forged)
+
+
+def test_legacy_hs256_tokens_accepted_only_in_migration_window(monkeypatch):
+    now = int(time.time())
+    monkeypatch.setattr(jwt_utils.settings, "JWT_ACCEPT_LEGACY_HS256", True)
+    monkeypatch.setattr(jwt_utils.settings, "JWT_HS256_CUTOVER", datetime.fromtimestamp(now - 60, timezone.utc))
+
+    def legacy(**claims):
+        return jwt.encode({"sub": "7", "jti": "j1", "exp": now + 60, **claims}, jwt_utils.SECRET_KEY, algorithm="HS256")
+
+    # the shipped SECRET_KEY is public: never trusted
+    with pytest.raises(JWTError):
+        jwt_utils.decode_access_token(legacy())
+
+    monkeypatch.setattr(jwt_utils, "SECRET_KEY", "a-real-deployment-secret")
+    assert jwt_utils.decode_access_token(legacy())["sub"] == "7"
+    for bad in (legacy(jti=None), legacy(exp=now + 365 * 86400)):
+        with pytest.raises(JWTError):
+            jwt_utils.decode_access_token(bad)
+
+    monkeypatch.setattr(jwt_utils.settings, "JWT_ACCEPT_LEGACY_HS256", False)
+    with pytest.raises(JWTError):
+        jwt_utils.decode_access_token(legacy())
+
+
+def test_jwks_endpoint_caching_headers(ring):
+    ring.rotate(retain_seconds=3600)
+    client = TestClient(app)
+
+    resp = client.get("/.well-known/jwks.json")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+    (key,) = resp.json()["keys"]
+    assert (key["kty"], key["alg"], key["use"]) == ("RSA", "RS256", "sig")
+    assert "d" not in key  # never publish private material
+
+    resp = client.get("/.well-known/jwks.json", headers={"If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == 304
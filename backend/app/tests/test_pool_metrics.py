@@ -0,0 +1,71 @@
+# backend/app/tests/test_pool_metrics.py
+# ------------------------------------------------------------
+# Tests for configurable pool sizing and pool metrics
+# ------------------------------------------------------------
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db.pool_metrics import PoolMetrics, attach_pool_events
+from app.db.session import engine_options
+from app.tests.test_auth_api import api  # noqa: F401  (fixture)
+
+
+def test_pool_settings_and_wait_metrics(tmp_path, monkeypatch):
+    from app.db import session
+    monkeypatch.setattr(session.settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(session.settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(session.settings, "DB_POOL_TIMEOUT", 0.05)
+
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    metrics = PoolMetrics("test")
+    engine = create_engine(url, **engine_options(url, QueuePool, metrics))
+    attach_pool_events(engine, metrics)
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()  # pool of one is exhausted
+
+    snap = metrics.snapshot()
+    assert snap["size"] == 1
+    assert snap["checked_out"] == 0
+    assert snap["checkouts"] == 1
+    assert snap["timeouts"] == 1
+    assert snap["wait_seconds"]["count"] == 2
+    assert snap["hold_seconds"]["count"] == 1
+    engine.dispose()
+
+
+def test_memory_sqlite_keeps_default_pool():
+    assert engine_options("sqlite://", QueuePool, PoolMetrics("mem")) == {}
+
+
+def test_db_pool_endpoint(api, monkeypatch):
+    from app.db import session
+    monkeypatch.setattr(session.settings, "METRICS_TOKEN", "scrape-secret")
+    scraper = {"Authorization": "Bearer scrape-secret"}
+
+    assert api.get("/metrics/db-pool").status_code == 401
+    assert api.get("/metrics/db-pool", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    resp = api.get("/metrics/db-pool", headers=scraper)
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"sync", "async"}
+
+    resp = api.get("/metrics/db-pool", params={"format": "prometheus"}, headers=scraper)
+    assert 'db_pool_wait_seconds_count{pool="sync"}' in resp.text
+
+
+def test_failed_statement_does_not_leak_query_timer(tmp_path):
+    from app.db.query_stats import attach_query_listeners
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    attach_query_listeners(engine)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("select * from missing_table"))
+        conn.execute(text("select 1"))
+        assert conn.info["query_started"] == []
+    engine.dispose()
@@ -0,0 +1,81 @@
+# backend/app/tests/test_rate_limit.py
+# ------------------------------------------------------------
+# Tests for sliding-window limits and failed-login backoff
+# ------------------------------------------------------------
+
+import time
+
+import pytest
+
+from app.core.rate_limit import (
+    InMemoryRateLimitStore,
+    LoginGuard,
+    RateLimited,
+    RateLimitRule,
+)
+
+
+def test_sliding_window_counter():
+    store = InMemoryRateLimitStore(shards=2)
+
+    assert [store.hit("k", 3, 60, 120.0 + i) for i in range(3)] == [0.0, 0.0, 0.0]
+    assert store.hit("k", 3, 60, 130.0) > 0          # over the limit in the same window
+    # halfway into the next window the previous three still weigh 1.5
+    assert store.hit("k", 3, 60, 210.0) == 0.0
+    assert store.hit("k", 3, 60, 210.0) == 0.0
+    assert store.hit("k", 3, 60, 210.0) > 0
+    # two windows later nothing is carried over
+    assert store.hit("k", 3, 60, 400.0) == 0.0
+
+
+def test_idle_keys_are_swept():
+    store = InMemoryRateLimitStore(shards=1, sweep_every=3)
+    store.hit("old", 5, 10, 0.0)
+    store.set("lock:old", (1, 0.0), ttl=5, now=0.0)
+
+    store.hit("new", 5, 10, 100.0)
+
+    assert len(store) == 1
+
+
+def test_guard_limits_per_email_and_backs_off():
+    guard = LoginGuard(
+        InMemoryRateLimitStore(),
+        [RateLimitRule("email", 100, 60)],
+        lockout_threshold=3,
+        lockout_base=30,
+        lockout_max=100,
+        failure_ttl=3600,
+    )
+
+    for _ in range(2):
+        guard.check("10.0.0.1", "a@example.com")
+        guard.record_failure("a@example.com")
+    guard.check("10.0.0.1", "a@example.com")
+    guard.record_failure("A@example.com")      # third failure locks for 30s
+
+    with pytest.raises(RateLimited) as exc:
+        guard.check("10.0.0.2", "a@example.com")
+    assert exc.value.scope == "lockout"
+    assert 29 < exc.value.retry_after <= 30
+
+    guard.record_failure("a@example.com")      # fourth doubles to 60s
+    with pytest.raises(RateLimited) as exc:
+        guard.check("10.0.0.2", "a@example.com")
+    assert exc.value.retry_after > 59
+
+    guard.record_success("a@example.com")
+    guard.check("10.0.0.2", "a@example.com")
+    assert guard.stats()["rejected"] == {"lockout": 2}
+
+
+def test_lockout_delay_stays_capped_under_sustained_failures():
+    store = InMemoryRateLimitStore()
+    guard = LoginGuard(store, [], lockout_threshold=3, lockout_base=30.0, lockout_max=900, failure_ttl=3600)
+    store.set("lock:a@example.com", (5000, 0.0), ttl=3600, now=time.time())
+
+    guard.record_failure("a@example.com")
+
+    with pytest.raises(RateLimited) as exc:
+        guard.check("10.0.0.1", "a@example.com")
+    assert exc.value.scope == "lockout" and 899 < exc.value.retry_after <= 900
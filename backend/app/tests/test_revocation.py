@@ -0,0 +1,83 @@
+# backend/app/tests/test_revocation.py
+# ------------------------------------------------------------
+# Tests for the Bloom filter and revocation set sync
+# ------------------------------------------------------------
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.bloom import BloomFilter
+from app.core.shared_state import InMemorySharedState
+from app.db.models import Base, RevokedAccessToken
+from app.services.revocation import RevocationSet, revoke_access_token_async
+
+
+def test_bloom_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"in-{i}")
+
+    assert all(f"in-{i}" in bloom for i in range(5000))
+    false_positives = sum(f"out-{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert not bloom.saturated
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    url = f"sqlite:///{tmp_path / 'revocations.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    yield async_sessionmaker(async_engine, expire_on_commit=False)
+    asyncio.run(async_engine.dispose())
+
+
+def test_revocations_from_other_processes_arrive_by_sync(session_factory):
+    exp = int(time.time()) + 600
+
+    async def scenario():
+        local = RevocationSet(capacity=1000, error_rate=0.001, sync_seconds=3600)
+        other = RevocationSet(capacity=1000, error_rate=0.001, sync_seconds=3600)
+        async with session_factory() as db:
+            assert not await local.is_revoked(db, "a")          # builds the (empty) filter
+            await revoke_access_token_async(db, {"jti": "a", "sub": "1", "exp": exp})
+            # written by "another process": only visible after a sync
+            db.add(RevokedAccessToken(jti="b", revoked_at=datetime.utcnow() - timedelta(seconds=5),
+                                      expires_at=datetime.utcnow() + timedelta(minutes=10)))
+            await db.commit()
+
+            assert not await local.is_revoked(db, "b")
+            await local.sync(db, force=True)
+            assert await local.is_revoked(db, "b")
+            assert await other.is_revoked(db, "a")              # fresh filter rebuilt from the table
+            assert not await revoke_access_token_async(db, {"jti": "a", "sub": "1", "exp": exp})
+        return local.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["entries"] == 2 and stats["db_checks"] == 1
+
+
+def test_shared_version_bump_triggers_immediate_sync(session_factory):
+    state = InMemorySharedState()
+
+    async def scenario():
+        # two workers with a long sync interval, sharing state
+        first = RevocationSet(capacity=1000, error_rate=0.001, sync_seconds=3600, state=state)
+        second = RevocationSet(capacity=1000, error_rate=0.001, sync_seconds=3600, state=state)
+        async with session_factory() as db:
+            assert not await second.is_revoked(db, "x")
+            await first.rebuild(db)
+            db.add(RevokedAccessToken(jti="x", revoked_at=datetime.utcnow(),
+                                      expires_at=datetime.utcnow() + timedelta(minutes=10)))
+            await db.commit()
+            first.record("x")  # what on_commit does in the revoking worker
+            return await second.is_revoked(db, "x")
+
+    assert asyncio.run(scenario())
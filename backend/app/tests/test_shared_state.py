@@ -0,0 +1,164 @@
+# backend/app/tests/test_shared_state.py
+# ------------------------------------------------------------
+# Tests for the state shared between worker processes
+# ------------------------------------------------------------
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app import __main__ as entry
+from app.core import shared_state
+from app.core.rate_limit import SharedStateRateLimitStore
+from app.core.shared_state import InMemorySharedState, MmapSharedState, SharedCache
+
+
+@pytest.fixture(params=["memory", "mmap"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        yield InMemorySharedState()
+        return
+    table = MmapSharedState(str(tmp_path / "state.mmap"), slots=64, slot_size=128, stripes=4)
+    yield table
+    table.close()
+
+
+def test_get_set_delete_incr_and_expiry(state):
+    assert state.get("a") is None
+    state.set("a", "1", ttl=60)
+    state.set("a", "2", ttl=60)
+    assert state.get("a") == "2"
+    state.delete("a")
+    assert state.get("a") is None
+
+    assert [state.incr("n", ttl=60) for _ in range(3)] == [1, 2, 3]
+    assert state.incr("n", ttl=60, amount=10) == 13
+
+    state.set("short", "x", ttl=0.05)
+    time.sleep(0.1)
+    assert state.get("short") is None
+    assert state.incr("short", ttl=60) == 1
+
+
+def test_mmap_full_stripe_evicts_and_oversize_is_skipped(tmp_path):
+    table = MmapSharedState(str(tmp_path / "state.mmap"), slots=8, slot_size=64, stripes=1)
+    for i in range(8):
+        table.set(f"k{i}", "v", ttl=100 + i)
+    table.set("k8", "v", ttl=500)
+    assert table.evictions == 1
+    assert table.get("k0") is None and table.get("k8") == "v"
+
+    table.set("k1", "x" * 100, ttl=60)
+    assert table.oversize == 1
+    assert table.get("k1") is None  # the previous value is not left behind
+    table.close()
+
+    with pytest.raises(ValueError):
+        MmapSharedState(str(tmp_path / "state.mmap"), slots=16, slot_size=64, stripes=1)
+
+
+def _hammer(path: str, count: int) -> None:
+    table = MmapSharedState(path, slots=64, slot_size=128, stripes=4)
+    for _ in range(count):
+        table.incr("hits", ttl=60)
+    table.close()
+
+
+def test_mmap_counter_is_coherent_across_processes(tmp_path):
+    path = str(tmp_path / "state.mmap")
+    table = MmapSharedState(path, slots=64, slot_size=128, stripes=4)
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_hammer, args=(path, 300)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    _hammer(path, 300)
+    for worker in workers:
+        worker.join(30)
+    assert table.get("hits") == "1200"
+    table.close()
+
+
+def test_state_server_round_trip(monkeypatch):
+    monkeypatch.setattr(shared_state.settings, "STATE_SERVER_AUTHKEY", "test-key")
+    server = shared_state.StateServer(address=("127.0.0.1", 0), authkey=shared_state._authkey())
+    server.start()
+    try:
+        host, port = server.address
+        first = shared_state.connect_state_server(f"{host}:{port}")
+        second = shared_state.connect_state_server(f"{host}:{port}")
+        first.set("k", "v", 60)
+        assert second.get("k") == "v"
+        assert first.incr("n", 60) == 1 and second.incr("n", 60) == 2
+    finally:
+        server.shutdown()
+
+
+def test_state_server_refuses_to_run_without_authkey(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state.settings, "STATE_SERVER_AUTHKEY", "")
+    monkeypatch.setattr(entry.settings, "STATE_BACKEND", "server")
+
+    with pytest.raises(RuntimeError, match="STATE_SERVER_AUTHKEY"):
+        shared_state.connect_state_server("127.0.0.1:1")
+    with pytest.raises(RuntimeError, match="STATE_SERVER_AUTHKEY"):
+        shared_state.start_state_server("127.0.0.1:0")
+    with pytest.raises(RuntimeError, match="STATE_SERVER_AUTHKEY"):
+        entry.prepare_workers(2, tmp_path, {})
+
+
+def test_import_does_not_open_shared_state(tmp_path):
+    path = tmp_path / "state.mmap"
+    env = {**os.environ, "DATABASE_URL": "sqlite:///unused.db", "STATE_BACKEND": "mmap", "STATE_MMAP_PATH": str(path)}
+    script = "import app.main, app.core.shared_state as s; print(s._state is None)"
+
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+
+    assert result.stdout.strip() == "True"
+    assert not path.exists()
+
+
+def test_rate_limit_counters_are_shared_between_stores(state):
+    # two workers' stores over one state see each other's hits
+    a, b = SharedStateRateLimitStore(state), SharedStateRateLimitStore(state)
+    now = 1_000_000.0
+    assert a.hit("rl:ip:1", 2, 60, now) == 0
+    assert b.hit("rl:ip:1", 2, 60, now) == 0
+    assert a.hit("rl:ip:1", 2, 60, now) > 0
+
+    a.set("lock:x", (3, 0.0), ttl=60, now=now)
+    assert b.get("lock:x", now) == (3, 0.0)
+    b.delete("lock:x")
+    assert a.get("lock:x", now) is None
+
+
+def test_shared_cache_round_trips_values(state):
+    cache = SharedCache(state, prefix="p:", ttl=60)
+    cache.set(1, {"id": 1})
+    assert cache.get(1) == {"id": 1}
+    cache.set(2, {"id": 2}, expires_at=time.time() - 1)  # already expired: not stored
+    assert cache.get(2, None) is None
+    cache.delete(1)
+    assert cache.get(1, None) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_prepare_workers_shares_state_and_signing_keys(tmp_path, monkeypatch):
+    monkeypatch.setattr(entry.settings, "STATE_BACKEND", "memory")
+    monkeypatch.setattr(entry.settings, "JWT_KEYS_DIR", "")
+    monkeypatch.setattr(entry.settings, "PASSWORD_HASH_WORKERS", None)
+    environ = {}
+
+    assert entry.prepare_workers(2, tmp_path, environ) == []
+
+    assert environ["STATE_BACKEND"] == "mmap"
+    assert os.path.exists(environ["STATE_MMAP_PATH"])
+    assert len(list((tmp_path / "jwt-keys").glob("*.pem"))) == 1
+    assert environ["JWT_KEYS_DIR"] == str(tmp_path / "jwt-keys")
+    assert int(environ["PASSWORD_HASH_WORKERS"]) >= 1
+
+    single = {}
+    entry.prepare_workers(1, tmp_path, single)
+    assert "STATE_BACKEND" not in single
@@ -0,0 +1,84 @@
+# backend/app/tests/test_startup.py
+# ------------------------------------------------------------
+# Tests for lazy startup, warmup and time to first request
+# ------------------------------------------------------------
+
+import asyncio
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.config import settings
+from app.core import security, startup
+from app.db import session
+from app.db.models import Base
+
+# Loaded in the lifespan (or on first use), never by `import app.main`
+DEFERRED_MODULES = ("passlib.context", "jose.jwt", "jose.jwk", "jinja2", "aiosqlite")
+
+
+def test_import_defers_engines_and_heavy_dependencies():
+    script = (
+        "import sys, app.main, app.db.session as s\n"
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules], 'engine' in vars(s))"
+    )
+    env = {**os.environ, "DATABASE_URL": "sqlite:///unused.db"}
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+
+    assert result.stdout.strip() == "[] False"
+
+
+def test_profile_imports_reports_app_modules():
+    timings = startup.profile_imports("app.core.jwt")
+
+    names = [t.name for t in timings]
+    assert names[-1] == "app.core.jwt" and timings[-1].depth == 0
+    assert "jose.jwt" not in names
+    assert dict(startup.by_package(timings))["app.core.jwt"] >= 0
+
+
+def test_warmup_opens_pool_connections_and_hashes(tmp_path, monkeypatch):
+    # a pooled engine of its own, so the test needs no DATABASE_URL and leaves the app's engines alone
+    url = f"sqlite+aiosqlite:///{tmp_path / 'warmup.db'}"
+    warm_engine = create_async_engine(url, **session.engine_options(url, AsyncAdaptedQueuePool, session.async_pool_metrics))
+    # set in the module dict: getattr() would create the app's engines from DATABASE_URL
+    monkeypatch.setitem(vars(session), "engine", create_engine(f"sqlite:///{tmp_path / 'warmup.db'}"))
+    monkeypatch.setitem(vars(session), "async_engine", warm_engine)
+    monkeypatch.setattr(settings, "STARTUP_WARMUP_CONNECTIONS", 3)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(security, "_pwd_context", security.build_pwd_context(1, 1024, 1))
+
+    async def run():
+        timings = await startup.warmup()
+        idle = warm_engine.pool.checkedin()
+        await warm_engine.dispose()
+        return timings, idle
+
+    timings, idle = asyncio.run(run())
+
+    assert set(timings) == {"db_connections", "argon2_hash"}
+    assert idle >= 3
+
+
+def test_time_to_first_request(tmp_path):
+    url = f"sqlite:///{tmp_path / 'startup.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "EMAIL_WORKERS": "0",
+        "TOKEN_CLEANUP_INTERVAL": "0",
+        "PASSWORD_HASH_WORKERS": "0",
+    }
+    budget_ms = float(os.environ.get("STARTUP_BUDGET_MS", 15000))
+
+    result = startup.time_to_first_request("/health", env=env)
+
+    assert result["ready"] < budget_ms
+    assert result["first_request"] <= result["ready"]
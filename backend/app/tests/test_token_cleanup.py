@@ -0,0 +1,82 @@
+# backend/app/tests/test_token_cleanup.py
+# ------------------------------------------------------------
+# Tests for chunked pruning of refresh and reset tokens
+# ------------------------------------------------------------
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, EmailOutbox, RefreshToken, ResetToken, RevokedAccessToken, User
+from app.services import token_service
+from app.services.token_cleanup import prune_tokens
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cleanup.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    yield factory
+    engine.dispose()
+
+
+def test_reuse_of_old_token_is_detected_after_cleanup(session_factory):
+    with session_factory() as db:
+        user = User(email="idle@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        token = token_service.issue_refresh_token(db, user.id)
+        # issued days ago and left unused; a thief rotates it first
+        token_service.get_refresh_token(db, token).created_at = datetime.utcnow() - timedelta(days=3)
+        db.commit()
+        _, stolen = token_service.verify_and_rotate_refresh_token(db, token)
+
+    prune_tokens(session_factory, batch_size=10, sleep=0, retention=timedelta(hours=24))
+
+    with session_factory() as db:
+        with pytest.raises(token_service.RefreshTokenReuse) as reuse:
+            token_service.verify_and_rotate_refresh_token(db, token)
+        assert reuse.value.revoked == 1
+        assert token_service.get_refresh_token(db, stolen).revoked
+
+
+def test_prunes_only_dead_rows_in_chunks(session_factory):
+    now = datetime(2026, 1, 10)
+    old, recent = now - timedelta(days=3), now - timedelta(hours=1)
+    future = now + timedelta(days=1)
+    with session_factory() as db:
+        user = User(email="a@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        rows = [
+            # (revoked, created_at, expires_at, should survive)
+            *[(False, old, now - timedelta(seconds=1), False)] * 5,   # expired
+            *[(True, old, future, False)] * 2,                        # revoked past retention
+            (True, recent, future, True),                             # recently rotated
+            (False, old, future, True),                               # live
+        ]
+        for i, (revoked, created, expires, _) in enumerate(rows):
+            db.add(RefreshToken(user_id=user.id, token_hash=f"r{i}", revoked=revoked,
+                                created_at=created, expires_at=expires))
+        db.add_all([
+            ResetToken(user_id=user.id, token_hash="used", used=True, created_at=old, expires_at=future),
+            ResetToken(user_id=user.id, token_hash="fresh", used=False, created_at=recent, expires_at=future),
+            RevokedAccessToken(jti="gone", revoked_at=old, expires_at=old + timedelta(minutes=15)),
+            RevokedAccessToken(jti="live", revoked_at=recent, expires_at=future),
+            EmailOutbox(to_address="a@example.com", subject="s", html="h", status="sent", sent_at=old),
+            EmailOutbox(to_address="a@example.com", subject="s", html="h", status="failed", attempts=8),
+        ])
+        db.commit()
+
+    report = prune_tokens(session_factory, batch_size=2, sleep=0, retention=timedelta(hours=24), now=now)
+
+    assert report.deleted == {"refresh_tokens": 7, "reset_tokens": 1, "revoked_access_tokens": 1,
+                              "email_outbox": 1}
+    assert report.batches == 7
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(RefreshToken)) == 2
+        assert db.scalars(select(ResetToken.token_hash)).all() == ["fresh"]
+        assert db.scalars(select(EmailOutbox.status)).all() == ["failed"]
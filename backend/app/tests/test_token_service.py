@@ -0,0 +1,119 @@
+# backend/app/tests/test_token_service.py
+# ------------------------------------------------------------
+# Tests for refresh token lookup, rotation and revocation
+# ------------------------------------------------------------
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, RefreshToken, User
+from app.services import token_service
+
+
+@pytest.fixture(scope="function")
+def db():
+    """
+    Isolated in-memory database per test.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _user(db, email):
+    user = User(email=email, hashed_password="hashed")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_rotation_resolves_owner_by_hash(db):
+    alice = _user(db, "alice@example.com")
+    bob = _user(db, "bob@example.com")
+    alice_token = token_service.issue_refresh_token(db, alice.id)
+    token_service.issue_refresh_token(db, bob.id)  # newer token for someone else
+
+    user_id, new_token = token_service.verify_and_rotate_refresh_token(db, alice_token)
+
+    assert user_id == alice.id
+    assert new_token != alice_token
+    assert token_service.get_refresh_token(db, new_token).user_id == alice.id
+    # old token is single-use; replaying it revokes the family, successor included
+    with pytest.raises(token_service.RefreshTokenReuse) as reuse:
+        token_service.verify_and_rotate_refresh_token(db, alice_token)
+    assert (reuse.value.user_id, reuse.value.revoked) == (alice.id, 1)
+    db.expire_all()
+    assert token_service.get_refresh_token(db, new_token).revoked
+
+
+def test_rotation_chain_shares_family_and_counts_generations(db):
+    user = _user(db, "dave@example.com")
+    first = token_service.issue_refresh_token(db, user.id)
+    other_login = token_service.issue_refresh_token(db, user.id)
+
+    token = first
+    for _ in range(3):
+        _, token = token_service.verify_and_rotate_refresh_token(db, token)
+    head = token_service.get_refresh_token(db, token)
+    root = token_service.get_refresh_token(db, first)
+
+    assert head.family_id == root.family_id
+    assert head.generation == 3
+    assert token_service.get_refresh_token(db, other_login).family_id != root.family_id
+
+
+def test_legacy_token_without_family_rotates_into_one(db):
+    user = _user(db, "erin@example.com")
+    token = token_service.issue_refresh_token(db, user.id)
+    row = token_service.get_refresh_token(db, token)
+    row.family_id = None  # issued before families existed
+    db.commit()
+
+    _, rotated = token_service.verify_and_rotate_refresh_token(db, token)
+    assert token_service.get_refresh_token(db, rotated).family_id is not None
+    # nothing links a legacy token to its successor, so a replay is just rejected
+    assert token_service.verify_and_rotate_refresh_token(db, token) is None
+
+
+def test_wrong_verifier_is_unknown_not_reuse(db):
+    user = _user(db, "gina@example.com")
+    token = token_service.issue_refresh_token(db, user.id)
+    selector, verifier = token.split(".")
+    forged = f"{selector}.{verifier[::-1]}"
+
+    assert token_service.get_refresh_token(db, forged) is None
+    assert token_service.verify_and_rotate_refresh_token(db, forged) is None
+    assert token_service.get_refresh_token(db, "garbage.token") is None
+    # the real token is untouched
+    assert token_service.verify_and_rotate_refresh_token(db, token)[0] == user.id
+
+
+def test_pre_selector_token_is_still_accepted(db):
+    user = _user(db, "hank@example.com")
+    legacy = "legacy-" + "x" * 79  # token_urlsafe(64) tokens have no "."
+    db.add(RefreshToken(user_id=user.id, token_hash=token_service._hash_token(legacy),
+                        expires_at=datetime.utcnow() + timedelta(days=1)))
+    db.commit()
+
+    user_id, rotated = token_service.verify_and_rotate_refresh_token(db, legacy)
+    row = token_service.get_refresh_token(db, rotated)
+
+    assert user_id == user.id
+    assert "." in rotated and row.token_hash is None and row.selector is not None
+
+
+def test_revoke_refresh_token(db):
+    user = _user(db, "carol@example.com")
+    token = token_service.issue_refresh_token(db, user.id)
+
+    assert token_service.revoke_refresh_token(db, "unknown") is None
+    assert token_service.revoke_refresh_token(db, token) == user.id
+    assert token_service.revoke_refresh_token(db, token) is None
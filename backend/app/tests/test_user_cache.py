@@ -0,0 +1,86 @@
+# backend/app/tests/test_user_cache.py
+# ------------------------------------------------------------
+# Tests for the email -> user lookup cache and its backends
+# ------------------------------------------------------------
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import security
+from app.core.cache import MISSING
+from app.db.models import Base
+from app.services import user_service
+from app.services.user_cache import (
+    CachedUser,
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    UserLookupCache,
+)
+
+
+class FakeRedis:
+    """Stand-in exposing the subset of the redis-py client the backend uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(scope="function")
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(user_service, "user_cache", UserLookupCache(InMemoryCacheBackend(100), ttl=300, negative_ttl=30))
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.mark.parametrize("backend", [InMemoryCacheBackend(10), RedisCacheBackend(FakeRedis())])
+def test_positive_and_negative_entries(backend):
+    cache = UserLookupCache(backend, ttl=60, negative_ttl=60)
+    user = CachedUser(id=1, email="a@example.com", full_name=None, is_active=True)
+
+    assert cache.get("a@example.com") is MISSING
+    cache.set("A@example.com ", user)
+    cache.set("ghost@example.com", None)
+
+    assert cache.get("a@example.com") == user
+    assert cache.get("ghost@example.com") is None
+    cache.invalidate("a@example.com")
+    assert cache.get("a@example.com") is MISSING
+    assert cache.stats()["hits"] == 1 and cache.stats()["negative_hits"] == 1
+
+
+def test_writes_invalidate_cached_lookup(db):
+    user = user_service.create_user(db, "dora@example.com", "oldpass")
+    first = user_service.lookup_user_by_email(db, "dora@example.com")
+    assert user_service.lookup_user_by_email(db, "dora@example.com") == first
+
+    user_service.set_password(db, user, "newpass")
+    assert security.verify_password(user_service.get_password_hash(db, first.id), "newpass")
+
+    user_service.deactivate_user(db, user)
+    assert user_service.check_lockout(user_service.lookup_user_by_email(db, "dora@example.com")) is True
+
+
+def test_cached_entry_holds_no_password_hash(db):
+    user_service.create_user(db, "erin@example.com", "secret")
+    user = user_service.lookup_user_by_email(db, "erin@example.com")
+
+    raw = user_service.user_cache.backend.get(user_service.user_cache._key("erin@example.com"))
+    assert "hashed_password" not in raw and "argon2" not in raw
+    assert security.verify_password(user_service.get_password_hash(db, user.id), "secret")
@@ -0,0 +1,187 @@
+# backend/app/tests/test_user_import.py
+# ------------------------------------------------------------
+# Tests for streaming bulk user import and resume
+# ------------------------------------------------------------
+
+import io
+import json
+import time
+
+import pytest
+from passlib.hash import bcrypt
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api import admin as admin_api
+from app.config import settings
+from app.core.security import verify_password
+from app.db.models import Base, User
+from app.main import app
+from app.services.user_import import UserImporter, read_records
+from app.tests.test_auth_api import _register_and_login, api  # noqa: F401  (fixture)
+
+CSV = """email,password,hashed_password,full_name
+a@example.com,pw-a,,Alice
+B@Example.com,,{bcrypt},Bob
+a@example.com,other,,Dup
+not-an-email,pw,,Bad
+c@example.com,,plaintext-not-a-hash,Bad hash
+d@example.com,pw-d,,Dee
+e@example.com,pw-e,,Eve
+"""
+
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _importer(session_factory, **kwargs):
+    return UserImporter(session_factory, batch_size=2, hash_workers=0, **kwargs)
+
+
+def test_import_dedupes_validates_and_keeps_prehashed(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    bob_hash = bcrypt.using(rounds=4).hash("pw-b")
+    progress = _importer(session_factory).run(read_records(io.StringIO(CSV.format(bcrypt=bob_hash)), "csv"))
+
+    assert (progress.inserted, progress.duplicates, progress.invalid, progress.hashed) == (4, 1, 2, 3)
+    with session_factory() as db:
+        users = {u.email: u for u in db.scalars(select(User))}
+    assert sorted(users) == ["a@example.com", "b@example.com", "d@example.com", "e@example.com"]
+    assert users["b@example.com"].hashed_password == bob_hash
+    assert verify_password(users["b@example.com"].hashed_password, "pw-b")
+    assert verify_password(users["a@example.com"].hashed_password, "pw-a")
+
+
+def test_import_resumes_from_checkpoint(session_factory, tmp_path):
+    lines = "".join(json.dumps({"email": f"u{i}@example.com", "hashed_password": "$2b$04$" + "x" * 53}) + "\n"
+                    for i in range(7))
+    checkpoint = tmp_path / "import.checkpoint"
+    importer = _importer(session_factory, checkpoint=checkpoint)
+    real_flush, calls = importer._flush, []
+
+    def failing_flush(batch):
+        calls.append(len(batch))
+        if len(calls) == 3:
+            raise RuntimeError("connection lost")
+        real_flush(batch)
+
+    importer._flush = failing_flush
+    with pytest.raises(RuntimeError):
+        importer.run(read_records(io.StringIO(lines), "jsonl"))
+    assert checkpoint.read_text() == "4"
+
+    progress = _importer(session_factory, checkpoint=checkpoint).run(read_records(io.StringIO(lines), "jsonl"))
+
+    assert (progress.skipped_resumed, progress.inserted, progress.last_line) == (4, 3, 7)
+    with session_factory() as db:
+        assert len(db.scalars(select(User.id)).all()) == 7
+
+
+def test_malformed_jsonl_lines_are_reported_not_fatal(session_factory):
+    lines = "\n".join([
+        json.dumps({"email": "ok1@example.com", "hashed_password": "$2b$04$" + "x" * 53}),
+        '{"email": "broken@example.com", ',
+        "[1, 2]",
+        json.dumps({"email": "nopass@example.com"}),
+        json.dumps({"email": "ok2@example.com", "hashed_password": "$2b$04$" + "y" * 53}),
+    ]) + "\n"
+
+    progress = _importer(session_factory).run(read_records(io.StringIO(lines), "jsonl"))
+
+    assert (progress.inserted, progress.invalid, progress.done) == (2, 3, True)
+    assert [e["line"] for e in progress.errors] == [2, 3, 4]
+    assert progress.errors[0]["error"].startswith("invalid JSON")
+
+
+def test_blank_jsonl_lines_are_skipped_not_reported(session_factory):
+    lines = "\n".join([
+        json.dumps({"email": "a@example.com", "hashed_password": "$2b$04$" + "x" * 53}),
+        "",
+        "   ",
+        json.dumps({"email": "b@example.com", "hashed_password": "$2b$04$" + "y" * 53}),
+    ]) + "\n\n"
+
+    records = list(read_records(io.StringIO(lines), "jsonl"))
+    progress = _importer(session_factory).run(iter(records))
+
+    assert [r.line for r in records] == [1, 4]
+    assert (progress.read, progress.inserted, progress.invalid, progress.errors) == (2, 2, 0, [])
+    assert progress.last_line == 4
+
+
+def _wait(api, job, headers):
+    for _ in range(100):
+        status = api.get(f"/admin/users/import/{job}", headers=headers).json()
+        if status["done"] or status["error"]:
+            return status
+        time.sleep(0.05)
+    return status
+
+
+def test_admin_import_job_resumes_after_failure(api, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    monkeypatch.setattr(settings, "USER_IMPORT_HASH_WORKERS", 0)
+    monkeypatch.setattr(settings, "USER_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "USER_IMPORT_DIR", str(tmp_path / "imports"))
+    tokens = _register_and_login(api, email="admin@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    app.dependency_overrides[admin_api.get_session_factory] = lambda: sessionmaker(bind=engine)
+    body = "".join(json.dumps({"email": f"job{i}@example.com", "hashed_password": "$2b$04$" + "x" * 53}) + "\n"
+                   for i in range(5))
+    real_flush, calls = UserImporter._flush, []
+
+    def failing_flush(self, batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        real_flush(self, batch)
+
+    monkeypatch.setattr(UserImporter, "_flush", failing_flush)
+    job = api.post("/admin/users/import", params={"format": "jsonl"}, headers=headers,
+                   files={"file": ("users.jsonl", body.encode())}).json()["job_id"]
+    status = _wait(api, job, headers)
+    assert (status["error"], status["last_line"]) == ("connection lost", 2)
+
+    resp = api.post(f"/admin/users/import/{job}/resume", headers=headers)
+    assert resp.status_code == 202
+    status = _wait(api, job, headers)
+
+    assert (status["done"], status["skipped_resumed"], status["inserted"]) == (True, 2, 3)
+    with sessionmaker(bind=engine)() as db:
+        assert len(db.scalars(select(User.id).where(User.email.like("job%"))).all()) == 5
+    assert list((tmp_path / "imports").iterdir()) == []  # files removed once the job succeeds
+    assert api.post(f"/admin/users/import/{job}/resume", headers=headers).status_code == 404
+    assert api.post("/admin/users/import/../resume", headers=headers).status_code == 404
+    engine.dispose()
+
+
+def test_admin_import_endpoint_reports_progress(api, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    monkeypatch.setattr(settings, "USER_IMPORT_HASH_WORKERS", 0)
+    monkeypatch.setattr(settings, "USER_IMPORT_DIR", str(tmp_path / "imports"))
+    tokens = _register_and_login(api, email="admin@example.com")
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    app.dependency_overrides[admin_api.get_session_factory] = lambda: sessionmaker(bind=engine)
+    body = "".join(json.dumps({"email": f"bulk{i}@example.com", "password": "pw"}) + "\n" for i in range(3))
+
+    resp = api.post("/admin/users/import", params={"format": "jsonl"}, headers=headers,
+                    files={"file": ("users.jsonl", body.encode())})
+    assert resp.status_code == 202
+    job = resp.json()["job_id"]
+    for _ in range(100):
+        status = api.get(f"/admin/users/import/{job}", headers=headers).json()
+        if status["done"] or status["error"]:
+            break
+        time.sleep(0.05)
+
+    assert status["inserted"] == 3 and status["error"] is None
+    assert api.post("/auth/login", json={"email": "bulk1@example.com", "password": "pw"}).status_code == 200
+    assert api.get("/admin/users/import/nope", headers=headers).status_code == 404
+    engine.dispose()
@@ -0,0 +1,106 @@
+"""
+Audit log page latency as callers page deeper into the table.
+
+Walks the whole log page by page with the keyset query used by
+/audit/events and, for comparison, with LIMIT/OFFSET, sampling the
+latency of pages at increasing depths. Keyset pages should stay flat;
+OFFSET pages grow with the number of rows skipped.
+
+Run from backend/:
+    python -m benchmarks.audit_pagination --rows 200000 --page-size 100
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import AuditLog, Base
+from app.services.audit_query import AuditFilter, build_page_query
+
+ACTIONS = ("login", "refresh", "logout", "register", "password_reset")
+
+
+def _populate(db, rows: int) -> None:
+    start = datetime.utcnow() - timedelta(seconds=rows)
+    batch = []
+    for i in range(rows):
+        batch.append({
+            "user_id": None,
+            "action": ACTIONS[i % len(ACTIONS)],
+            "ip_address": f"10.0.{i % 256}.{i % 7}",
+            "success": i % 9 != 0,
+            "created_at": start + timedelta(seconds=i),
+        })
+        if len(batch) == 10_000:
+            db.execute(insert(AuditLog), batch)
+            batch.clear()
+    if batch:
+        db.execute(insert(AuditLog), batch)
+    db.commit()
+
+
+def _depths(pages: int, samples: int) -> list[int]:
+    step = max(pages // samples, 1)
+    return sorted({0, *range(step - 1, pages, step), pages - 1})
+
+
+def _walk_keyset(db, filters: AuditFilter, page_size: int, depths: set[int]) -> dict[int, float]:
+    timings, after, page = {}, None, 0
+    while True:
+        started = time.perf_counter()
+        rows = db.execute(build_page_query(filters, after, page_size)).all()
+        elapsed = time.perf_counter() - started
+        if not rows:
+            return timings
+        if page in depths:
+            timings[page] = elapsed * 1000
+        after = (rows[-1].created_at, rows[-1].id)
+        page += 1
+
+
+def _time_offset(db, filters: AuditFilter, page_size: int, depths: set[int]) -> dict[int, float]:
+    timings = {}
+    for page in sorted(depths):
+        query = build_page_query(filters, None, page_size).offset(page * page_size)
+        started = time.perf_counter()
+        db.execute(query).all()
+        timings[page] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=8, help="page depths to report")
+    parser.add_argument("--action", default=None, help="also filter on this action")
+    args = parser.parse_args()
+
+    filters = AuditFilter(action=args.action)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        _populate(db, args.rows)
+
+        matching = args.rows // len(ACTIONS) if args.action else args.rows
+        depths = set(_depths(-(-matching // args.page_size), args.samples))
+        keyset = _walk_keyset(db, filters, args.page_size, depths)
+        offset = _time_offset(db, filters, args.page_size, depths)
+
+        print(f"{'page':>8} {'rows skipped':>13} {'keyset (ms)':>12} {'offset (ms)':>12}")
+        for page in sorted(keyset):
+            print(f"{page:>8} {page * args.page_size:>13} {keyset[page]:>12.2f} {offset[page]:>12.2f}")
+        print(f"keyset median {statistics.median(keyset.values()):.2f} ms, "
+              f"offset median {statistics.median(offset.values()):.2f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Load benchmark for the /auth endpoints.
+
+Runs app.main:app in-process (httpx ASGI transport, real lifespan) against a
+fresh SQLite file and drives register, login, refresh, logout and
+forgot/reset flows at a fixed concurrency. For every endpoint it reports
+p50/p95/p99 latency, requests/sec, SQL statements per request and where the
+time went (password hashing vs. DB vs. everything else).
+
+Run from backend/:
+    python -m benchmarks.auth_load --users 200 --concurrency 32
+    python -m benchmarks.auth_load --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class Recorder:
+    """
+    Per-endpoint latency samples plus DB and hashing time attributed to the
+    endpoint currently running (tracked through a context variable).
+    """
+
+    def __init__(self):
+        import contextvars
+
+        self.current = contextvars.ContextVar("endpoint", default=None)
+        self.latencies = defaultdict(list)
+        self.statements = defaultdict(int)
+        self.db_seconds = defaultdict(float)
+        self.hash_seconds = defaultdict(float)
+        self.wall = {}
+
+    def attach_engine(self, engine) -> None:
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("bench_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["bench_started"].pop()
+            name = self.current.get()
+            if name is not None:
+                self.statements[name] += 1
+                self.db_seconds[name] += time.perf_counter() - started
+
+    def timed_hash(self, fn):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                name = self.current.get()
+                if name is not None:
+                    self.hash_seconds[name] += time.perf_counter() - started
+        return wrapper
+
+    def summary(self) -> dict:
+        out = {}
+        for name, samples in self.latencies.items():
+            n = len(samples)
+            ordered = sorted(samples)
+            total = sum(samples)
+            out[name] = {
+                "requests": n,
+                "rps": n / self.wall[name] if self.wall.get(name) else 0.0,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "mean_ms": statistics.fmean(samples) * 1000,
+                "queries_per_request": self.statements[name] / n,
+                "time_split_ms_per_request": {
+                    "hashing": self.hash_seconds[name] / n * 1000,
+                    "db": self.db_seconds[name] / n * 1000,
+                    "framework": max(total - self.hash_seconds[name] - self.db_seconds[name], 0.0) / n * 1000,
+                },
+            }
+        return out
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+async def _phase(recorder: Recorder, name: str, items: list, concurrency: int, call) -> list:
+    """
+    Run `call(item)` for every item with at most `concurrency` in flight.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(items)
+
+    async def one(i, item):
+        async with semaphore:
+            recorder.current.set(name)
+            started = time.perf_counter()
+            resp = await call(item)
+            recorder.latencies[name].append(time.perf_counter() - started)
+            if resp.status_code >= 400:
+                raise RuntimeError(f"{name} failed: {resp.status_code} {resp.text}")
+            results[i] = resp
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, item) for i, item in enumerate(items)))
+    recorder.wall[name] = time.perf_counter() - started
+    return results
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.api import auth as auth_api
+    from app.db.models import Base
+    from app.db.session import async_engine, engine
+    from app.main import app
+    from app.services import user_service
+
+    Base.metadata.create_all(engine)
+    recorder = Recorder()
+    recorder.attach_engine(engine)
+    recorder.attach_engine(async_engine.sync_engine)
+    user_service.hash_password_async = recorder.timed_hash(user_service.hash_password_async)
+    auth_api.verify_password_async = recorder.timed_hash(auth_api.verify_password_async)
+
+    reset_links = {}
+    queue_reset_email = auth_api.queue_password_reset_email_async
+
+    async def capture_reset_email(db, to_email, reset_link, **kwargs):
+        reset_links[to_email] = reset_link
+        return await queue_reset_email(db, to_email, reset_link, **kwargs)
+
+    auth_api.queue_password_reset_email_async = capture_reset_email
+
+    emails = [f"load{i}@example.com" for i in range(args.users)]
+    password = "Bench-pass-123"
+    cpu_started = time.process_time()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            post = client.post
+            await _phase(recorder, "register", emails, args.concurrency,
+                         lambda e: post("/auth/register", json={"email": e, "password": password}))
+            logins = await _phase(recorder, "login", emails, args.concurrency,
+                                  lambda e: post("/auth/login", json={"email": e, "password": password}))
+            refresh_tokens = [r.json()["refresh_token"] for r in logins]
+            refreshed = await _phase(recorder, "refresh", refresh_tokens, args.concurrency,
+                                     lambda t: post("/auth/refresh", json={"refresh_token": t}))
+            await _phase(recorder, "logout", [r.json()["refresh_token"] for r in refreshed], args.concurrency,
+                         lambda t: post("/auth/logout", json={"refresh_token": t}))
+            await _phase(recorder, "forgot_password", emails, args.concurrency,
+                         lambda e: post("/auth/forgot-password", json={"email": e}))
+            tokens = [reset_links[e].split("token=")[1] for e in emails if e in reset_links]
+            await _phase(recorder, "reset_password", tokens, args.concurrency,
+                         lambda t: post("/auth/reset-password", json={"token": t, "new_password": password + "!"}))
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "hash_workers": os.environ.get("PASSWORD_HASH_WORKERS", "auto"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "main_process_cpu_seconds": time.process_time() - cpu_started,
+        "endpoints": recorder.summary(),
+    }
+
+
+def _print(result: dict, baseline: dict | None) -> None:
+    header = f"{'endpoint':<16}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}{'hash':>8}{'db':>8}{'other':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in result["endpoints"].items():
+        split = row["time_split_ms_per_request"]
+        line = (f"{name:<16}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['queries_per_request']:>7.1f}{split['hashing']:>8.1f}{split['db']:>8.1f}{split['framework']:>8.1f}")
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base:
+            line += f"   p95 {_delta(row['p95_ms'], base['p95_ms'])}  rps {_delta(row['rps'], base['rps'])}"
+        print(line)
+    print("latencies and time split in ms; main-process CPU "
+          f"{result['main_process_cpu_seconds']:.2f}s")
+
+
+def _delta(now: float, before: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(now - before) / before * 100:+.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="accounts driven through every flow")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per phase")
+    parser.add_argument("--hash-workers", type=int, default=None, help="PASSWORD_HASH_WORKERS for the run")
+    parser.add_argument("--db", type=Path, default=None, help="SQLite file to use (default: fresh temp file)")
+    parser.add_argument("--output", type=Path, default=None, help="JSON result path (default: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous JSON result to diff against")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    db_path = args.db or Path(tmp.name) / "auth_load.db"
+    # Settings and engines are read at import time, so configure the env first.
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # Every simulated user logs in from the same address; measure the flows, not the throttle.
+    for limit in ("LOGIN_RATE_LIMIT_PER_IP", "LOGIN_RATE_LIMIT_PER_EMAIL", "LOGIN_RATE_LIMIT_GLOBAL"):
+        os.environ[limit] = "0"
+    # Reset mail stays queued in the outbox rather than printed by the console provider.
+    os.environ.setdefault("EMAIL_WORKERS", "0")
+    if args.hash_workers is not None:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    _print(result, baseline)
+
+    output = args.output or RESULTS_DIR / f"auth_load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"saved {output}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Render throughput of the email templates for bulk notification sends.
+
+Renders the password-reset message (subject, HTML and plaintext parts) for N
+recipients with the compiled EmailTemplates, the same templates compiled
+from source on every render (what a naive per-send Jinja call costs), and
+with fragments re-rendered per message instead of pre-rendered at load.
+The f-string the service used before templates is shown as a floor.
+
+Run from backend/:
+    python -m benchmarks.email_templates --renders 20000 --locale es
+"""
+import argparse
+import time
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from app.services.email import TEMPLATES_DIR, EmailTemplates
+
+
+def _rate(render, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        render(f"https://example.com/reset-password?token={i:032x}")
+    return count / (time.perf_counter() - started)
+
+
+def run(args) -> None:
+    context = {"product_name": "Example", "support_email": "support@example.com"}
+    started = time.perf_counter()
+    templates = EmailTemplates(TEMPLATES_DIR, default_locale="en", fragment_context=context)
+    templates.load()
+    load_ms = (time.perf_counter() - started) * 1000
+    locale = templates.resolve_locale("password_reset", args.locale)
+
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html"]))
+    sources = {part: (TEMPLATES_DIR / locale / f"password_reset.{part}").read_text()
+               for part in ("subject.txt", "html", "txt")}
+    fragment_sources = {p.name: p.read_text() for p in (TEMPLATES_DIR / locale / "fragments").iterdir()}
+
+    def fragments(suffix: str, source_env: Environment) -> dict:
+        return {name.rsplit(".", 1)[0]: Markup(source_env.from_string(src).render(context).strip())
+                for name, src in fragment_sources.items() if name.endswith(suffix)}
+
+    def uncompiled(link: str) -> None:
+        # parse + compile every template (layout included) for every message
+        fresh = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html"]),
+                            cache_size=0)
+        fresh.from_string(sources["subject.txt"]).render(reset_link=link)
+        fresh.get_template(f"{locale}/password_reset.html").render(
+            reset_link=link, locale=locale, fragments=fragments(".html", fresh))
+        fresh.from_string(sources["txt"]).render(reset_link=link, fragments=fragments(".txt", fresh))
+
+    fragment_templates = {p.name: env.get_template(f"{locale}/fragments/{p.name}")
+                          for p in (TEMPLATES_DIR / locale / "fragments").iterdir()}
+
+    def compiled_fragments(suffix: str) -> dict:
+        return {name.rsplit(".", 1)[0]: Markup(t.render(context).strip())
+                for name, t in fragment_templates.items() if name.endswith(suffix)}
+
+    subject_t = env.get_template(f"{locale}/password_reset.subject.txt")
+    html_t = env.get_template(f"{locale}/password_reset.html")
+    text_t = env.get_template(f"{locale}/password_reset.txt")
+
+    def fragments_per_message(link: str) -> None:
+        subject_t.render(reset_link=link)
+        html_t.render(reset_link=link, locale=locale, fragments=compiled_fragments(".html"))
+        text_t.render(reset_link=link, fragments=compiled_fragments(".txt"))
+
+    def legacy(link: str) -> None:
+        f"""
+    <h2>Password Reset</h2>
+    <p>We received a request to reset your password.</p>
+    <p><a href=\"{link}\">Click here to reset your password</a></p>
+    <p>If you did not request this, you can ignore this email.</p>
+    """
+
+    rows = [
+        ("compiled + pre-rendered fragments", _rate(lambda link: templates.render("password_reset", locale, reset_link=link), args.renders)),
+        ("compiled, fragments per message", _rate(fragments_per_message, args.renders)),
+        ("compiled from source per message", _rate(uncompiled, max(args.renders // 20, 1))),
+        ("f-string, HTML only (before)", _rate(legacy, args.renders)),
+    ]
+    print(f"locale {locale}: {len(templates.locales())} locales compiled in {load_ms:.1f} ms")
+    for label, rate in rows:
+        print(f"{label:<36}{rate:>12,.0f} renders/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=20_000)
+    parser.add_argument("--locale", default="en")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Refresh-token lookup latency as the refresh_tokens table grows.
+
+Compares the old "latest unrevoked token" scan used by /auth/refresh and
+/auth/logout, the point lookup on the unique token_hash index (legacy
+tokens), and the lookup by selector for `<selector>.<verifier>` tokens.
+Also reports the on-disk size of each index.
+
+Run from backend/:
+    python -m benchmarks.refresh_lookup --sizes 1000 10000 100000 --lookups 500
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.jwt import create_refresh_token
+from app.db.models import Base, RefreshToken, User
+from app.services.token_service import _hash_token, get_refresh_token
+
+
+def _populate(db, rows: int, legacy: bool) -> list[str]:
+    users = [{"email": f"bench{i}@example.com", "hashed_password": "x"} for i in range(max(rows // 10, 1))]
+    db.execute(insert(User), users)
+    now = datetime.utcnow()
+    plains = []
+    batch = []
+    for i in range(rows):
+        parts = create_refresh_token()
+        if legacy:
+            plain = parts.token.replace(".", "")
+            key = {"token_hash": _hash_token(plain)}
+        else:
+            plain = parts.token
+            key = {"selector": parts.selector, "verifier_hash": parts.verifier_hash}
+        plains.append(plain)
+        batch.append({
+            "user_id": (i % len(users)) + 1,
+            **key,
+            "revoked": i % 3 == 0,
+            "issued_at": now,
+            "created_at": now - timedelta(seconds=rows - i),
+            "expires_at": now + timedelta(days=30),
+        })
+        if len(batch) == 10_000:
+            db.execute(insert(RefreshToken), batch)
+            batch.clear()
+    if batch:
+        db.execute(insert(RefreshToken), batch)
+    db.commit()
+    return plains
+
+
+def _latest_unrevoked(db, _plain):
+    return (
+        db.query(RefreshToken)
+        .filter(RefreshToken.revoked == False)
+        .order_by(RefreshToken.created_at.desc())
+        .first()
+    )
+
+
+def _index_bytes(db, name: str) -> int | None:
+    try:
+        return db.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :name"), {"name": name}).scalar()
+    except OperationalError:
+        return None  # sqlite built without dbstat
+
+
+def _kib(size: int | None) -> str:
+    return "n/a" if size is None else f"{size / 1024:.0f}"
+
+
+def _time(fn, db, plains: list[str], lookups: int) -> float:
+    samples = []
+    for plain in random.sample(plains, min(lookups, len(plains))):
+        start = time.perf_counter()
+        fn(db, plain)
+        samples.append((time.perf_counter() - start) * 1e6)
+        db.expunge_all()
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'scan p50 (us)':>15} {'by hash p50 (us)':>17} {'by selector p50 (us)':>21}"
+          f" {'hash index (KiB)':>17} {'selector index (KiB)':>21}")
+    for size in args.sizes:
+        results = {}
+        for legacy in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+                Base.metadata.create_all(engine)
+                db = sessionmaker(bind=engine)()
+                plains = _populate(db, size, legacy)
+                if legacy:
+                    results["scan"] = _time(_latest_unrevoked, db, plains, args.lookups)
+                    results["hash"] = _time(get_refresh_token, db, plains, args.lookups)
+                    results["hash_index"] = _index_bytes(db, "sqlite_autoindex_refresh_tokens_1")
+                else:
+                    results["selector"] = _time(get_refresh_token, db, plains, args.lookups)
+                    results["selector_index"] = _index_bytes(db, "ix_refresh_tokens_selector")
+                db.close()
+                engine.dispose()
+        print(f"{size:>10} {results['scan']:>15.1f} {results['hash']:>17.1f} {results['selector']:>21.1f}"
+              f" {_kib(results['hash_index']):>17} {_kib(results['selector_index']):>21}")
+
+if __name__ == "__main__":
+    main()
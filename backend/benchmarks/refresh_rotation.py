@@ -0,0 +1,123 @@
+"""
+Refresh-token rotation and reuse detection on deep rotation chains.
+
+For each chain depth, builds users whose single login has been rotated
+that many times, then measures per operation:
+
+- rotate:   refreshing the newest token (point lookup, conditional revoke, insert)
+- reuse:    replaying the original token (point lookup + one family UPDATE)
+- history:  the same without families: load the user's whole token history
+            to find the replayed token, then revoke everything issued after it
+
+Run from backend/:
+    python -m benchmarks.refresh_rotation --depths 10 100 1000 --samples 50
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Base, RefreshToken, User
+from app.services.token_service import RefreshTokenReuse, _hash_token, verify_and_rotate_refresh_token
+
+
+def _populate(db, tag: str, depth: int, users: int) -> list[tuple[int, str, str]]:
+    """
+    Returns (user_id, first token, newest token) per user.
+    """
+    first_id = db.scalar(select(User.id).order_by(User.id.desc()).limit(1)) or 0
+    db.execute(insert(User), [{"email": f"{tag}-{u}@example.com", "hashed_password": "x"} for u in range(users)])
+    now = datetime.utcnow()
+    chains = []
+    rows = []
+    for u in range(users):
+        user_id = first_id + u + 1
+        family = uuid.uuid4().hex
+        plains = [f"{tag}-u{u}-g{g}" for g in range(depth + 1)]
+        for g, plain in enumerate(plains):
+            rows.append({
+                "user_id": user_id,
+                "token_hash": _hash_token(plain),
+                "revoked": g < depth,
+                "family_id": family,
+                "generation": g,
+                "issued_at": now,
+                "created_at": now - timedelta(seconds=depth - g),
+                "expires_at": now + timedelta(days=30),
+            })
+        chains.append((user_id, plains[0], plains[-1]))
+        if len(rows) >= 10_000:
+            db.execute(insert(RefreshToken), rows)
+            rows.clear()
+    if rows:
+        db.execute(insert(RefreshToken), rows)
+    db.commit()
+    return chains
+
+
+def _history_scan(db, user_id: int, plain: str) -> None:
+    # Without families: load the user's history to find the replayed token, then revoke what follows it
+    history = db.execute(
+        select(RefreshToken.id, RefreshToken.token_hash, RefreshToken.revoked)
+        .where(RefreshToken.user_id == user_id)
+        .order_by(RefreshToken.created_at)
+    ).all()
+    token_hash = _hash_token(plain)
+    position = next(i for i, row in enumerate(history) if row.token_hash == token_hash)
+    later = [row.id for row in history[position:] if not row.revoked]
+    db.execute(update(RefreshToken).where(RefreshToken.id.in_(later)).values(revoked=True))
+    db.commit()
+
+
+def _p50(samples: list[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+def run(args) -> None:
+    print(f"{'depth':>7} {'rotate p50 (ms)':>16} {'reuse p50 (ms)':>15} {'history p50 (ms)':>17}")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        # measure statements, not fsync: every variant commits once per operation
+        event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA synchronous=OFF"))
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        for depth in args.depths:
+            chains = _populate(db, f"chain{depth}", depth, args.samples)
+            rotate, reuse, history = [], [], []
+            for user_id, first, newest in chains:
+                started = time.perf_counter()
+                verify_and_rotate_refresh_token(db, newest)
+                rotate.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                try:
+                    verify_and_rotate_refresh_token(db, first)
+                except RefreshTokenReuse:
+                    pass
+                reuse.append(time.perf_counter() - started)
+                db.expunge_all()
+            # fresh chains for the baseline, since the ones above are now fully revoked
+            for user_id, first, _ in _populate(db, f"history{depth}", depth, args.samples):
+                started = time.perf_counter()
+                _history_scan(db, user_id, first)
+                history.append(time.perf_counter() - started)
+            print(f"{depth:>7} {_p50(rotate):>16.3f} {_p50(reuse):>15.3f} {_p50(history):>17.3f}")
+        db.close()
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--samples", type=int, default=50, help="users (chains) per depth")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()